@@ -382,6 +382,11 @@ class DeliveryAdmin(admin.ModelAdmin):
 class WithdrawalAdmin(admin.ModelAdmin):
     pass
 
+class OrderJobAdmin(admin.ModelAdmin):
+
+    list_display = ('__unicode__', 'order', 'status', 'attempts', 'created_on', 'run_after', 'done_on')
+    list_filter = ('status', 'kind')
+
 class UserProfileAdmin(admin.ModelAdmin):
 
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
@@ -484,6 +489,7 @@ admin.site.register(gas_models.order.GASSupplierOrderProduct, GASSupplierOrderPr
 admin.site.register(gas_models.order.GASMemberOrder, GASMemberOrderAdmin)
 admin.site.register(gas_models.order.Delivery, DeliveryAdmin)
 admin.site.register(gas_models.order.Withdrawal, WithdrawalAdmin)
+admin.site.register(gas_models.job.OrderJob, OrderJobAdmin)
 admin.site.register(rest_models.HomePage)
 
 admin.site.register(auth_models.PrincipalParamRoleRelation, PPRAdmin)
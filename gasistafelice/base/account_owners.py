@@ -0,0 +1,142 @@
+"""Batch resolution of the resources owning accounts shown in ledgers.
+
+Accounts bound to a resource are named after it: "person-<pk>", "gas-<pk>"
+or "supplier-<pk>". Other accounts are shown by the owner of their
+accounting system.
+
+Rendering a ledger row by row would issue one query for every entry.
+An ``AccountOwnerResolver`` resolves owners of a whole page (or chunk) of
+``LedgerEntry``s with one query per model type, and remembers them.
+Use ``get_resolver`` to share a resolver within the current request.
+"""
+
+from django.contrib.contenttypes.models import ContentType
+
+from gasistafelice.lib import request_cache
+
+import re
+import logging
+log = logging.getLogger(__name__)
+
+ACCOUNT_NAME_RE = re.compile(r'^(person|gas|supplier)-(\d+)$')
+
+RESOLVER_KEY = 'account_owner_resolver'
+
+CHUNK_SIZE = 500
+
+def _get_model(resource_type):
+    if resource_type == 'person':
+        from gasistafelice.base.models import Person
+        return Person
+    elif resource_type == 'gas':
+        from gasistafelice.gas.models.base import GAS
+        return GAS
+    elif resource_type == 'supplier':
+        from gasistafelice.supplier.models import Supplier
+        return Supplier
+
+class AccountOwnerResolver(object):
+    """Resolve and remember the resources owning accounts."""
+
+    def __init__(self):
+        # account pk -> owner instance
+        self._owners = {}
+
+    def resolve(self, entries):
+        """Resolve owners of accounts of ``entries`` not already resolved.
+
+        ``entries`` is a sequence of ``LedgerEntry`` instances.
+        Query ``account`` and ``account__system`` with ``select_related``
+        to avoid per entry queries.
+        """
+        self.resolve_accounts([entry.account for entry in entries])
+
+    def resolve_accounts(self, accounts):
+
+        named = {}   # model -> { pk : [accounts] }
+        unnamed = {} # system pk -> [accounts]
+        for account in accounts:
+            if account.pk in self._owners:
+                continue
+            self._owners[account.pk] = None
+            m = ACCOUNT_NAME_RE.match(account.name)
+            if m:
+                model = _get_model(m.group(1))
+                named.setdefault(model, {}).setdefault(int(m.group(2)), []).append(account)
+            else:
+                unnamed.setdefault(account.system_id, []).append(account)
+
+        for model, accounts_by_pk in named.items():
+            objs = model.objects.in_bulk(accounts_by_pk.keys())
+            for pk, accounts in accounts_by_pk.items():
+                if pk in objs:
+                    for account in accounts:
+                        self._owners[account.pk] = objs[pk]
+                else:
+                    # dangling name: show the owner of the accounting system
+                    for account in accounts:
+                        unnamed.setdefault(account.system_id, []).append(account)
+
+        if unnamed:
+            self._resolve_system_owners(unnamed)
+
+    def _resolve_system_owners(self, accounts_by_system):
+        """Resolve accounts by the owner of their accounting system."""
+
+        from simple_accounting.models import AccountSystem
+
+        # content type pk -> { object_id : [accounts] }
+        by_ctype = {}
+        for system in AccountSystem.objects.filter(
+            pk__in=accounts_by_system.keys()).select_related('owner'):
+            by_ctype.setdefault(system.owner.content_type_id, {}).setdefault(
+                system.owner.object_id, []).extend(accounts_by_system[system.pk])
+
+        for ctype_pk, accounts_by_pk in by_ctype.items():
+            model = ContentType.objects.get_for_id(ctype_pk).model_class()
+            objs = model._default_manager.in_bulk(accounts_by_pk.keys())
+            for pk, accounts in accounts_by_pk.items():
+                for account in accounts:
+                    self._owners[account.pk] = objs.get(pk)
+
+    def get_owner(self, account):
+        """Return the resource owning ``account`` (resolve it if needed)."""
+        if account.pk not in self._owners:
+            self.resolve_accounts([account])
+        return self._owners[account.pk]
+
+    def get_name(self, account):
+        """Return the human readable name of the owner of ``account``."""
+        obj = self.get_owner(account)
+        if obj is None:
+            return u""
+        m = ACCOUNT_NAME_RE.match(account.name)
+        if m and isinstance(obj, _get_model(m.group(1))):
+            if m.group(1) == 'person':
+                return obj.report_name
+            elif m.group(1) == 'gas':
+                return obj.id_in_des
+            else:
+                return obj.name
+        return u"%s" % obj
+
+    def iter_resolved(self, entries):
+        """Iterate over ``entries`` resolving their owners by chunks.
+
+        Useful to stream long ledgers without loading them in memory.
+        """
+        chunk = []
+        for entry in entries:
+            chunk.append(entry)
+            if len(chunk) == CHUNK_SIZE:
+                self.resolve(chunk)
+                for e in chunk:
+                    yield e
+                chunk = []
+        self.resolve(chunk)
+        for e in chunk:
+            yield e
+
+def get_resolver():
+    """Return the resolver shared within the current request."""
+    return request_cache.get_or_create(RESOLVER_KEY, AccountOwnerResolver)
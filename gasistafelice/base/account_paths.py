@@ -0,0 +1,155 @@
+"""In-process index of accounts by path.
+
+Accounting code retrieves accounts by path (i.e: ``system['/members/' + person.uid]``),
+and `simple_accounting` walks the account tree in the database, one query for each
+level of the path, every time.
+
+This module keeps, for every accounting system, a dictionary which maps paths
+to accounts. The index of a system is loaded with one query on first use:
+
+* ``get_account`` is the same as ``system[path]``,
+* ``get_accounts`` resolves many paths of a system (i.e: the accounts of all
+  the members of a GAS),
+* ``preload`` and ``preload_owners`` load indexes of many systems
+  (i.e: the systems of all the members of a GAS) with one query (for each chunk).
+
+The index of a system is dropped by ``invalidate`` every time an account
+of the system is saved or deleted (see signal handlers in ``gasistafelice.base.models``),
+and again by ``forget_changed`` at the end of the request
+(see ``gasistafelice.middleware.RequestCacheMiddleware``): accounts created
+by a database transaction which is rolled back must not outlive it.
+Accounts created by other processes are found anyway: a path which is not
+in the index reloads it once before giving up.
+"""
+
+from django.contrib.contenttypes.models import ContentType
+
+from simple_accounting.models import Account, AccountSystem
+
+from gasistafelice.lib.bulk import chunks as _chunks
+
+import logging
+log = logging.getLogger(__name__)
+
+_systems = {} # system pk -> { path : account }
+_changed = set() # pks of systems whose accounts have been saved or deleted
+
+def invalidate(sender=None, instance=None, **kw):
+    """Drop the index of the system of ``instance`` (all indexes if None).
+
+    It accepts any argument so it can be connected to signals.
+    """
+    if instance is None:
+        _systems.clear()
+    else:
+        _systems.pop(instance.system_id, None)
+        _changed.add(instance.system_id)
+
+def forget_changed():
+    """Drop indexes of systems invalidated since the last call."""
+    while _changed:
+        _systems.pop(_changed.pop(), None)
+
+def _normalize(path):
+    path = path.rstrip('/')
+    if not path.startswith('/'):
+        path = '/' + path
+    return path
+
+def _build(accounts):
+    """Return a dictionary which maps paths to ``accounts`` of one system."""
+
+    by_pk = dict((account.pk, account) for account in accounts)
+    paths = {}
+
+    def get_path(account):
+        if account.pk not in paths:
+            parent = by_pk.get(account.parent_id)
+            if parent is None:
+                # root account
+                paths[account.pk] = ''
+            else:
+                paths[account.pk] = get_path(parent) + '/' + account.name
+        return paths[account.pk]
+
+    rv = {}
+    for account in accounts:
+        rv[get_path(account) or '/'] = account
+    return rv
+
+def _load(accounts):
+    """Index ``accounts`` (a QuerySet of accounts of one or more systems)."""
+
+    by_system = {}
+    for account in accounts:
+        by_system.setdefault(account.system_id, []).append(account)
+    for system_pk, system_accounts in by_system.items():
+        _systems[system_pk] = _build(system_accounts)
+        log.debug("Accounts of system %s indexed (%d paths)" % (system_pk, len(system_accounts)))
+
+def _get_index(system_pk, reload=False):
+    if reload or system_pk not in _systems:
+        _systems.pop(system_pk, None)
+        _load(Account.objects.filter(system=system_pk))
+    return _systems.get(system_pk, {})
+
+#-------------------------------------------------------------------------------
+
+def get_accounts(system, paths):
+    """Return a dictionary which maps ``paths`` to accounts of ``system``.
+
+    Paths without an account are skipped.
+    """
+    just_loaded = system.pk not in _systems
+    index = _get_index(system.pk)
+
+    rv = {}
+    missing = []
+    for path in paths:
+        try:
+            rv[path] = index[_normalize(path)]
+        except KeyError:
+            missing.append(path)
+
+    if missing and not just_loaded:
+        # created by another process?
+        index = _get_index(system.pk, reload=True)
+        for path in missing:
+            if _normalize(path) in index:
+                rv[path] = index[_normalize(path)]
+    return rv
+
+def get_account(system, path):
+    """Return the account of ``system`` at ``path``.
+
+    Same as ``system[path]``: raise ``Account.DoesNotExist`` if there is none.
+    """
+    try:
+        return get_accounts(system, [path])[path]
+    except KeyError:
+        raise Account.DoesNotExist("Account %s does not exist in system %s" % (path, system))
+
+def preload(systems):
+    """Load indexes of ``systems`` (instances or primary keys) which are not loaded yet."""
+
+    system_pks = set(getattr(system, 'pk', system) for system in systems)
+    system_pks.difference_update(_systems.keys())
+    for pks in _chunks(list(system_pks)):
+        _load(Account.objects.filter(system__in=pks))
+
+def preload_owners(instances):
+    """Load indexes of the accounting systems of ``instances`` (i.e: the persons
+    of a formset): system keys are retrieved with one query for each model.
+    """
+    by_ctype = {}
+    for obj in instances:
+        ctype = ContentType.objects.get_for_model(obj)
+        by_ctype.setdefault(ctype, set()).add(obj.pk)
+
+    system_pks = []
+    for ctype, pks in by_ctype.items():
+        for chunk in _chunks(list(pks)):
+            system_pks.extend(AccountSystem.objects.filter(
+                owner__content_type=ctype, owner__object_id__in=chunk
+            ).values_list('pk', flat=True))
+    preload(system_pks)
@@ -1,8 +1,12 @@
 from django.utils.translation import ugettext, ugettext_lazy as _
+from django.conf import settings
+from django.core.cache import get_cache, InvalidCacheBackendError
 
 from simple_accounting.exceptions import MalformedTransaction
-from simple_accounting.models import AccountingProxy, Transaction, LedgerEntry, account_type
-from simple_accounting.utils import register_transaction
+from simple_accounting.models import AccountingProxy, Transaction, LedgerEntry, Account, account_type
+
+from gasistafelice.base.balances import register_transaction
+from gasistafelice.base import account_paths
 
 from gasistafelice.consts import (
     INCOME, EXPENSE, ASSET, LIABILITY, EQUITY,
@@ -10,7 +14,49 @@ from gasistafelice.consts import (
 )
 from datetime import datetime
 
-class PersonAccountingProxy(AccountingProxy):
+ACCOUNT_TREE_KEY = "account_tree_complete:%s:%s"
+ACCOUNT_TREE_TIMEOUT = 60*60*24*7
+
+def _get_cache():
+    try:
+        return get_cache(getattr(settings, 'ACCOUNT_TREE_CACHE', 'default'))
+    except InvalidCacheBackendError:
+        return get_cache('default')
+
+class AccountTreeMixin(object):
+    """Create accounts that subjects of an old account tree may lack.
+
+    Classes combined with this mixin must implement ``missing_accounts(gas)``,
+    which creates accounts of the subject related to ``gas``: ``ensure_accounts(gas)``
+    calls it only if the tree has not been marked as complete yet.
+    Marks are stored in the cache named ``ACCOUNT_TREE_CACHE`` in settings,
+    shared by web workers and management commands.
+
+    A mark can outlive accounts created by a transaction which is rolled back:
+    ``get_tree_account`` repairs the tree if an account does not exist.
+
+    Only operations that register transactions ensure accounts: balances and
+    entries are read-only, missing accounts have no entries.
+    Trees of all the subjects can be repaired by the `repair_account_trees`
+    management command.
+    """
+
+    def ensure_accounts(self, gas, force=False):
+        cache = _get_cache()
+        key = ACCOUNT_TREE_KEY % (self.subject.instance.uid, gas.uid)
+        if force or not cache.get(key):
+            self.missing_accounts(gas)
+            cache.set(key, True, ACCOUNT_TREE_TIMEOUT)
+
+    def get_tree_account(self, gas, system, path):
+        """Return the account of ``system`` at ``path``, repairing the tree related to ``gas`` if needed."""
+        try:
+            return account_paths.get_account(system, path)
+        except Account.DoesNotExist:
+            self.ensure_accounts(gas, force=True)
+            return account_paths.get_account(system, path)
+
+class PersonAccountingProxy(AccountTreeMixin, AccountingProxy):
     """
     This class is meant to be the place where implementing the accounting API 
     for ``Person``-like economic subjects.
@@ -25,7 +71,7 @@ class PersonAccountingProxy(AccountingProxy):
         """last entry for one subject"""
 
         try:
-            latest = self.system[base_path].ledger_entries.latest('transaction__date')
+            latest = account_paths.get_account(self.system, base_path).ledger_entries.latest('transaction__date')
         except LedgerEntry.DoesNotExist:
             latest = None
         return latest
@@ -48,10 +94,10 @@ class PersonAccountingProxy(AccountingProxy):
         elif not person.has_been_member(gas):
             raise MalformedTransaction(ugettext("A person can't make an account recharge for a GAS that (s)he is not member of"))
         else:
-            source_account = self.system['/wallet']
-            exit_point = self.system['/expenses/gas/' + gas.uid + '/recharges']
-            entry_point =  gas.accounting.system['/incomes/recharges']
-            target_account = gas.accounting.system['/members/' + person.uid]
+            source_account = account_paths.get_account(self.system, '/wallet')
+            exit_point = account_paths.get_account(self.system, '/expenses/gas/' + gas.uid + '/recharges')
+            entry_point =  account_paths.get_account(gas.accounting.system, '/incomes/recharges')
+            target_account = account_paths.get_account(gas.accounting.system, '/members/' + person.uid)
             description = unicode(person.report_name)
             issuer = self.subject
             if not date:
@@ -124,36 +170,35 @@ class PersonAccountingProxy(AccountingProxy):
         gas_system = gas.accounting.system
         kind = GASMEMBER_GAS
 
-        #UGLY: remove me when done and executed one command that regenerate all missing accounts
-        self.missing_accounts(gas)
+        self.ensure_accounts(gas)
 
         if target == INCOME: #Correction for gasmember: +gasmember -GAS
-            source_account = gas_system['/cash']
-            exit_point = gas_system['/expenses/member']
-            entry_point = gas_system['/incomes/recharges']
-            target_account = gas_system['/members/' + person.uid]
+            source_account = account_paths.get_account(gas_system, '/cash')
+            exit_point = self.get_tree_account(gas, gas_system, '/expenses/member')
+            entry_point = account_paths.get_account(gas_system, '/incomes/recharges')
+            target_account = account_paths.get_account(gas_system, '/members/' + person.uid)
         elif  target == EXPENSE: #Correction for GAS: +GAS -gasmember
-            source_account = gas_system['/members/' + person.uid]
-            exit_point = gas_system['/expenses/gas']
-            entry_point = gas_system['/incomes/member']
-            target_account = gas_system['/cash']
+            source_account = account_paths.get_account(gas_system, '/members/' + person.uid)
+            exit_point = self.get_tree_account(gas, gas_system, '/expenses/gas')
+            entry_point = self.get_tree_account(gas, gas_system, '/incomes/member')
+            target_account = account_paths.get_account(gas_system, '/cash')
         elif  target == ASSET: #Detraction for Gasmember: -gasmember
-            source_account = gas_system['/members/' + person.uid]
-            exit_point = gas_system['/expenses/member']
-            entry_point = self.system['/incomes/other']
-            target_account = self.system['/wallet']
+            source_account = account_paths.get_account(gas_system, '/members/' + person.uid)
+            exit_point = self.get_tree_account(gas, gas_system, '/expenses/member')
+            entry_point = self.get_tree_account(gas, self.system, '/incomes/other')
+            target_account = account_paths.get_account(self.system, '/wallet')
             kind = ADJUST
         elif  target == LIABILITY: #Addition for Gasmember: +gasmember
-            source_account = self.system['/wallet']
-            exit_point = self.system['/expenses/other']
-            entry_point = gas_system['/incomes/recharges']
-            target_account = gas_system['/members/' + person.uid]
+            source_account = account_paths.get_account(self.system, '/wallet')
+            exit_point = self.get_tree_account(gas, self.system, '/expenses/other')
+            entry_point = account_paths.get_account(gas_system, '/incomes/recharges')
+            target_account = account_paths.get_account(gas_system, '/members/' + person.uid)
             kind = ADJUST
         elif  target == EQUITY: #Restitution for gasmember: empty container +gasmember -GAS
-            source_account = gas_system['/cash']
-            exit_point = gas_system['/expenses/member']
-            entry_point = gas_system['/incomes/recharges']
-            target_account = gas_system['/members/' + person.uid]
+            source_account = account_paths.get_account(gas_system, '/cash')
+            exit_point = self.get_tree_account(gas, gas_system, '/expenses/member')
+            entry_point = account_paths.get_account(gas_system, '/incomes/recharges')
+            target_account = account_paths.get_account(gas_system, '/members/' + person.uid)
             kind = RECYCLE
         else:
             raise MalformedTransaction(ugettext("Payment target %s not identified") % target)
@@ -188,7 +233,6 @@ class PersonAccountingProxy(AccountingProxy):
 #        |                +--- recharges [I]
 #        |                +--- TODO: member (correction or other)
 
-    #UGLY: remove me when done and executed one command that regenerate all missing accounts
     def missing_accounts(self, gas):
         gas_acc = gas.accounting
         gas_system = gas.accounting.system
@@ -0,0 +1,185 @@
+"""Running balances of accounting accounts.
+
+``Account.balance`` sums every ledger entry of an account each time it is read.
+Balances are kept instead in ``AccountBalance`` rows, one for each account:
+
+* ``register_transaction`` and ``register_simple_transaction`` wrap their
+  `simple_accounting.utils` counterparts and add amounts of ledger entries
+  of the transaction to balances of its accounts. Balances are updated with
+  ``amount = amount + delta`` statements, in the same database transaction
+  that writes ledger entries (``update_transaction`` sums them again),
+* ``get_balance`` and ``get_balances`` read them: the latter retrieves balances
+  of many accounts (i.e: the accounts of all the members of a GAS) with one query,
+* ``verify`` and ``rebuild`` compare balances with ledger entries
+  and fix them (see the `account_balances` management command).
+
+A balance is created when the first transaction of its account is registered:
+accounts without a balance are summed from their ledger entries.
+Balances of placeholder accounts are not kept, they are read from ``Account.balance``.
+"""
+
+from django.db import transaction, IntegrityError
+from django.db.models import F, Sum
+
+from simple_accounting import utils as accounting_utils
+from simple_accounting.models import LedgerEntry
+
+from gasistafelice.base import account_paths
+from gasistafelice.lib.bulk import chunks as _chunks
+
+import logging
+log = logging.getLogger(__name__)
+
+def _sum_entries(account_pks):
+    """Return the sum of ledger entries of accounts identified by ``account_pks``."""
+    rv = dict.fromkeys(account_pks, 0)
+    for pks in _chunks(account_pks):
+        rv.update(LedgerEntry.objects.filter(account__in=pks).values('account'
+            ).annotate(total=Sum('amount')).order_by().values_list('account', 'total')
+        )
+    return rv
+
+def _get_entries(tx):
+    """Return the amounts of ledger entries of ``tx`` by account."""
+    rv = {}
+    for account_pk, amount in tx.ledger_entries.values_list('account', 'amount'):
+        rv[account_pk] = rv.get(account_pk, 0) + amount
+    return rv
+
+def _add(deltas):
+    """Add ``deltas`` (a dictionary account pk -> amount) to balances.
+
+    Ledger entries MUST be already written: an account without
+    a balance gets the sum of all of its entries.
+    """
+    from gasistafelice.base.models import AccountBalance
+
+    for account_pk, delta in deltas.items():
+        if not delta:
+            continue
+        if AccountBalance.objects.filter(account=account_pk).update(amount=F('amount') + delta):
+            continue
+        sid = transaction.savepoint()
+        try:
+            AccountBalance.objects.create(account_id=account_pk,
+                amount=_sum_entries([account_pk])[account_pk]
+            )
+        except IntegrityError:
+            # created by a concurrent transaction
+            transaction.savepoint_rollback(sid)
+            AccountBalance.objects.filter(account=account_pk).update(amount=F('amount') + delta)
+        else:
+            transaction.savepoint_commit(sid)
+
+    transaction.commit_unless_managed()
+
+#-------------------------------------------------------------------------------
+
+def register_transaction(*args, **kw):
+    """Same as ``simple_accounting.utils.register_transaction``, updating balances."""
+    tx = accounting_utils.register_transaction(*args, **kw)
+    _add(_get_entries(tx))
+    return tx
+
+def register_simple_transaction(*args, **kw):
+    """Same as ``simple_accounting.utils.register_simple_transaction``, updating balances."""
+    tx = accounting_utils.register_simple_transaction(*args, **kw)
+    _add(_get_entries(tx))
+    return tx
+
+def update_transaction(tx, **kw):
+    """Same as ``simple_accounting.utils.update_transaction``, updating balances.
+
+    Ledger entries of ``tx`` may be replaced by the update:
+    balances of its accounts are summed again.
+    """
+    account_pks = _get_entries(tx).keys()
+    rv = accounting_utils.update_transaction(tx, **kw)
+    rebuild(account_pks)
+    return rv
+
+#-------------------------------------------------------------------------------
+
+def get_balances(accounts):
+    """Return a dictionary which maps ``accounts`` (by primary key) to their balances.
+
+    Balances are retrieved with one query (for each chunk of accounts),
+    accounts without a balance are summed from their ledger entries.
+    """
+    from gasistafelice.base.models import AccountBalance
+
+    rv = {}
+    account_pks = []
+    for account in accounts:
+        if account.is_placeholder:
+            rv[account.pk] = account.balance
+        else:
+            account_pks.append(account.pk)
+
+    for pks in _chunks(account_pks):
+        rv.update(AccountBalance.objects.filter(account__in=pks).values_list('account', 'amount'))
+
+    missing = [pk for pk in account_pks if pk not in rv]
+    if missing:
+        rv.update(_sum_entries(missing))
+    return rv
+
+def get_balance(account):
+    """Return the balance of ``account``."""
+    return get_balances([account])[account.pk]
+
+def verify(account_pks=None):
+    """Compare balances with ledger entries.
+
+    Return a dictionary which maps primary keys of accounts
+    with a wrong balance to a tuple (balance, sum of ledger entries).
+    """
+    from gasistafelice.base.models import AccountBalance
+
+    balances = AccountBalance.objects.all()
+    if account_pks is not None:
+        balances = balances.filter(account__in=account_pks)
+    balances = dict(balances.values_list('account', 'amount'))
+    if account_pks is None:
+        account_pks = set(balances.keys()) | set(
+            LedgerEntry.objects.values_list('account', flat=True).distinct()
+        )
+
+    rv = {}
+    totals = _sum_entries(list(account_pks))
+    for pk in account_pks:
+        if balances.get(pk, 0) != totals[pk]:
+            rv[pk] = (balances.get(pk), totals[pk])
+    return rv
+
+def rebuild(account_pks=None):
+    """Recompute balances of accounts identified by ``account_pks`` (all if None).
+
+    Return the number of balances which have been fixed.
+    """
+    from gasistafelice.base.models import AccountBalance
+
+    wrong = verify(account_pks)
+    for pk, (balance, total) in wrong.items():
+        log.info("Fixing balance of account %s: %s -> %s" % (pk, balance, total))
+        if balance is None:
+            AccountBalance.objects.create(account_id=pk, amount=total)
+        else:
+            AccountBalance.objects.filter(account=pk).update(amount=total)
+
+    transaction.commit_unless_managed()
+    return len(wrong)
+
+def get_child_balances(system, parent_path, names):
+    """Return a dictionary which maps ``names`` of accounts under ``parent_path``
+    in accounting ``system`` to their balances.
+
+    Accounts are resolved by the index of ``system`` (see ``account_paths``),
+    names without an account are skipped.
+    """
+    parent_path = parent_path.rstrip('/')
+    accounts = account_paths.get_accounts(system,
+        [parent_path + '/' + name for name in set(names)]
+    ).values()
+    balances = get_balances(accounts)
+    return dict((account.name, balances[account.pk]) for account in accounts)
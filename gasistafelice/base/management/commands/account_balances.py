@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from gasistafelice.base import balances
+
+from optparse import make_option
+
+class Command(BaseCommand):
+    args = ""
+    option_list = BaseCommand.option_list + (
+        make_option('--rebuild', action='store_true', dest='rebuild', default=False,
+            help="Fix wrong or missing balances"
+        ),
+    )
+    help = """Check running balances of accounting accounts against their ledger entries.
+
+Wrong balances are listed, use --rebuild to fix them (i.e: after
+migrating data or registering transactions outside of Gasista Felice).
+"""
+
+    def handle(self, *args, **options):
+
+        wrong = balances.verify()
+        for pk in sorted(wrong.keys()):
+            balance, total = wrong[pk]
+            if balance is None:
+                self.stdout.write("account %s: missing balance, ledger entries sum %s\n" % (pk, total))
+            else:
+                self.stdout.write("account %s: balance %s, ledger entries sum %s\n" % (pk, balance, total))
+
+        if options['rebuild'] and wrong:
+            n = transaction.commit_on_success(balances.rebuild)()
+            self.stdout.write("%d balances fixed\n" % n)
+        else:
+            self.stdout.write("%d wrong balances\n" % len(wrong))
+        return 0
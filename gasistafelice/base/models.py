@@ -12,7 +12,8 @@ from django.contrib.comments.models import Comment
 from django.contrib.contenttypes.models import ContentType
 from django.conf import settings
 from django.dispatch import receiver
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, pre_save, post_delete, m2m_changed
+from django.db.models import Q
 
 from workflows.models import Workflow, Transition, State
 from history.models import HistoricalRecords
@@ -26,13 +27,18 @@ from flexi_auth.utils import get_parametric_roles
 from flexi_auth.models import PrincipalParamRoleRelation
 
 from simple_accounting.models import economic_subject, AccountingDescriptor, LedgerEntry, account_type 
+from simple_accounting.models import Account
 
 from gasistafelice.lib import ClassProperty, unordered_uniq
+from gasistafelice.lib import request_cache
+from gasistafelice.lib.request_cache import request_cached_property
 from gasistafelice.base import const
 from gasistafelice.base.utils import get_resource_icon_path
 from gasistafelice.base.accounting import PersonAccountingProxy
 
-from workflows.utils import do_transition
+from gasistafelice.base import workflow_cache
+from gasistafelice.base import account_paths
+from gasistafelice.base.workflow_cache import do_transition
 import os
 import logging
 log = logging.getLogger(__name__)
@@ -513,7 +519,7 @@ class Resource(object):
 
         Accounting sold for this ressource
         """
-        acc_tot = self.person.accounting.system['/wallet'].balance
+        acc_tot = account_paths.get_account(self.person.accounting.system, '/wallet').balance
         return acc_tot
 
 
@@ -645,7 +651,7 @@ class Person(models.Model, PermissionResource):
         return self.gasmember_set.all()
 
     
-    @property
+    @request_cached_property
     def gas_list(self):
         #TODO UNITTEST
         """
@@ -653,10 +659,9 @@ class Person(models.Model, PermissionResource):
         (remember that a person may be a member of more than one GAS).
         """ 
         from gasistafelice.gas.models import GAS
-        gas_pks = set(member.gas.pk for member in self.gasmembers)
-        return GAS.objects.filter(pk__in=gas_pks)
+        return GAS.objects.filter(pk__in=self.gasmembers.values('gas'))
     
-    @property
+    @request_cached_property
     def des_list(self):
         #TODO UNITTEST
         """
@@ -664,31 +669,25 @@ class Person(models.Model, PermissionResource):
         (either as a member of one or more GAS or as a referrer for one or more suppliers in the DES).         
         """
         from gasistafelice.des.models import DES
-        des_set = set([gas.des for gas in self.gas_list])
-        return DES.objects.filter(pk__in=[obj.pk for obj in des_set])
+        return DES.objects.filter(pk__in=self.gas_list.values('des'))
     
     @property
     def des(self):
         from gasistafelice.des.models import Siteattr
         return Siteattr.get_site()
     
-    @property
+    @request_cached_property
     def pacts(self):
         """
         A person is related to:
         pacts signed with a GAS he/she belongs to
         """
         from gasistafelice.gas.models import GASSupplierSolidalPact
-        # initialize the return QuerySet 
-        qs = GASSupplierSolidalPact.objects.none()
-        
-        #add the suppliers who have signed a pact with a GAS this person belongs to
-        for gas in self.gas_list:
-            qs = qs | gas.pacts
+        return GASSupplierSolidalPact.objects.filter(
+            gas__in=self.gas_list
+        ).order_by('supplier')
 
-        return qs
-
-    @property
+    @request_cached_property
     def suppliers(self):
         #TODO UNITTEST
         """
@@ -697,21 +696,11 @@ class Person(models.Model, PermissionResource):
         2) suppliers who have signed a pact with a GAS he/she belongs to
         """
         from gasistafelice.supplier.models import Supplier
-        # initialize the return QuerySet 
-        qs = Supplier.objects.none()
-        
-        #add the suppliers who have signed a pact with a GAS this person belongs to
-        for gas in self.gas_list:
-            qs = qs | gas.suppliers
-        
-        # add the suppliers for which this person is an agent
-        referred_set = set([sr.supplier for sr  in self.supplieragent_set])
-        qs = qs | Supplier.objects.filter(pk__in=[obj.pk for obj in referred_set])
-        
-        return qs
-        
+        return Supplier.objects.filter(
+            Q(pact_set__gas__in=self.gas_list) | Q(agent_set=self)
+        ).distinct()
     
-    @property
+    @request_cached_property
     def orders(self):
         #TODO UNITTEST
         """
@@ -723,56 +712,37 @@ class Person(models.Model, PermissionResource):
         """
 
         from gasistafelice.gas.models import GASSupplierOrder
-                
-        # initialize the return QuerySet 
-        qs = GASSupplierOrder.objects.none()
-        
-        #add the supplier orders opened by a GAS he/she belongs to
-        for gas in self.gas_list:
-            qs = qs | gas.orders
-        
-        return qs
-        
+        return GASSupplierOrder.objects.filter(pact__gas__in=self.gas_list)
     
-    @property
+    @request_cached_property
     def deliveries(self):
         #TODO UNITTEST
         """
         A person is related to:
         1) delivery appointments for which this person is a referrer
         2) delivery appointments associated with a GAS he/she belongs to
+
+        Delivery has not a referrer yet, so only 2) applies.
         """
         from gasistafelice.gas.models import Delivery
-        # initialize the return QuerySet
-        qs = Delivery.objects.none()    
-        # add  delivery appointments for which this person is a referrer   
-        for member in self.gasmembers:
-            qs = qs | member.delivery_set.all()
-        # add  delivery appointments associated with a GAS he/she belongs to
-        for gas in self.gas_list:
-            qs = qs | gas.deliveries
-                                
-        return qs
+        return Delivery.objects.filter(
+            order_set__pact__gas__in=self.gas_list
+        ).distinct()
     
-    @property
+    @request_cached_property
     def withdrawals(self):
         #TODO UNITTEST
         """
         A person is related to:
         1) withdrawal appointments for which this person is a referrer
         2) withdrawal appointments associated with a GAS he/she belongs to
+
+        Withdrawal has not a referrer yet, so only 2) applies.
         """
         from gasistafelice.gas.models import Withdrawal
-        # initialize the return QuerySet
-        qs = Withdrawal.objects.none()    
-        # add  withdrawal appointments for which this person is a referrer   
-        for member in self.gasmembers:
-            qs = qs | member.withdrawal_set.all()
-        # add  withdrawal appointments associated with a GAS he/she belongs to
-        for gas in self.gas_list:
-            qs = qs | gas.withdrawals
-                                
-        return qs  
+        return Withdrawal.objects.filter(
+            order_set__pact__gas__in=self.gas_list
+        ).distinct()
     
     
     ## END Resource API    
@@ -1052,6 +1022,27 @@ class Place(models.Model, PermissionResource):
     )
     
 
+# Accounting
+
+class AccountBalance(models.Model):
+    """Running balance of an accounting ``Account``.
+
+    It is the sum of amounts of ledger entries registered in the account:
+    it is updated every time a transaction is registered by
+    ``gasistafelice.base.balances`` and can be checked and rebuilt
+    with the `account_balances` management command.
+    """
+
+    account = models.OneToOneField(Account, primary_key=True, related_name="running_balance", verbose_name=_('account'))
+    amount = models.DecimalField(max_digits=14, decimal_places=4, default=0, verbose_name=_('amount'))
+
+    class Meta:
+        verbose_name = _("account balance")
+        verbose_name_plural = _("account balances")
+
+    def __unicode__(self):
+        return u"%s: %s" % (self.account_id, self.amount)
+
 # Generic workflow management
 
 class DefaultTransition(models.Model, PermissionResource):
@@ -1360,3 +1351,20 @@ pre_save.connect(validate)
 # add `setup_data` function as a listener to the `post_save` signal
 post_save.connect(setup_data)
 post_save.connect(setup_data_handler, sender=PrincipalParamRoleRelation)
+
+# values memoized in the request scope may depend on any saved instance
+post_save.connect(request_cache.invalidate)
+post_delete.connect(request_cache.invalidate)
+
+# workflow definitions are cached in process
+for model in (Workflow, State, Transition, DefaultTransition):
+    post_save.connect(workflow_cache.invalidate, sender=model)
+    post_delete.connect(workflow_cache.invalidate, sender=model)
+m2m_changed.connect(workflow_cache.invalidate, sender=State.transitions.through)
+
+post_save.connect(workflow_cache.invalidate_system_user, sender=User)
+post_delete.connect(workflow_cache.invalidate_system_user, sender=User)
+
+# accounts are indexed by path in process
+post_save.connect(account_paths.invalidate, sender=Account)
+post_delete.connect(account_paths.invalidate, sender=Account)
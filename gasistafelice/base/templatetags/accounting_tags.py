@@ -12,6 +12,8 @@ from django.utils.translation import ugettext as _
 
 import simple_accounting
 
+from gasistafelice.base.account_owners import get_resolver
+
 register = template.Library()
 
 @register.simple_tag
@@ -39,92 +41,23 @@ def human_readable_account(account):
     The string is separated by '@@' keyword
     in order to be split and use by jQuery.Resource(_url, _name);
     we expect value.name as ressource-type-pk
+
+    Account owners are resolved by the resolver shared within the request:
+    resolve a whole page of entries in advance to avoid per entry queries.
     """
-    #FIXME: this view must import and know the model controller!!!! (not MVC)
-    name = ""
-    urn = ""
-    if 'person-' in account.name:
-        #from gasistafelice.gas.models.base import GASMember
-        from gasistafelice.base.models import Person
-        p_pk = account.name.replace("person-", "")
-        try:
-            obj = Person.objects.get(pk=p_pk)
-        except GASMember.DoesNotExist:
-            pass
-        else:
-            name = obj.report_name
-            urn = obj.urn
-
-    elif 'gas-' in account.name:
-        from gasistafelice.gas.models.base import GAS
-        p_pk = account.name.replace("gas-", "")
-        try:
-            obj = GAS.objects.get(pk=p_pk)
-        except GAS.DoesNotExist:
-            pass
-        else:
-            name = obj.id_in_des
-            urn = obj.urn
-
-    elif 'supplier-' in account.name:
-        from gasistafelice.supplier.models import Supplier
-        p_pk = account.name.replace("supplier-", "")
-        try:
-            obj = Supplier.objects.get(pk=p_pk)
-        except Supplier.DoesNotExist:
-            pass
-        else:
-            name = obj.name
-            urn = obj.urn
-
-    if name == "" or urn == "":
-        obj = account.system.owner.instance
-        name = obj
-        #if 'person' in account.name:
-        #FIXME: Caught NotImplementedError while rendering: class: GAS method: person
-        #because we retrieve ledgerEntries from gas.account
-        urn = obj.urn
+    resolver = get_resolver()
+    obj = resolver.get_owner(account)
+    name = resolver.get_name(account)
+    urn = getattr(obj, 'urn', "")
 
     return "%(name)s|%(urn)s" % {'name': name, 'urn': urn}
 
 @register.simple_tag
-def human_readable_account_csv(account):
+def human_readable_account_csv(account, resolver=None):
     """
         Return one string containing the resource
     """
-    name = ""
-    if 'person-' in account.name:
-        from gasistafelice.base.models import Person
-        p_pk = account.name.replace("person-", "")
-        try:
-            obj = Person.objects.get(pk=p_pk)
-        except GASMember.DoesNotExist:
-            pass
-        else:
-            name = obj.report_name
-
-    elif 'gas-' in account.name:
-        from gasistafelice.gas.models.base import GAS
-        p_pk = account.name.replace("gas-", "")
-        try:
-            obj = GAS.objects.get(pk=p_pk)
-        except GAS.DoesNotExist:
-            pass
-        else:
-            name = obj.id_in_des
-
-    elif 'supplier-' in account.name:
-        from gasistafelice.supplier.models import Supplier
-        p_pk = account.name.replace("supplier-", "")
-        try:
-            obj = Supplier.objects.get(pk=p_pk)
-        except Supplier.DoesNotExist:
-            pass
-        else:
-            name = obj.name
-
-    if name == "":
-        name = "%s" % account.system.owner.instance
+    name = (resolver or get_resolver()).get_name(account)
 
     return "%(name)s " % {'name': name.encode("utf-8", "ignore")}
 
@@ -1,9 +1,19 @@
 from django.test import TestCase
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth.models import User 
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
 
-from gasistafelice.base.models import Person, Place
+from gasistafelice.base.models import Person, Place, AccountBalance
 from gasistafelice.base.utils import get_ctype_from_model_label
+from gasistafelice.lib import request_cache
+from gasistafelice.base.account_owners import AccountOwnerResolver, get_resolver
+from gasistafelice.lib.mail import MailDispatcher
+from gasistafelice.base import workflow_cache, balances, account_paths
+
+from simple_accounting.models import Account, account_type
+from workflows.models import Workflow, State, Transition
+from workflows.utils import set_state
 
 class PersonSaveTest(TestCase):
     '''Tests for the Person save override method'''
@@ -28,6 +38,184 @@ class PlaceSaveTest(TestCase):
         self.assertEqual(p.province, 'AN')
         
 
+class PersonRequestCacheTest(TestCase):
+    '''Tests for Person relational properties memoized in the request scope'''
+    def setUp(self):
+        self.person = Person.objects.create(name='john', surname='smith')
+        request_cache.begin()
+    def tearDown(self):
+        request_cache.end()
+    def testMemoized(self):
+        '''Verify that the same instance shares values with other instances of the same person'''
+        other = Person.objects.get(pk=self.person.pk)
+        self.assertTrue(self.person.gas_list is other.gas_list)
+        with self.assertNumQueries(0):
+            self.person.gas_list
+            other.gas_list
+    def testInvalidatedOnSave(self):
+        '''Verify that values are computed again after a save'''
+        gas_list = self.person.gas_list
+        self.person.save()
+        self.assertFalse(gas_list is self.person.gas_list)
+    def testNotMemoizedOutOfScope(self):
+        '''Verify that values are not memoized outside of a request scope'''
+        request_cache.end()
+        self.assertFalse(self.person.gas_list is self.person.gas_list)
+
+
+class WorkflowCacheTest(TestCase):
+    '''Tests for the in-process workflow registry'''
+    def setUp(self):
+        self.workflow = Workflow.objects.create(name='Door')
+        self.opened = State.objects.create(name='Opened', workflow=self.workflow)
+        self.closed = State.objects.create(name='Closed', workflow=self.workflow)
+        self.close = Transition.objects.create(name='Close', workflow=self.workflow, destination=self.closed)
+        self.opened.transitions.add(self.close)
+        self.place = Place.objects.create(name="door", city='senigallia', province='an')
+        self.user = User.objects.create(username='doorman')
+
+    def testTransitions(self):
+        '''Verify transitions are retrieved by name and state'''
+        self.assertEqual(workflow_cache.get_transition(self.workflow, 'close'), self.close)
+        self.assertEqual(workflow_cache.get_state_transitions(self.opened), [self.close])
+        self.assertEqual(workflow_cache.get_state_transitions(self.closed), [])
+        self.assertRaises(Transition.DoesNotExist, workflow_cache.get_transition, self.workflow, 'open')
+
+    def testInvalidatedOnChange(self):
+        '''Verify cached workflow is reloaded when a transition is added'''
+        workflow_cache.get_transition(self.workflow, 'close')
+        t = Transition.objects.create(name='Open', workflow=self.workflow, destination=self.opened)
+        self.closed.transitions.add(t)
+        self.assertEqual(workflow_cache.get_transition(self.workflow, 'open'), t)
+        self.assertEqual(workflow_cache.get_state_transitions(self.closed), [t])
+
+    def testDoTransition(self):
+        '''Verify only allowed transitions change state'''
+        self.assertEqual(workflow_cache.get_state(self.place), None)
+        set_state(self.place, self.opened)
+        self.assertEqual(workflow_cache.get_state(self.place), self.opened)
+        self.assertTrue(workflow_cache.do_transition(self.place, 'Close', self.user))
+        self.assertEqual(workflow_cache.get_state(self.place), self.closed)
+        self.assertFalse(workflow_cache.do_transition(self.place, self.close, self.user))
+
+
+class AccountOwnerResolverTest(TestCase):
+    '''Tests for batch resolution of account owners'''
+    fixtures = ['a_9001_auth.json','b_9001_des.json',
+                'c_9001_sites.json','d_9001_users.json',
+                'e_9001_workflows.json','f_9001_base.json',
+                'g_9001_supplier.json','h_9001_gas.json',
+                'i_9001_simpleaccounting.json'
+    ]
+    def testResolve(self):
+        '''Verify that names are resolved in advance and match the account owner'''
+        accounts = list(Account.objects.select_related('system'))
+        resolver = AccountOwnerResolver()
+        resolver.resolve_accounts(accounts)
+        with self.assertNumQueries(0):
+            names = [resolver.get_name(account) for account in accounts]
+        for account, name in zip(accounts, names):
+            if account.name.startswith('person-'):
+                person = Person.objects.get(pk=account.name.replace('person-', ''))
+                self.assertEqual(name, person.report_name)
+            elif not account.name.startswith('gas-') and not account.name.startswith('supplier-'):
+                self.assertEqual(name, u"%s" % account.system.owner.instance)
+    def testSharedInRequest(self):
+        '''Verify that the resolver is shared within a request scope'''
+        request_cache.begin()
+        try:
+            self.assertTrue(get_resolver() is get_resolver())
+        finally:
+            request_cache.end()
+        self.assertFalse(get_resolver() is get_resolver())
+
+
+class AccountBalanceTest(TestCase):
+    '''Tests for running balances of accounts'''
+    fixtures = ['a_9001_auth.json','b_9001_des.json',
+                'c_9001_sites.json','d_9001_users.json',
+                'e_9001_workflows.json','f_9001_base.json',
+                'g_9001_supplier.json','h_9001_gas.json',
+                'i_9001_simpleaccounting.json'
+    ]
+    def setUp(self):
+        from gasistafelice.gas.models import GASMember
+        gm = GASMember.objects.all()[0]
+        self.gas = gm.gas
+        self.source = self.gas.accounting.system['/members/' + gm.person.uid]
+        self.target = self.gas.accounting.system['/cash']
+    def _register(self, amount):
+        balances.register_simple_transaction(self.source, self.target, amount,
+            'test', self.gas.accounting.subject, kind='GAS_WITHDRAWAL'
+        )
+    def testRegister(self):
+        '''Verify that balances follow registered transactions'''
+        self._register(10)
+        self._register(5)
+        for account in (self.source, self.target):
+            self.assertEqual(balances.get_balance(account), account.balance)
+        self.assertEqual(balances.verify([self.source.pk, self.target.pk]), {})
+    def testBulkRead(self):
+        '''Verify that balances of many accounts are read with one query'''
+        self._register(10)
+        accounts = [self.source, self.target]
+        with self.assertNumQueries(1):
+            rv = balances.get_balances(accounts)
+        self.assertEqual(rv, dict((a.pk, a.balance) for a in accounts))
+    def testRebuild(self):
+        '''Verify that wrong balances are detected and fixed'''
+        self._register(10)
+        AccountBalance.objects.filter(account=self.target).update(amount=0)
+        self.assertTrue(self.target.pk in balances.verify())
+        self.assertEqual(balances.rebuild(), 1)
+        self.assertEqual(balances.verify(), {})
+
+
+class AccountPathsTest(TestCase):
+    '''Tests for the index of accounts by path'''
+    fixtures = ['a_9001_auth.json','b_9001_des.json',
+                'c_9001_sites.json','d_9001_users.json',
+                'e_9001_workflows.json','f_9001_base.json',
+                'g_9001_supplier.json','h_9001_gas.json',
+                'i_9001_simpleaccounting.json'
+    ]
+    def setUp(self):
+        from gasistafelice.gas.models import GASMember
+        account_paths.invalidate()
+        self.gasmembers = GASMember.objects.select_related('gas', 'person')
+        self.gas = self.gasmembers[0].gas
+        self.system = self.gas.accounting.system
+    def testResolve(self):
+        '''Verify that accounts are the same of the account tree, retrieved with one query'''
+        paths = ['/', '/cash', '/members'] + [
+            '/members/' + gm.person.uid for gm in self.gasmembers if gm.gas == self.gas
+        ]
+        with self.assertNumQueries(1):
+            rv = account_paths.get_accounts(self.system, paths)
+        for path in paths:
+            self.assertEqual(rv[path], self.system[path])
+        with self.assertNumQueries(0):
+            account_paths.get_account(self.system, '/cash')
+    def testMissing(self):
+        '''Verify that a missing path reloads the index once'''
+        account_paths.get_account(self.system, '/cash')
+        with self.assertNumQueries(1):
+            self.assertRaises(Account.DoesNotExist, account_paths.get_account, self.system, '/nothing')
+    def testInvalidatedOnCreation(self):
+        '''Verify that a created account is resolved'''
+        account_paths.get_account(self.system, '/cash')
+        self.system.get_or_create_account(parent_path='/incomes', name='test', kind=account_type.income)
+        self.assertEqual(account_paths.get_account(self.system, '/incomes/test').name, 'test')
+    def testPreloadOwners(self):
+        '''Verify that systems of many persons are indexed at once'''
+        persons = [gm.person for gm in self.gasmembers]
+        account_paths.preload_owners(persons)
+        for person in persons:
+            system = person.accounting.system
+            with self.assertNumQueries(0):
+                account_paths.get_account(system, '/wallet')
+
+
 class GetCtypeFromModelLabelTest(TestCase):
     '''Tests for the `get_ctype_from_model_label()` function'''
     def setUp(self):        
@@ -47,3 +235,51 @@ class GetCtypeFromModelLabelTest(TestCase):
         ct = get_ctype_from_model_label('auth.Foo')
         self.assertIsNone(ct)
         
+
+import smtplib
+
+class FlakyEmailBackend(EmailBackend):
+    """Drop the connection at the first message sent to "flaky@example.com"."""
+
+    def __init__(self, *args, **kwargs):
+        super(FlakyEmailBackend, self).__init__(*args, **kwargs)
+        self.opened = 0
+        self.dropped = False
+        self.sent = []
+
+    def open(self):
+        self.opened += 1
+
+    def send_messages(self, messages):
+        for message in messages:
+            if "flaky@example.com" in message.to and not self.dropped:
+                self.dropped = True
+                raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+            if "refused@example.com" in message.to:
+                raise smtplib.SMTPRecipientsRefused({ "refused@example.com" : (550, "No such user") })
+            self.sent.append(message)
+        return len(messages)
+
+class MailDispatcherTest(TestCase):
+    """Test sending of email batches over one connection"""
+
+    def setUp(self):
+        self.connection = FlakyEmailBackend()
+        self.messages = [EmailMessage(subject="test", body="test", to=[addr]) for addr in
+            ["a@example.com", "flaky@example.com", "refused@example.com", "b@example.com"]
+        ]
+
+    def test_send_batch(self):
+        """Verify that temporary errors are retried and permanent ones are skipped"""
+        dispatcher = MailDispatcher(connection=self.connection, delay=0, retries=2, retry_delay=0)
+        self.assertEqual(dispatcher.send(self.messages), 3)
+        self.assertEqual([m.to[0] for m in self.connection.sent],
+            ["a@example.com", "flaky@example.com", "b@example.com"])
+        self.assertEqual([m.to[0] for m in dispatcher.failed], ["refused@example.com"])
+        # opened once, then reopened after the dropped connection only
+        self.assertEqual(self.connection.opened, 2)
+
+    def test_fail_loudly(self):
+        """Verify that errors are raised when not failing silently"""
+        dispatcher = MailDispatcher(connection=self.connection, delay=0, retries=0, fail_silently=False)
+        self.assertRaises(smtplib.SMTPServerDisconnected, dispatcher.send, self.messages)
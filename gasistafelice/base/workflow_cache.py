@@ -0,0 +1,184 @@
+"""In-process registry of workflow definitions.
+
+Workflows (see ``gasistafelice.base.models.WorkflowDefinition``) are defined once
+and then they never change, but `django-workflows` retrieves states and transitions
+from the database every time a state change is checked.
+
+This module keeps, for every workflow:
+
+* transitions by (case insensitive) name,
+* transitions allowed in each state,
+* the default transition of each state.
+
+Workflows are loaded on first use and dropped by ``invalidate`` every time a
+workflow, a state, a transition or a default transition is saved or deleted
+(see signal handlers in ``gasistafelice.base.models``).
+
+The system user (``settings.INIT_OPTIONS['su_username']``), which acts
+in automatic state changes, is cached too.
+
+Checking a state change costs the lookup of the current state of the object
+(one query), the rest is done in memory.
+"""
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+
+from workflows.models import State, Transition, StateObjectRelation
+from workflows.utils import set_state
+
+import logging
+log = logging.getLogger(__name__)
+
+_workflows = {} # workflow pk -> workflow entry (see ``_load``)
+_system_user = []
+
+def invalidate(*args, **kw):
+    """Drop all cached workflows.
+
+    It accepts any argument so it can be connected to signals.
+    """
+    _workflows.clear()
+
+def invalidate_system_user(sender=None, instance=None, **kw):
+    if instance is None or instance.username == settings.INIT_OPTIONS['su_username']:
+        del _system_user[:]
+
+def _load(workflow_id):
+
+    from gasistafelice.base.models import DefaultTransition
+
+    states = dict((s.pk, s) for s in State.objects.filter(workflow=workflow_id))
+    transitions = Transition.objects.filter(workflow=workflow_id
+        ).select_related('destination', 'permission')
+    transitions_by_pk = dict((t.pk, t) for t in transitions)
+
+    state_transitions = dict((pk, []) for pk in states)
+    for state_pk, t_pk in State.transitions.through.objects.filter(
+        state__in=states.keys()).order_by('pk').values_list('state', 'transition'):
+
+        if t_pk in transitions_by_pk:
+            state_transitions[state_pk].append(transitions_by_pk[t_pk])
+
+    default_transitions = {}
+    for state_pk, t_pk in DefaultTransition.objects.filter(
+        workflow=workflow_id).values_list('state', 'transition'):
+
+        if t_pk in transitions_by_pk:
+            default_transitions[state_pk] = transitions_by_pk[t_pk]
+
+    log.debug("Workflow %s loaded in cache" % workflow_id)
+    return {
+        'states' : states,
+        'transitions' : dict((t.name.lower(), t) for t in transitions_by_pk.values()),
+        'state_transitions' : state_transitions,
+        'default_transitions' : default_transitions,
+    }
+
+def _get_workflow(workflow_id):
+    try:
+        return _workflows[workflow_id]
+    except KeyError:
+        rv = _workflows[workflow_id] = _load(workflow_id)
+        return rv
+
+def _get_pk(obj):
+    return getattr(obj, 'pk', obj)
+
+#-------------------------------------------------------------------------------
+
+def get_system_user():
+    """Return the user acting in automatic state changes."""
+    if not _system_user:
+        from django.contrib.auth.models import User
+        _system_user.append(User.objects.get(username=settings.INIT_OPTIONS['su_username']))
+    return _system_user[0]
+
+def get_transition(workflow, name):
+    """Return the transition of ``workflow`` (an instance or a primary key) named ``name``.
+
+    Name is case insensitive. Raise ``Transition.DoesNotExist`` if there is none.
+    """
+    try:
+        return _get_workflow(_get_pk(workflow))['transitions'][name.lower()]
+    except KeyError:
+        raise Transition.DoesNotExist("Transition %s does not exist in workflow %s" % (name, workflow))
+
+def get_state(obj):
+    """Return the current state of ``obj`` (None if it has not a state).
+
+    Same as ``workflows.utils.get_state``, but the state is taken from cache.
+    """
+    ctype = ContentType.objects.get_for_model(obj)
+    try:
+        state_pk, workflow_id = StateObjectRelation.objects.filter(
+            content_type=ctype, content_id=obj.pk
+        ).values_list('state', 'state__workflow')[0]
+    except IndexError:
+        return None
+
+    states = _get_workflow(workflow_id)['states']
+    if state_pk not in states:
+        # A state has been added by someone who did not send signals
+        _workflows.pop(workflow_id, None)
+        states = _get_workflow(workflow_id)['states']
+    return states[state_pk]
+
+def get_state_transitions(state):
+    """Return the list of transitions that can be done in ``state``."""
+    return _get_workflow(state.workflow_id)['state_transitions'].get(state.pk, [])
+
+def get_default_transition(state):
+    """Return the default transition of ``state``.
+
+    Raise ``DefaultTransition.DoesNotExist`` if there is none.
+    """
+    from gasistafelice.base.models import DefaultTransition
+    try:
+        if state is None:
+            raise KeyError
+        return _get_workflow(state.workflow_id)['default_transitions'][state.pk]
+    except KeyError:
+        raise DefaultTransition.DoesNotExist("No default transition for state %s" % state)
+
+def get_allowed_transitions(obj, user, state=None):
+    """Return transitions allowed to ``user`` in the current state of ``obj``.
+
+    Same as ``workflows.utils.get_allowed_transitions``: a transition is allowed
+    if it has no permission or if ``user`` has it on ``obj``.
+    Pass ``state`` if the current state of ``obj`` is already known.
+    """
+    if state is None:
+        state = get_state(obj)
+        if state is None:
+            return []
+
+    rv = []
+    for transition in get_state_transitions(state):
+        if transition.permission is None:
+            rv.append(transition)
+        else:
+            from permissions.utils import has_permission
+            if has_permission(obj, user, transition.permission.codename):
+                rv.append(transition)
+    return rv
+
+def do_transition(obj, transition, user):
+    """Process ``transition`` (an instance or a name) on ``obj`` if it is allowed.
+
+    Same as ``workflows.utils.do_transition``. Return True if the state has changed.
+    """
+    state = get_state(obj)
+    if state is None:
+        return False
+
+    if not isinstance(transition, Transition):
+        try:
+            transition = get_transition(state.workflow_id, transition)
+        except Transition.DoesNotExist:
+            return False
+
+    if transition in get_allowed_transitions(obj, user, state):
+        set_state(obj, transition.destination)
+        return True
+    return False
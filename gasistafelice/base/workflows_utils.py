@@ -4,6 +4,10 @@ import workflows
 # With this import we can use this utils file as the original workflows.utils
 from workflows.utils import *
 
+# States and transitions are read from the in-process workflow registry
+from gasistafelice.base import workflow_cache
+from gasistafelice.base.workflow_cache import get_state
+
 def get_allowed_transitions(obj, user):
     """Returns all allowed transitions for passed object and user. Takes the
     current state of the object into account.
@@ -32,15 +36,15 @@ def get_allowed_transitions(obj, user):
         ]
 
     else:
-        return workflows.utils.get_allowed_transitions(obj, user)
+        return workflow_cache.get_allowed_transitions(obj, user)
 
     for pr in param_roles:
         if user in pr.get_users():
-            rv = workflows.utils.get_allowed_transitions(obj, user)
+            rv = workflow_cache.get_allowed_transitions(obj, user)
             break
         elif isinstance(obj, GASSupplierOrder) and user.person == obj.referrer_person:
             #FIXME: ugly !
-            rv = workflows.utils.get_allowed_transitions(obj, user)
+            rv = workflow_cache.get_allowed_transitions(obj, user)
             break
         else:
             rv = []
@@ -55,8 +59,11 @@ def do_transition(obj, transition, user):
     """Processes the passed transition to the passed object (if allowed).
     """
     if not isinstance(transition, Transition):
+        state = get_state(obj)
+        if state is None:
+            return False
         try:
-            transition = Transition.objects.get(name=transition)
+            transition = workflow_cache.get_transition(state.workflow_id, transition)
         except Transition.DoesNotExist:
             return False
 
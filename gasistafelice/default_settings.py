@@ -10,6 +10,12 @@ FORM_DEBUG = False
 EMAIL_DEBUG = True
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = '/tmp/app-messages' # change this to a proper location
+# Mailings (see lib/mail.py): pause EMAIL_THROTTLE_DELAY seconds every EMAIL_THROTTLE_BATCH messages
+EMAIL_THROTTLE_BATCH = 50
+EMAIL_THROTTLE_DELAY = 1
+# Retry temporary failures EMAIL_SEND_RETRIES times, waiting EMAIL_RETRY_DELAY seconds more at every attempt
+EMAIL_SEND_RETRIES = 3
+EMAIL_RETRY_DELAY = 5
 PROFILING=False
 
 ACCOUNT_ACTIVATION_DAYS = 2
@@ -17,6 +23,10 @@ ACCOUNT_ACTIVATION_DAYS = 2
 PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
 VERSION = __version__ = file(os.path.join(PROJECT_ROOT, 'VERSION')).read().strip()
 
+# Directory for data written at runtime (i.e: caches).
+# It can be set by GASISTAFELICE_DATA_DIR environment variable
+DATA_DIR = os.environ.get('GASISTAFELICE_DATA_DIR', os.path.join(PROJECT_ROOT, 'data'))
+
 ADMINS = (
     # ('Your Name', 'your_email@domain.com'),
 )
@@ -50,6 +60,38 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Rendered order reports (see gas.report_cache)
+    'order_reports': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(DATA_DIR, 'cache', 'order_reports'),
+        'TIMEOUT': 60*60*24*7,
+    },
+    # Version stamps of GDXP catalogues (see gdxp.catalog_cache):
+    # it must be shared by web workers and management commands
+    'gdxp_catalogs': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(DATA_DIR, 'cache', 'gdxp_catalogs'),
+        'TIMEOUT': 60*60*24,
+    },
+    # Accounting trees marked as complete (see base.accounting.AccountTreeMixin):
+    # it must be shared by web workers and management commands
+    'account_trees': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(DATA_DIR, 'cache', 'account_trees'),
+        'TIMEOUT': 60*60*24*7,
+    },
+}
+ORDER_REPORT_CACHE = 'order_reports'
+GDXP_CATALOG_CACHE = 'gdxp_catalogs'
+ACCOUNT_TREE_CACHE = 'account_trees'
+
+# Seconds dataTables total counts are cached for (see lib.datatables). 0 disables cache
+DATATABLES_COUNT_CACHE_TIMEOUT = 30
+
 AUTHENTICATION_BACKENDS = (
             'base.backends.AuthenticationParamRoleBackend',
             'flexi_auth.backends.ParamRoleBackend',
@@ -118,6 +160,7 @@ MIDDLEWARE_CLASSES = (
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'gasistafelice.middleware.RequestCacheMiddleware',
     'gasistafelice.middleware.ResourceMiddleware',
     'gasistafelice.middleware.UpdateRequestUserMiddleware',
 #    'django.middleware.transaction.TransactionMiddleware',
@@ -432,6 +475,8 @@ MAINTENANCE_MODE = False
 # --- WARNING: changing following parameters implies fixtures adaptation --
 # Default category for all uncategorized products
 DEFAULT_CATEGORY_CATCHALL = 'Non definita' #fixtures/supplier/initial_data.json
+# Default product unit for imported products with unknown unit
+DEFAULT_PRODUCT_PU = 'Confezione' #fixtures/supplier/initial_data.json
 JUNK_EMAIL = 'devnull@desmacerata.it'
 EMAIL_DEBUG_ADDR = 'gftest@gasistafelice.org'
 DEFAULT_SENDER_EMAIL = 'gasistafelice@desmacerata.it'
@@ -7,6 +7,7 @@ from flexi_auth.models import Param, ParamRole, PrincipalParamRoleRelation
 from gasistafelice.consts import DES_ADMIN
 from gasistafelice.des.models import DES, Siteattr
 from gasistafelice.base.models import Person
+from gasistafelice.base import account_paths
 from gasistafelice.des import models
 
 from django.conf import settings
@@ -51,3 +52,5 @@ class Command(BaseCommand):
         pr = ParamRole.get_role(DES_ADMIN, des=des)
         PrincipalParamRoleRelation.objects.get_or_create(user=su, role=pr)
 
+        account_paths.forget_changed()
+
@@ -21,16 +21,10 @@ import re, logging
 
 log = logging.getLogger("gasistafelice")
 
-def cmp_orders(a, b):
-    return [-1, 1][
-        int(a.orders.archived().count() < b.orders.archived().count())
-    ]
-
 @never_cache
 def login(request, *args, **kw):
 
-    gas_list = list(GAS.objects.all())
-    gas_list.sort(cmp_orders)
+    gas_list = GAS.objects.activity_ranking()
 
     kw['extra_context'] = {
         'VERSION': settings.VERSION,
@@ -1,37 +1,48 @@
-from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.urlresolvers import reverse
+from django.contrib.sites.models import Site
 from notification.models import Notice
-import notification
+
+from gasistafelice.des_notification import outbox
 
 import logging
 log = logging.getLogger(__name__)
 
+CHUNK_SIZE = 500
+
 #-------------------------------------------------------------------------------
 
 def bulk_gasmembers_notification(unseen_since):
-    """Retrieve all unseen user notices and send them via mail."""
+    """Retrieve all unseen user notices and queue them to be sent via mail.
 
+    Notices are marked as seen, the outbox is delivered by the
+    `send_notifications` command.
+    """
+
+    notices = Notice.objects.filter(on_site=True, unseen=True, added__gte=unseen_since)
     if not settings.DEBUG:
-        recipients = User.objects.filter(person__gasmember_set__isnull=True).distinct()
+        notices = notices.filter(recipient__person__gasmember__isnull=False)
     else:
-        recipients = User.objects.filter(is_superuser=True)
-    
-    for user in recipients:
-
-        notices = Notice.objects.notices_for(user, 
-            on_site=True, unseen=True, added__gte=unseen_since
-        )
-
-        try:
-            notification.send([user], "gasmember_notification", {
-                'notices' : notices,
-            }, on_site=False)
-
-        except Exception as e:
-            log.error("Send msg gasmember_notification: %s (%s)" % (e.message, type(e)))
-            pass
-
-        for n in notices:
-            n.unseen = False
-            n.save()
-
+        notices = notices.filter(recipient__is_superuser=True)
+
+    notices_by_user = {}
+    for notice in notices.distinct().order_by('added'):
+        notices_by_user.setdefault(notice.recipient_id, []).append(notice)
+
+    notices_url = "http://%s%s" % (Site.objects.get_current().domain, reverse("notification_notices"))
+    outbox.enqueue_many([
+        outbox.make_notice([user_pk], "gasmember_notification", {
+            'notices' : user_notices,
+            'notices_url' : notices_url,
+            'site_contact' : settings.SUPPORT_EMAIL,
+        }, on_site=False)
+        for user_pk, user_notices in notices_by_user.items()
+    ])
+
+    pks = [n.pk for user_notices in notices_by_user.values() for n in user_notices]
+    for i in range(0, len(pks), CHUNK_SIZE):
+        Notice.objects.filter(pk__in=pks[i:i+CHUNK_SIZE]).update(unseen=False)
+
+    log.debug("Queued notices of %d users" % len(notices_by_user))
+    return len(notices_by_user)
 
@@ -1,29 +1,24 @@
 
 from django.core.management.base import BaseCommand, CommandError
-from django.conf import settings
 
-import notification
-
-from gasistafelice.gas.models import GASMember
+from gasistafelice.des_notification.gasmember import bulk_gasmembers_notification
+from gasistafelice.des_notification import outbox
 
+import datetime
 
 class Command(BaseCommand):
-    args = ""
-    help = 'Send notification to all gasmembers'
+    args = "[days]"
+    help = 'Send notification to all gasmembers: a digest of notices not seen in last [days] (default 1)'
 
     def handle(self, *args, **options):
-        
-        for gm in GASMember.objects.all():
-
-            notices = Notice.objects.notices_for(gm.user, on_site=True)
 
-            if notices.count():
-
-                des_notification.send_mail([gm.user], 
-                    "gasmember_notification", 
-                    {"from_user": from_user}, 
-                    on_site=False
-                )
+        try:
+            days = int(args[0]) if args else 1
+        except ValueError:
+            raise CommandError("Usage send_gasmembers_notification: %s" % self.args)
 
+        since = datetime.datetime.now() - datetime.timedelta(days=days)
+        n = bulk_gasmembers_notification(since)
+        outbox.deliver()
+        self.stdout.write("notices sent to %d gasmembers\n" % n)
         return 0
-
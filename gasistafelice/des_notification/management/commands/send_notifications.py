@@ -0,0 +1,18 @@
+
+from django.core.management.base import BaseCommand
+
+from gasistafelice.des_notification import outbox
+
+class Command(BaseCommand):
+    args = ""
+    help = """Deliver notifications queued in the outbox.
+
+Pending notifications are coalesced by user: who has many of them
+receives one digest. Run it periodically (i.e: every few minutes).
+"""
+
+    def handle(self, *args, **options):
+
+        n = outbox.deliver()
+        self.stdout.write("%d notifications delivered\n" % n)
+        return 0
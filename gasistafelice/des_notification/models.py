@@ -11,6 +11,7 @@ from gasistafelice.gas import signals as gas_signals
 from gasistafelice.lib import unordered_uniq
 
 from gasistafelice.des.models import Siteattr
+from gasistafelice.des_notification import outbox
 
 import logging
 
@@ -18,6 +19,25 @@ log = logging.getLogger(__name__)
 
 #-------------------------------------------------------------------------------
 
+class OutboxNotice(models.Model):
+    """A notification waiting to be delivered by the `send_notifications` command.
+
+    See `gasistafelice.des_notification.outbox`.
+    """
+
+    label = models.CharField(max_length=40)
+    recipients = models.TextField(help_text="comma separated User primary keys")
+    context = models.TextField(help_text="JSON, see outbox.dump_value")
+    on_site = models.BooleanField(default=True)
+    created = models.DateTimeField(auto_now_add=True)
+    sent_on = models.DateTimeField(null=True, blank=True, db_index=True)
+    attempts = models.PositiveIntegerField(default=0, help_text="failed deliveries, see outbox.MAX_ATTEMPTS")
+
+    def __unicode__(self):
+        return u"%s (%s)" % (self.label, self.created)
+
+#-------------------------------------------------------------------------------
+
 class FakeRecipient(object):
 
     def __init__(self, email):
@@ -38,7 +58,7 @@ def notify_gmo_product_erased(sender, **kwargs):
     recipients = [gmo.gasmember.person.user]
 
     try:
-        notification.send(recipients, "ordered_product_update", 
+        outbox.enqueue(recipients, "ordered_product_update", 
             extra_content
         )
     except Exception as e:
@@ -65,7 +85,7 @@ def notify_gmo_price_update(sender, **kwargs):
     recipients = [gmo.gasmember.person.user]
 
     try:
-        notification.send(recipients, "ordered_product_update", 
+        outbox.enqueue(recipients, "ordered_product_update", 
             extra_content
         )
     except Exception as e:
@@ -93,7 +113,7 @@ def notify_gasstock_product_enabled(sender, **kwargs):
     log.debug("notify_gasstock_product_enabled recipients %s " % recipients)
 
     try:
-        notification.send(recipients, "gasstock_update", 
+        outbox.enqueue(recipients, "gasstock_update", 
             extra_content
         )
     except Exception as e:
@@ -118,7 +138,7 @@ def notify_gasstock_product_disabled(sender, **kwargs):
 #        person__gasmember_set__in=gasstock.gasmembers
 
     try:
-        notification.send(recipients, "gasstock_update", 
+        outbox.enqueue(recipients, "gasstock_update", 
             extra_content
         )
     except Exception as e:
@@ -126,6 +146,69 @@ def notify_gasstock_product_disabled(sender, **kwargs):
         log.debug('EEEEEEEEEEEEEE  notification notify_gasstock_product_disabled %s (%s)' % (e.message, type(e)))
         pass
 
+#-------------------------------------------------------------------------------
+
+def notify_gasmember_products_update(sender, **kwargs):
+    """Notify a GAS member once about all of its ordered products changed by a batch."""
+
+    gm = sender
+    changes = []
+    for gmo in kwargs.get('updated', []):
+        changes.append({
+            'order' : gmo.order,
+            'product' : gmo.product,
+            'action' : _("price changed"),
+            'extra_append' : _("from %(old)s to %(new)s") % ({ 'old' : gmo.ordered_price, 
+                'new' : gmo.ordered_product.order_price
+            }),
+        })
+    for gmo in kwargs.get('erased', []):
+        changes.append({
+            'order' : gmo.order,
+            'product' : gmo.product,
+            'action' : _("erased"),
+        })
+
+    if not changes:
+        return
+
+    recipients = [gm.person.user]
+
+    try:
+        outbox.enqueue(recipients, "ordered_product_update", 
+            { 'changes' : changes }
+        )
+    except Exception as e:
+        log.error("Send msg notify_gasmember_products_update: %s (%s)" % (e.message, type(e)))
+        pass
+
+#-------------------------------------------------------------------------------
+
+def notify_gas_products_availability_update(sender, **kwargs):
+    """Notify GAS members once about all the products enabled or disabled by a batch."""
+
+    gas = sender
+    changes = []
+    for gasstock in kwargs.get('enabled', []):
+        changes.append({ 'product' : gasstock.product, 'action' : _("enabled") })
+    for gasstock in kwargs.get('disabled', []):
+        changes.append({ 'product' : gasstock.product, 'action' : _("disabled") })
+
+    if not changes:
+        return
+
+    recipients = User.objects.filter(
+        person__gasmember__in=gas.gasmembers
+    ).distinct()
+
+    try:
+        outbox.enqueue(recipients, "gasstock_update", 
+            { 'gas' : gas, 'changes' : changes }
+        )
+    except Exception as e:
+        log.error("Send msg notify_gas_products_availability_update: %s (%s)" % (e.message, type(e)))
+        pass
+
 #-------------------------------------------------------------------------------
 from gasistafelice import gf_exceptions as exceptions
 
@@ -160,7 +243,7 @@ def notify_order_state_update(sender, **kwargs):
     log.debug("Transition to: %s" % transition.destination.name)
     log.debug("Recipients: %s" % zip(recipients, map(lambda x: x.email, recipients)))
     try:
-        notification.send(recipients, "order_state_update", 
+        outbox.enqueue(recipients, "order_state_update", 
             extra_content
         )
     except Exception as e:
@@ -174,6 +257,8 @@ gas_signals.gmo_price_update.connect(notify_gmo_price_update)
 gas_signals.gmo_product_erased.connect(notify_gmo_product_erased)
 gas_signals.gasstock_product_enabled.connect(notify_gasstock_product_enabled)
 gas_signals.gasstock_product_disabled.connect(notify_gasstock_product_disabled)
+gas_signals.gasmember_products_update.connect(notify_gasmember_products_update)
+gas_signals.gas_products_availability_update.connect(notify_gas_products_availability_update)
 
 def create_notice_types(app, created_models, verbosity, **kwargs):
     """Define notice types and default 'spam_sensitivity'.
@@ -294,6 +379,23 @@ def create_notice_types(app, created_models, verbosity, **kwargs):
         else:
             log.debug("Found existing notice type for label gasstock_update. Not creating another one")
 
-    
+
+    # WAS: notification.create_notice_type(
+    try:
+        obj, created = notification.NoticeType.objects.get_or_create(
+            label="notification_digest", defaults = {
+                'display' : _("Notifications digest"), 
+                'description' : _("many notifications have been received"), 
+                'default' : 2 }
+        )
+    except notification.NoticeType.MultipleObjectsReturned as e:
+        log.error("Found more than one notice type for label notification_digest")
+        raise("Found more than one notice type for label notification_digest")
+    else:
+        if created:
+            log.debug("Created notice type for label notification_digest")
+        else:
+            log.debug("Found existing notice type for label notification_digest. Not creating another one")
+
 models.signals.post_syncdb.connect(create_notice_types, sender=notification)
 
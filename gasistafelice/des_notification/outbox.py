@@ -0,0 +1,224 @@
+"""Deferred delivery of notifications.
+
+Signal handlers run while orders and stocks are saved: sending notifications
+there would render templates and send emails inside the request, once for
+every affected object. Handlers ``enqueue`` notifications in the
+``OutboxNotice`` table instead, with one INSERT for each event.
+
+``deliver`` (run by the ``send_notifications`` command) coalesces pending
+notifications by user: a user with a single pending notification receives
+it as usual, a user with many receives one "notification_digest" with
+all of them.
+
+Model instances in notification contexts are stored as references
+and retrieved again with one query for each model when delivering.
+"""
+
+from django.db import models
+from django.db.models import F
+from django.db.models.query import QuerySet
+from django.contrib.auth.models import User
+from django.contrib.sites.models import Site
+from django.template.loader import render_to_string
+from django.utils import simplejson as json
+from django.utils.encoding import force_unicode
+from django.utils.safestring import mark_safe
+
+import datetime
+import logging
+log = logging.getLogger(__name__)
+
+MODEL_KEY = '__model__'
+
+CHUNK_SIZE = 500
+
+DIGEST_LABEL = "notification_digest"
+
+# Recipients whose delivery failed this many times are dropped
+MAX_ATTEMPTS = 5
+
+#-- Contexts --#
+
+def dump_value(value):
+    """Return a JSON serializable version of ``value``."""
+
+    if isinstance(value, models.Model):
+        return { MODEL_KEY : "%s.%s" % (value._meta.app_label, value._meta.object_name.lower()), 'pk' : value.pk }
+    elif isinstance(value, dict):
+        return dict([(force_unicode(k), dump_value(v)) for k, v in value.items()])
+    elif isinstance(value, (list, tuple, QuerySet)):
+        return [dump_value(v) for v in value]
+    elif value is None or isinstance(value, (bool, int, long, float)):
+        return value
+    return force_unicode(value)
+
+def _collect_refs(value, refs):
+    if isinstance(value, dict):
+        if MODEL_KEY in value:
+            refs.setdefault(value[MODEL_KEY], set()).add(value['pk'])
+        else:
+            for v in value.values():
+                _collect_refs(v, refs)
+    elif isinstance(value, list):
+        for v in value:
+            _collect_refs(v, refs)
+
+def _load_value(value, objs):
+    if isinstance(value, dict):
+        if MODEL_KEY in value:
+            return objs.get(value[MODEL_KEY], {}).get(value['pk'])
+        return dict([(str(k), _load_value(v, objs)) for k, v in value.items()])
+    elif isinstance(value, list):
+        return [_load_value(v, objs) for v in value]
+    return value
+
+def load_contexts(dumped):
+    """Return contexts from a list of ``dump_value`` results.
+
+    Referenced model instances are retrieved with one query for each model.
+    """
+
+    refs = {}
+    for value in dumped:
+        _collect_refs(value, refs)
+
+    objs = {}
+    for model_label, pks in refs.items():
+        model = models.get_model(*model_label.split('.'))
+        if model is not None:
+            objs[model_label] = model._default_manager.in_bulk(list(pks))
+    return [_load_value(value, objs) for value in dumped]
+
+#-- Queue --#
+
+def _get_pks(recipients):
+    if isinstance(recipients, QuerySet):
+        return list(recipients.values_list('pk', flat=True))
+    return [getattr(user, 'pk', user) for user in recipients]
+
+def make_notice(recipients, label, extra_context=None, on_site=True):
+    """Return an unsaved ``OutboxNotice`` for ``recipients`` (users or their pks)."""
+    from gasistafelice.des_notification.models import OutboxNotice
+
+    return OutboxNotice(
+        label=label,
+        recipients=",".join(map(str, _get_pks(recipients))),
+        context=json.dumps(dump_value(extra_context or {})),
+        on_site=on_site,
+    )
+
+def enqueue(recipients, label, extra_context=None, on_site=True):
+    """Append a notification for ``recipients`` to the outbox.
+
+    Arguments are the ones of ``notification.send``.
+    """
+    notice = make_notice(recipients, label, extra_context, on_site)
+    if notice.recipients:
+        notice.save()
+    return notice
+
+def enqueue_many(notices):
+    """Append ``make_notice`` results to the outbox with bulk INSERTs."""
+    from gasistafelice.des_notification.models import OutboxNotice
+    from gasistafelice.lib.bulk import bulk_insert
+
+    bulk_insert(OutboxNotice, [notice for notice in notices if notice.recipients])
+
+#-- Delivery --#
+
+def _render_item(label, context):
+    return mark_safe(render_to_string([
+        "notification/%s/notice.html" % label,
+        "notification/%s/full.txt" % label,
+        "notification/%s/short.txt" % label,
+    ], context).strip())
+
+def _claim(pks, now):
+    """Mark pending notifications ``pks`` as sent on ``now``.
+
+    Return the primary keys actually claimed: notifications claimed
+    meanwhile by a concurrent ``deliver`` are skipped.
+    """
+    from gasistafelice.des_notification.models import OutboxNotice
+
+    pending = OutboxNotice.objects.filter(sent_on__isnull=True)
+    claimed = []
+    for i in range(0, len(pks), CHUNK_SIZE):
+        chunk = pks[i:i+CHUNK_SIZE]
+        if pending.filter(pk__in=chunk).update(sent_on=now) == len(chunk):
+            claimed.extend(chunk)
+        else:
+            # Racing with another worker: keep only notifications claimed by us
+            claimed.extend(OutboxNotice.objects.filter(pk__in=chunk, sent_on=now
+                ).values_list('pk', flat=True))
+    return claimed
+
+def deliver():
+    """Deliver pending notifications, a digest for every user and medium.
+
+    Notifications are claimed before being sent, so concurrent runs do not
+    send them twice. Recipients whose delivery failed are left pending
+    and retried by the next run, up to ``MAX_ATTEMPTS`` times.
+
+    Return the number of delivered notifications.
+    """
+    from notification import models as notification
+    from gasistafelice.des_notification.models import OutboxNotice
+
+    now = datetime.datetime.now()
+    pks = _claim(list(OutboxNotice.objects.filter(sent_on__isnull=True
+        ).order_by('pk').values_list('pk', flat=True)), now)
+    if not pks:
+        return 0
+
+    pending = []
+    for i in range(0, len(pks), CHUNK_SIZE):
+        pending.extend(OutboxNotice.objects.filter(pk__in=pks[i:i+CHUNK_SIZE]))
+    pending.sort(key=lambda notice: notice.pk)
+
+    contexts = load_contexts([json.loads(notice.context) for notice in pending])
+
+    # (user pk, on_site) -> [(notice, label, context)]
+    by_user = {}
+    for notice, context in zip(pending, contexts):
+        for pk in notice.recipients.split(","):
+            by_user.setdefault((int(pk), notice.on_site), []).append((notice, notice.label, context))
+
+    users = User.objects.in_bulk(set([pk for pk, on_site in by_user.keys()]))
+    current_site = Site.objects.get_current()
+
+    # notice -> pks of recipients not delivered
+    failed = {}
+    for (pk, on_site), items in by_user.items():
+        user = users.get(pk)
+        if user is None:
+            continue
+        try:
+            if len(items) == 1:
+                notification.send([user], items[0][1], items[0][2], on_site=on_site)
+            else:
+                notification.send([user], DIGEST_LABEL, {
+                    'items' : [_render_item(label, dict(context, current_site=current_site))
+                        for notice, label, context in items
+                    ],
+                }, on_site=on_site)
+        except Exception as e:
+            log.error("Send msg %s to %s: %s (%s)" % (DIGEST_LABEL, user, e, type(e)))
+            for notice, label, context in items:
+                failed.setdefault(notice, []).append(pk)
+
+    # Leave pending only recipients whose delivery failed
+    for notice, user_pks in failed.items():
+        if notice.attempts + 1 >= MAX_ATTEMPTS:
+            log.warning("Dropping notification %s to users %s after %d attempts" % (
+                notice.pk, user_pks, MAX_ATTEMPTS
+            ))
+            continue
+        OutboxNotice.objects.filter(pk=notice.pk).update(sent_on=None,
+            recipients=",".join(map(str, user_pks)), attempts=F('attempts') + 1
+        )
+
+    log.debug("Delivered %d notifications to %d users, %d left pending" % (
+        len(pending) - len(failed), len(users), len(failed)
+    ))
+    return len(pending) - len(failed)
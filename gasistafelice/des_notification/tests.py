@@ -14,3 +14,94 @@ class SimpleTest(TestCase):
         Tests that 1 + 1 always equals 2.
         """
         self.assertEqual(1 + 1, 2)
+
+
+from django.contrib.auth.models import User
+from django.contrib.sites.models import Site
+
+from gasistafelice.des_notification import outbox
+from gasistafelice.des_notification.models import OutboxNotice
+
+import datetime
+from decimal import Decimal
+from django.utils import simplejson as json
+
+class OutboxTest(TestCase):
+    """Test notifications queued in the outbox"""
+
+    def setUp(self):
+        self.users = [User.objects.create(username="outbox%d" % i) for i in range(3)]
+
+    def test_enqueue(self):
+        """Verify that an event is stored once for all of its recipients"""
+        outbox.enqueue(User.objects.filter(username__startswith="outbox"), "gasstock_update", {
+            'site' : Site.objects.get_current(),
+            'changes' : [{ 'price' : Decimal("1.50"), 'user' : self.users[0] }],
+        })
+        self.assertEqual(OutboxNotice.objects.count(), 1)
+        notice = OutboxNotice.objects.get()
+        self.assertEqual(sorted(map(int, notice.recipients.split(","))), sorted([u.pk for u in self.users]))
+
+        # the context is loaded back with model instances
+        context = outbox.load_contexts([json.loads(notice.context)])[0]
+        self.assertEqual(context['site'], Site.objects.get_current())
+        self.assertEqual(context['changes'][0]['user'], self.users[0])
+        self.assertEqual(context['changes'][0]['price'], u"1.50")
+
+    def test_enqueue_without_recipients(self):
+        """Verify that nothing is stored for nobody"""
+        outbox.enqueue([], "gasstock_update", {})
+        outbox.enqueue_many([outbox.make_notice([], "gasstock_update")])
+        self.assertEqual(OutboxNotice.objects.count(), 0)
+
+    def test_enqueue_many(self):
+        outbox.enqueue_many([outbox.make_notice([u], "gasmember_notification", on_site=False) for u in self.users])
+        self.assertEqual(OutboxNotice.objects.filter(on_site=False, sent_on__isnull=True).count(), 3)
+
+    def test_deliver_claims_notices(self):
+        """Verify that notices are sent once and failed recipients are left pending"""
+        from notification import models as notification
+
+        outbox.enqueue(self.users, "gasmember_notification", on_site=False)
+        sent = []
+        def send(users, label, extra_context=None, on_site=True):
+            if users[0] == self.users[0]:
+                raise ValueError("SMTP failure")
+            sent.append(users[0])
+
+        orig_send = notification.send
+        notification.send = send
+        try:
+            self.assertEqual(outbox.deliver(), 0)
+            self.assertEqual(sorted(sent), sorted(self.users[1:]))
+            notice = OutboxNotice.objects.get()
+            self.assertEqual(notice.sent_on, None)
+            self.assertEqual(notice.recipients, str(self.users[0].pk))
+
+            # a notice already claimed is not delivered again
+            OutboxNotice.objects.update(sent_on=datetime.datetime.now())
+            self.assertEqual(outbox.deliver(), 0)
+            self.assertEqual(len(sent), 2)
+        finally:
+            notification.send = orig_send
+
+    def test_deliver_drops_failed_recipients(self):
+        """Verify that recipients are dropped after MAX_ATTEMPTS failed deliveries"""
+        from notification import models as notification
+
+        outbox.enqueue(self.users[:1], "gasmember_notification", on_site=False)
+        def send(users, label, extra_context=None, on_site=True):
+            raise ValueError("SMTP failure")
+
+        orig_send = notification.send
+        notification.send = send
+        try:
+            for i in range(outbox.MAX_ATTEMPTS - 1):
+                outbox.deliver()
+                self.assertEqual(OutboxNotice.objects.get().attempts, i + 1)
+                self.assertEqual(OutboxNotice.objects.filter(sent_on__isnull=True).count(), 1)
+
+            outbox.deliver()
+            self.assertEqual(OutboxNotice.objects.filter(sent_on__isnull=True).count(), 0)
+        finally:
+            notification.send = orig_send
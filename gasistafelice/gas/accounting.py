@@ -5,10 +5,12 @@ from simple_accounting.exceptions import MalformedTransaction
 from simple_accounting.models import (AccountingProxy, Transaction, 
     LedgerEntry, account_type, TransactionReference
 )
-from simple_accounting.utils import (register_transaction, 
-    register_simple_transaction, transaction_details, 
-    update_transaction
+from simple_accounting.utils import transaction_details
+
+from gasistafelice.base.balances import (register_transaction,
+    register_simple_transaction, update_transaction
 )
+from gasistafelice.base import account_paths
 
 from gasistafelice.base.models import Person
 from gasistafelice.consts import INCOME, EXPENSE, GAS_EXTRA
@@ -46,10 +48,10 @@ class GasAccountingProxy(AccountingProxy):
             raise MalformedTransaction(ugettext(u"Payment amounts must be non-negative"))
         gas = self.subject.instance
         supplier = order.supplier
-        source_account = self.system['/cash']
-        exit_point = self.system['/expenses/suppliers/' + supplier.uid]
-        entry_point =  supplier.accounting.system['/incomes/gas/' + gas.uid]
-        target_account = supplier.accounting.system['/wallet']
+        source_account = account_paths.get_account(self.system, '/cash')
+        exit_point = account_paths.get_account(self.system, '/expenses/suppliers/' + supplier.uid)
+        entry_point =  account_paths.get_account(supplier.accounting.system, '/incomes/gas/' + gas.uid)
+        target_account = account_paths.get_account(supplier.accounting.system, '/wallet')
         if multiple:
             description = "Ord. %s" % multiple
             description += " %(pact)s" % {'pact': order.pact,}
@@ -126,8 +128,8 @@ class GasAccountingProxy(AccountingProxy):
         gas = self.subject.instance
         if member.gas != gas:
             raise MalformedTransaction(ugettext("A GAS can withdraw only from its members' accounts"))
-        source_account = self.system['/members/' + member.person.uid]
-        target_account = self.system['/cash']
+        source_account = account_paths.get_account(self.system, '/members/' + member.person.uid)
+        target_account = account_paths.get_account(self.system, '/cash')
         #'gas': gas.id_in_des,
         #WAS: description = "%(person)s %(order)s" % {'person': member.person.report_name, 'order': order.report_name}
         #NOTE LF: person is a repetition of gasmember person bound
@@ -221,62 +223,84 @@ class GasAccountingProxy(AccountingProxy):
         else:
             return tx
 
-    def accounted_amount_by_gas_member(self, order):
+    def accounted_amounts(self, order):
         """
-        Given a supplier order ``order``, return an annotated set of GAS members
-        partecipating to that order.
-        
-        Each GAS member instance will have an ``.accounted_amount`` attribute,
-        representing the total amount of money already accounted for with respect 
-        to the entire set of orders placed by that GAS member within ``order``.
-        
+        Given a supplier order ``order``, return a dictionary which maps
+        GAS members partecipating to that order (by primary key) to
+        the total amount of money already accounted for them within ``order``.
+
         A (member) order is considered to be "accounted" if a transaction recording it
-        exists within that GAS's accounting system.
-        
+        exists within that GAS's accounting system. GAS members without
+        accounted transactions are not in the dictionary.
+
+        Amounts are computed by a single query grouping GAS members references
+        of WITHDRAWs related to ``order``.
+
         If ``order`` has not been placed by the GAS owning this accounting system,
         raise ``TypeError``.
         """
+        from django.db.models import Sum
         from gasistafelice.gas.models import GASMember
 
         gas = self.subject.instance
-        if order.pact.gas == gas:
+        if order.pact.gas_id == gas.pk:
 
             order_txs = Transaction.objects.get_by_reference([order])
             order_txs = order_txs.filter(kind=GasAccountingProxy.GAS_WITHDRAWAL)
 
             ctype_gm = ContentType.objects.get_for_model(GASMember)
 
-            members_d = {}
-
-            # For each WITHDRAW related to the order
-            for tx in order_txs:
-
-                try:
-                    # Retrieve GASMember reference
-                    gm_ref = tx.reference_set.get(content_type=ctype_gm)
-                except TransactionReference.DoesNotExist as e:
-                    # We have hit a WITHDRAW related to order, 
-                    # but not to a GASMember
-                    pass
-                else:
-                    #KO: we cannot use .instance attribute
-                    #KO: because it excludes suspended gasmembers and inactive users
-                    #KO: gm = gm_ref.instance
-                    gm = GASMember.all_objects.get(pk=gm_ref.object_id)
-                    members_d[gm] = members_d.get(gm,0) + tx.source.amount
-
-            members = set()
-            for gm, amount in members_d.items():
-                gm.accounted_amount = amount
-                members.add(gm)
-
-            return members
+            # WITHDRAWs related to order, but not to a GASMember, are not considered
+            refs = TransactionReference.objects.filter(content_type=ctype_gm,
+                transaction__in=order_txs.values('pk')
+            )
+            return dict(refs.values('object_id').annotate(
+                    amount=Sum('transaction__source__amount')
+                ).order_by().values_list('object_id', 'amount')
+            )
             
         else:
             raise TypeError(ugettext("GAS %(gas)s has not placed order %(order)s" % {
                 'gas': gas.id_in_des, 'order': order
             }))
 
+    def accounted_amount_by_gas_member(self, order):
+        """
+        Given a supplier order ``order``, return an annotated set of GAS members
+        partecipating to that order.
+        
+        Each GAS member instance will have an ``.accounted_amount`` attribute,
+        representing the total amount of money already accounted for with respect 
+        to the entire set of orders placed by that GAS member within ``order``
+        (see ``accounted_amounts``).
+        
+        If ``order`` has not been placed by the GAS owning this accounting system,
+        raise ``TypeError``.
+        """
+        from gasistafelice.gas.models import GASMember
+
+        amounts = self.accounted_amounts(order)
+
+        #KO: we cannot use GASMember.objects
+        #KO: because it excludes suspended gasmembers and inactive users
+        members = set()
+        for gm in GASMember.all_objects.filter(pk__in=amounts.keys()):
+            gm.accounted_amount = amounts[gm.pk]
+            members.add(gm)
+
+        return members
+
+    def tot_accounted_amount(self, order):
+        """
+        Given a supplier order ``order``, return the total amount of money 
+        already accounted for GAS members partecipating to that order
+        (see ``accounted_amounts``).
+
+        If ``order`` has not been placed by the GAS owning this accounting system,
+        raise ``TypeError``.
+        """
+        return sum(self.accounted_amounts(order).values(), 0)
+
     def entries(self):
         """
         List all LedgerEntries (account, transaction, amount)
@@ -311,15 +335,15 @@ class GasAccountingProxy(AccountingProxy):
             raise Person.DoesNotExist
         non_des_system = non_des.system
         if target == INCOME:
-            source_account = non_des_system['/wallet']
+            source_account = account_paths.get_account(non_des_system, '/wallet')
             exit_point, created = non_des_system.get_or_create_account('/expenses', 'OutOfDES', account_type.expense)
-            entry_point = self.system['/incomes/OutOfDES']
-            target_account = self.system['/cash']   #WAS gas.accounting.system['/cash']
+            entry_point = account_paths.get_account(self.system, '/incomes/OutOfDES')
+            target_account = account_paths.get_account(self.system, '/cash')   #WAS gas.accounting.system['/cash']
         elif  target == EXPENSE:
-            source_account = self.system['/cash']
-            exit_point = self.system['/expenses/OutOfDES']
+            source_account = account_paths.get_account(self.system, '/cash')
+            exit_point = account_paths.get_account(self.system, '/expenses/OutOfDES')
             entry_point, created = non_des_system.get_or_create_account('/incomes', 'OutOfDES', account_type.income)
-            target_account = non_des_system['/wallet']
+            target_account = account_paths.get_account(non_des_system, '/wallet')
         else:
             #WAS raise MalformedTransaction(ugettext("Payment target %s not identified" % target))
             #coercing to Unicode: need string or buffer, __proxy__ found
@@ -348,12 +372,12 @@ class GasAccountingProxy(AccountingProxy):
     def get_account(self, system, parent_path, name, kind):
         path = parent_path + '/' + name
         try:
-            account = system[path]
+            account = account_paths.get_account(system, path)
         except Exception as e: #should be KeyError, but maybe is an AttributeError due to previous implementation
 #WAS        if not account: but raise exception "Account matching query does not exist."
             #if not exist create it
             system.add_account(parent_path=parent_path, name=name, kind=kind)
-            account = system[path]
+            account = account_paths.get_account(system, path)
         if not account:
             raise MalformedTransaction(ugettext("Unknow account: %(system)s %(path)s %(kind)s") % {
                 'system': system,
@@ -380,8 +404,8 @@ class GasAccountingProxy(AccountingProxy):
             raise MalformedTransaction(ugettext("A person can't pay membership fees to a GAS that (s)he is not member of"))
 
         person = member.person
-        source_account = self.system['/members/' + person.uid]
-        target_account = self.system['/cash']
+        source_account = account_paths.get_account(self.system, '/members/' + person.uid)
+        target_account = account_paths.get_account(self.system, '/cash')
 
         amount = gas.membership_fee
         description = ugettext("year %(year)s --> %(person)s") % {'person': person.report_name, 'year': year,}
@@ -407,7 +431,7 @@ class GasAccountingProxy(AccountingProxy):
         transactions = transactions.filter(
             kind=GasAccountingProxy.MEMBERSHIP_FEE
         )
-        fees = self.system['/cash'].ledger_entries.filter(transaction__in=transactions)
+        fees = account_paths.get_account(self.system, '/cash').ledger_entries.filter(transaction__in=transactions)
 
         try:
             last_fee = fees.latest('transaction__date')
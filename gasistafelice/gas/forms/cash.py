@@ -17,7 +17,8 @@ from django.forms import widgets
 from django.contrib.admin import widgets as admin_widgets
 from gasistafelice.lib.widgets import DateFormatAwareWidget
 
-from gasistafelice.lib.formsets import BaseFormSetWithRequest
+from gasistafelice.lib.formsets import BaseFormSetWithRequest, BaseBulkFormSetWithRequest, BulkFormMixin
+from gasistafelice.base import account_paths
 from gasistafelice.lib.fields.forms import CurrencyField
 
 from flexi_auth.models import ParamRole, PrincipalParamRoleRelation
@@ -41,7 +42,7 @@ from django.core.exceptions import ValidationError
 #-------------------------------------------------------------------------------
 
 
-class EcoGASMemberForm(forms.Form):
+class EcoGASMemberForm(BulkFormMixin, forms.Form):
     """Return form class for row level operation on cash ordered data
     use in Curtail
     Movement between GASMember.account --> GAS.account
@@ -65,7 +66,7 @@ class EcoGASMemberForm(forms.Form):
 
         cleaned_data = super(EcoGASMemberForm, self).clean()
         try:
-            cleaned_data['gasmember'] = GASMember.objects.get(pk=cleaned_data['gm_id'])
+            cleaned_data['gasmember'] = self.get_row(GASMember, cleaned_data['gm_id'])
         except KeyError as e:
             log.error(u"EcoGASMemberForm: cannot retrieve gasmember: " + e.message)
             raise forms.ValidationError(ugettext("Cannot retrieve gasmember: ") + e.message)
@@ -83,8 +84,7 @@ class EcoGASMemberForm(forms.Form):
 
         return cleaned_data
 
-    @transaction.commit_on_success
-    def save(self):
+    def check_can_curtail(self):
 
         #Control logged user KO if superuser
         #DT: refs = gas.cash_referrers
@@ -99,6 +99,13 @@ class EcoGASMemberForm(forms.Form):
             )
             raise PermissionDenied(ugettext("order is not in the right state!"))
 
+        return True
+
+    def save(self):
+
+        # Checked once for all the rows of a formset
+        self.memoize('can_curtail', self.check_can_curtail)
+
         gm = self.cleaned_data['gasmember']
 
         #Do economic work
@@ -143,7 +150,51 @@ class EcoGASMemberForm(forms.Form):
 #            })
 
             #Update State if possible
-            self.__order.control_economic_state()
+            if self.formset is None:
+                self.__order.control_economic_state()
+            else:
+                # once for all the rows: see BaseEcoGASMemberFormSet.save()
+                self.formset.economic_state_changed = True
+
+class BaseEcoGASMemberFormSet(BaseBulkFormSetWithRequest):
+    """Curtail formset.
+
+    GAS members of all the rows are retrieved with one query,
+    their accounts are resolved with one query (see ``account_paths``),
+    permissions are checked and the economic state of the order
+    is updated once for all the rows.
+    """
+
+    row_fields = {
+        'gm_id' : GASMember,
+    }
+
+    economic_state_changed = False
+
+    def get_queryset(self, model):
+        return GASMember.objects.select_related('gas', 'person')
+
+    def resolve_accounts(self):
+        gas = self.request.resource.order.gas
+        account_paths.get_accounts(gas.accounting.system,
+            ['/members/' + gm.person.uid for gm in self.get_rows(GASMember).values()]
+        )
+
+    def save(self):
+        self.resolve_accounts()
+        super(BaseEcoGASMemberFormSet, self).save()
+        self.update_economic_state()
+
+    def update_economic_state(self):
+        if self.economic_state_changed:
+            self.request.resource.order.control_economic_state()
+            self.economic_state_changed = False
+
+EcoGASMemberFormSet = formset_factory(
+    form=EcoGASMemberForm,
+    formset=BaseEcoGASMemberFormSet,
+    extra=1
+)
 
 #--------------------------------------------------------------------------------
 
@@ -187,7 +238,6 @@ class NewEcoGASMemberForm(forms.Form):
         cleaned_data = super(NewEcoGASMemberForm, self).clean()
         return cleaned_data
 
-    @transaction.commit_on_success
     def save(self):
 
         #Control logged user KO if superuser
@@ -217,7 +267,7 @@ class NewEcoGASMemberForm(forms.Form):
 
 #--------------------------------------------------------------------------------
 
-class EcoGASMemberRechargeForm(forms.Form):
+class EcoGASMemberRechargeForm(BulkFormMixin, forms.Form):
     """Return form class for row level operation on cash ordered data
     use in Recharge 
     Movement between GASMember.account --> GAS.GASMember.account
@@ -239,7 +289,7 @@ class EcoGASMemberRechargeForm(forms.Form):
 
         cleaned_data = super(EcoGASMemberRechargeForm, self).clean()
         try:
-            cleaned_data['gasmember'] = GASMember.objects.get(pk=cleaned_data['gm_id'])
+            cleaned_data['gasmember'] = self.get_row(GASMember, cleaned_data['gm_id'])
         except KeyError:
             log.debug(u"EcoGASMemberRechargeForm: cannot retrieve GASMember identifier. FORM ATTACK!")
             raise 
@@ -249,7 +299,6 @@ class EcoGASMemberRechargeForm(forms.Form):
            
         return cleaned_data
 
-    @transaction.commit_on_success
     def save(self):
 
         # Do economic work
@@ -260,23 +309,50 @@ class EcoGASMemberRechargeForm(forms.Form):
 
         #Control logged user
         #if self.__loggedusr not in self.__order.cash_referrers: KO if superuser
-        if not self.__loggedusr.has_perm(CASH, 
-            obj=ObjectWithContext(self.__gas)
+        #Checks are performed once for all the rows of a formset
+        if not self.memoize(CASH, self.__loggedusr.has_perm, CASH,
+            ObjectWithContext(self.__gas)
         ):
 
             raise PermissionDenied(ugettext("You are not a cash_referrer, you cannot update GASMembers cash!"))
 
         gm = self.cleaned_data['gasmember']
-        if not gm in self.__gas.gasmembers:
-            log.debug(u"PermissionDenied %s in cash recharge for gasmember %s not in this gas %s" % self.__loggedusr, gm, self.__gas)
+        gm_pks = self.memoize('gasmembers', lambda: set(self.__gas.gasmembers.values_list('pk', flat=True)))
+        if not gm.pk in gm_pks:
+            log.debug(u"PermissionDenied %s in cash recharge for gasmember %s not in this gas %s" % (self.__loggedusr, gm, self.__gas))
             raise PermissionDenied(ugettext("You are not a cash referrer for the GAS, you cannot recharge GASMembers cash!"))
 
         # This kind of amount is ever POSITIVE!
         gm.person.accounting.do_recharge(self.__gas, recharged)
 
+class BaseEcoGASMemberRechargeFormSet(BaseBulkFormSetWithRequest):
+    """Recharge formset.
+
+    GAS members of all the rows are retrieved with one query,
+    accounts of the GAS and of their persons are indexed
+    with a few queries (see ``account_paths``).
+    """
+
+    row_fields = {
+        'gm_id' : GASMember,
+    }
+
+    def get_queryset(self, model):
+        return GASMember.objects.select_related('person')
+
+    def resolve_accounts(self):
+        account_paths.preload([self.request.resource.gas.accounting.system])
+        account_paths.preload_owners(
+            [gm.person for gm in self.get_rows(GASMember).values()]
+        )
+
+    def save(self):
+        self.resolve_accounts()
+        super(BaseEcoGASMemberRechargeFormSet, self).save()
+
 EcoGASMemberRechargeFormSet = formset_factory(
     form=EcoGASMemberRechargeForm,
-    formset=BaseFormSetWithRequest,
+    formset=BaseEcoGASMemberRechargeFormSet,
     extra=0 #must be 0 no add form
 )
 
@@ -449,6 +525,8 @@ def get_html_insolutes(insolutes, EURO_TRANS=EURO_HTML):
     tot_eco_entries = 0
     tot_insolutes = 0
     stat = ''
+    # Retrieve totals of all insolutes with one query
+    insolutes = GASSupplierOrder.objects.annotate_totals(insolutes)
     for ins in insolutes:
         tot_insolutes += 1
         tot_ordered += ins.tot_price
@@ -47,6 +47,7 @@ Where can you find above classes:
 There are also some other classes that support order interactions:
     * gmo.SingleGASMemberOrderForm
     * gmo.BasketGASMemberOrderForm
+    * gmo.BaseGASMemberOrderFormSet (saves all the rows of the above forms at once)
     * gsop.GASSupplierOrderProductForm
 """
  
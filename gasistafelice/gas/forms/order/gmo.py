@@ -1,17 +1,71 @@
-from django.db import transaction
 from django import forms
 from django.utils.translation import ugettext as _
 
 from gasistafelice.gas.models import GASMemberOrder, GASSupplierOrderProduct
+from gasistafelice.gas import report_cache
 from gasistafelice.gf_exceptions import DatabaseInconsistent
+from gasistafelice.lib import request_cache
+from gasistafelice.lib.bulk import chunks
 from gasistafelice.lib.fields.forms import TolerantDecimalField
+from gasistafelice.lib.formsets import BaseBulkFormSetWithRequest, BulkFormMixin
 
 import logging
 log = logging.getLogger(__name__)
 
 #-------------------------------------------------------------------------------
 
-class BaseGASMemberOrderForm(forms.Form):
+class GASMemberOrderBatch(object):
+    """Changes to the orders of a GAS member, applied all together by ``apply``.
+
+    * deleted rows are removed with one DELETE,
+    * updated and new rows are saved one at a time, because ``GASMemberOrder.save``
+      binds them to the workflow and records them in history
+      (i.e: notes of delegated orders). Only changed rows are saved.
+
+    Bulk deletions do not send ``post_save`` signals: reports of
+    involved orders are explicitly invalidated.
+    """
+
+    def __init__(self, gasmember):
+        self.gasmember = gasmember
+        self._updated = {} # gmo pk -> gmo
+        self._deleted = set()
+        self._created = []
+        self._order_pks = set()
+
+    def update(self, gmo, **values):
+        for name, value in values.items():
+            if getattr(gmo, name) != value:
+                setattr(gmo, name, value)
+                self._updated[gmo.pk] = gmo
+                self._order_pks.add(gmo.ordered_product.order_id)
+
+    def delete(self, gmo):
+        self._deleted.add(gmo.pk)
+
+    def create(self, gmo):
+        self._created.append(gmo)
+
+    def apply(self):
+
+        for pks in chunks(self._deleted):
+            # QuerySet.delete() sends post_delete signals
+            GASMemberOrder.objects.filter(pk__in=pks).delete()
+
+        updated = [gmo for pk, gmo in self._updated.items() if pk not in self._deleted]
+        for gmo in updated + self._created:
+            gmo.save()
+
+        report_cache.invalidate(self._order_pks)
+        request_cache.invalidate()
+
+        log.debug(u"GASMemberOrder batch for %s: %d created, %d updated, %d deleted" % (
+            self.gasmember, len(self._created), len(updated), len(self._deleted)
+        ))
+
+#-------------------------------------------------------------------------------
+
+class BaseGASMemberOrderForm(BulkFormMixin, forms.Form):
     """Base class for GASMemberOrder row level operations.
 
     Do not use this class in your views, use subclasses instead."""
@@ -31,6 +85,23 @@ class BaseGASMemberOrderForm(forms.Form):
         self._gmusr = request.resource.gasmember.person.user
         self._loggedusr = request.user
 
+    def can_delegate(self, obj, order_id):
+        """Return True if logged user can order for the GAS member in order ``order_id``.
+
+        ``obj`` is a GASMemberOrder or a GASSupplierOrderProduct of that order:
+        check is performed once for every order in a formset.
+        """
+        return self.memoize(('can_delegate', order_id), obj.can_delegate, self._loggedusr)
+
+    def get_delegate_note(self, note):
+        """Return ``note`` marked with the name of the logged user."""
+
+        delegate = _("[ord by %s] ") % self._loggedusr
+        note = note or u""
+        if note.find(delegate) == -1:
+            note = delegate + note
+        return note
+
     def clean(self):
         cleaned_data = super(BaseGASMemberOrderForm, self).clean()
 
@@ -55,10 +126,10 @@ class BaseGASMemberOrderForm(forms.Form):
             if id:
                 # MATTEO
                 try:
-                    gmo = GASMemberOrder.objects.get(pk=id)
-                    if gmo.ordered_amount != self.cleaned_data.get('ordered_amount'): 
+                    gmo = self.get_row(GASMemberOrder, id)
+                    if gmo.ordered_amount != self.cleaned_data.get('ordered_amount'):
                         #if not self._loggedusr == gmo.order.referrer_person.user:
-                        if not gmo.can_delegate(self._loggedusr):
+                        if not self.can_delegate(gmo, gmo.ordered_product.order_id):
 
                             log.debug(u"---- %s (%s) BASE VALIDATION not enabled for %s" % (
                                 self.__class__.__name__,
@@ -66,14 +137,25 @@ class BaseGASMemberOrderForm(forms.Form):
                             ))
                             raise forms.ValidationError(
                                 _(u"You %(logged)s are not authorized to make an order for %(person)s") % {
-                                    'logged' : u"(%s)" % self._loggedusr, 
+                                    'logged' : u"(%s)" % self._loggedusr,
                                     'person' :self._gm.person
                             })
                 except GASMemberOrder.DoesNotExist:
                     log.debug(u"GAS member order #%d has been canceled" % (id))
         return cleaned_data
 
+    def save_to(self, batch):
+        """Add changes of this form to ``batch`` (a ``GASMemberOrderBatch``)."""
+        raise NotImplementedError
+
+    def save(self):
 
+        if self.is_valid():
+            batch = GASMemberOrderBatch(self._gm)
+            self.save_to(batch)
+            batch.apply()
+        else:
+            log.warning("%s.save(): form is not valid. is_valid() SHOULD be called before calling save()" % self.__class__.__name__)
 
 #-------------------------------------------------------------------------------
 
@@ -86,93 +168,80 @@ class SingleGASMemberOrderForm(BaseGASMemberOrderForm):
         super(SingleGASMemberOrderForm, self).__init__(*args, **kw)
         self.fields['note'].widget.attrs['class'] = 'input_medium'
 
-    @transaction.commit_on_success
-    def save(self):
-
-        if self.is_valid():
-            id = self.cleaned_data.get('id')
-            if id:
-                #Matteo
-                try:
-                    gmo = GASMemberOrder.objects.get(pk=id)
-                    gmo.ordered_price = self.cleaned_data.get('ordered_price')
-                    gmo.ordered_amount = self.cleaned_data.get('ordered_amount')
-                    gmo.note = self.cleaned_data.get('note')
-
-                    if self._gmusr != self._loggedusr:
-                        #if self._loggedusr == gmo.order.referrer_person.user:
-                        if gmo.can_delegate(self._loggedusr):
-                            log.debug(u"---- %s (%s) DELEGATE UPDATE for %s" % (
-                                self.__class__.__name__,
-                                self._gmusr, self._loggedusr
-                            ))
-                            #delegate = _("[ord by %s] ") % gmo.order.referrer_person.report_name
-                            delegate = _("[ord by %s] ") % self._loggedusr
-                            if gmo.note.find(delegate) == -1:
-                                gmo.note = delegate + gmo.note
-                        else:
-                            log.debug(u"---- %s (%s) DELEGATE UPDATE not enabled for %s" % (
-                                self.__class__.__name__,
-                                self._gmusr, self._loggedusr
-                            ))
-                            raise forms.ValidationError(
-                                _(u"You %(logged)s are not authorized to update an order for %(person)s") % {
-                                    'logged' : u"(%s)" % self._loggedusr, 
-                                    'person' :self._gmusr
-                            })
-                            return;
-                    
-                    if gmo.ordered_amount == 0:
-                        log.debug(u"REMOVING GASMemberOrder (%s) from amount widget (+ -)" % gmo.pk)
-                        gmo.delete()
-                        log.debug("REMOVED")
-                    else:
-                        log.debug(u"UPDATING GASMemberOrder (%s) " % gmo.pk)
-                        gmo.save()
-                        log.debug("UPDATED")
-
-                except GASMemberOrder.DoesNotExist:
-                    log.debug(u"GAS member order #%d has been canceled" % (id))
-
-            elif self.cleaned_data.get('ordered_amount'):
-                    gsop = GASSupplierOrderProduct.objects.get(pk=self.cleaned_data.get('gsop_id'))
-                    note = self.cleaned_data.get('note')
-                    #if self._gmusr != self._loggedusr and self._loggedusr == gsop.order.referrer_person.user:
-                    if self._gmusr != self._loggedusr:
-                        if gsop.can_delegate(self._loggedusr):
-                            log.debug(u"---- %s (%s) DELEGATE CREATE for %s" % (
-                                self.__class__.__name__,
-                                self._gmusr, self._loggedusr
-                            ))
-                            #delegate = _("[ord by %s] ") % gsop.order.referrer_person.report_name
-                            delegate = _("[ord by %s] ") % self._loggedusr
-                            if note.find(delegate) == -1:
-                                note = delegate + note
-                        else:
-                            log.debug(u"---- %s (%s) DELEGATE CREATE not enabled for %s" % (
-                                self.__class__.__name__,
-                                self._gmusr, self._loggedusr
-                            ))
-                            raise forms.ValidationError(
-                                _(u"You %(logged)s are not authorized to create an order for %(person)s") % {
-                                    'logged' : u"(%s)" % self._loggedusr, 
-                                    'person' :self._gmusr
-                            })
-                            return;
-
-                    # INTEGRITY NOTE: Ensure no duplicate entry into database is done 
-                    # into GASMemberOrder Model with set unique_together
-                    gmo = GASMemberOrder(
-                            ordered_product = gsop,
-                            ordered_price = self.cleaned_data.get('ordered_price'),
-                            ordered_amount = self.cleaned_data.get('ordered_amount'),
-                            note = note,
-                            purchaser = self._gm,
-                    )
-                    gmo.save()
-                    log.debug("CREATED GASMemberOrder (%s) " % gmo.pk)
-        else:
-            log.warning("SingleGASMemberOrderForm.save(): form is not valid. is_valid() SHOULD be called before calling save()")
+    def save_to(self, batch):
+
+        id = self.cleaned_data.get('id')
+        if id:
+            #Matteo
+            try:
+                gmo = self.get_row(GASMemberOrder, id)
+            except GASMemberOrder.DoesNotExist:
+                log.debug(u"GAS member order #%d has been canceled" % (id))
+                return
+
+            note = self.cleaned_data.get('note')
+            if self._gmusr != self._loggedusr:
+                #if self._loggedusr == gmo.order.referrer_person.user:
+                if self.can_delegate(gmo, gmo.ordered_product.order_id):
+                    log.debug(u"---- %s (%s) DELEGATE UPDATE for %s" % (
+                        self.__class__.__name__,
+                        self._gmusr, self._loggedusr
+                    ))
+                    note = self.get_delegate_note(note)
+                else:
+                    log.debug(u"---- %s (%s) DELEGATE UPDATE not enabled for %s" % (
+                        self.__class__.__name__,
+                        self._gmusr, self._loggedusr
+                    ))
+                    raise forms.ValidationError(
+                        _(u"You %(logged)s are not authorized to update an order for %(person)s") % {
+                            'logged' : u"(%s)" % self._loggedusr,
+                            'person' :self._gmusr
+                    })
+
+            if not self.cleaned_data.get('ordered_amount'):
+                log.debug(u"REMOVING GASMemberOrder (%s) from amount widget (+ -)" % gmo.pk)
+                batch.delete(gmo)
+            else:
+                log.debug(u"UPDATING GASMemberOrder (%s) " % gmo.pk)
+                batch.update(gmo,
+                    ordered_price = self.cleaned_data.get('ordered_price'),
+                    ordered_amount = self.cleaned_data.get('ordered_amount'),
+                    note = note,
+                )
+
+        elif self.cleaned_data.get('ordered_amount'):
+            gsop = self.get_row(GASSupplierOrderProduct, self.cleaned_data.get('gsop_id'))
+            note = self.cleaned_data.get('note')
+            #if self._gmusr != self._loggedusr and self._loggedusr == gsop.order.referrer_person.user:
+            if self._gmusr != self._loggedusr:
+                if self.can_delegate(gsop, gsop.order_id):
+                    log.debug(u"---- %s (%s) DELEGATE CREATE for %s" % (
+                        self.__class__.__name__,
+                        self._gmusr, self._loggedusr
+                    ))
+                    note = self.get_delegate_note(note)
+                else:
+                    log.debug(u"---- %s (%s) DELEGATE CREATE not enabled for %s" % (
+                        self.__class__.__name__,
+                        self._gmusr, self._loggedusr
+                    ))
+                    raise forms.ValidationError(
+                        _(u"You %(logged)s are not authorized to create an order for %(person)s") % {
+                            'logged' : u"(%s)" % self._loggedusr,
+                            'person' :self._gmusr
+                    })
+
+            # INTEGRITY NOTE: Ensure no duplicate entry into database is done
+            # into GASMemberOrder Model with set unique_together
+            batch.create(GASMemberOrder(
+                    ordered_product = gsop,
+                    ordered_price = self.cleaned_data.get('ordered_price'),
+                    ordered_amount = self.cleaned_data.get('ordered_amount'),
+                    note = note,
+                    purchaser = self._gm,
+            ))
+            log.debug(u"CREATING GASMemberOrder for GSOP (%s) " % gsop.pk)
 
 #-------------------------------------------------------------------------------
 
@@ -182,74 +251,89 @@ class BasketGASMemberOrderForm(BaseGASMemberOrderForm):
     gm_id = forms.IntegerField(required=False, widget=forms.HiddenInput)
     enabled = forms.BooleanField(required=False)
 
-    @transaction.commit_on_success
-    def save(self):
+    def save_to(self, batch):
 
         # COMMENT fero: removed some checks that are done in .clean()
         # which is always called in form.is_valid()
         # that we MUST perform always when dealing with forms
         # (maybe we can include a call to it in this method...)
 
-        if self.is_valid():
+        id = self.cleaned_data.get('id')
+        enabled = self.cleaned_data.get('enabled')
+        ordered_amount = self.cleaned_data.get('ordered_amount')
+
+        if not id:
+            return
+
+        #MATTEO
+        try:
+            gmo = self.get_row(GASMemberOrder, id)
+        except GASMemberOrder.DoesNotExist:
+            log.debug(u"GAS member order #%d has been canceled" % (id))
+            return
+
+        #On basket do nothing if no change needed
+        if gmo.ordered_amount != ordered_amount or enabled:
+
+            note = gmo.note
+            if self._gmusr != self._loggedusr:
+                #if self._loggedusr == gmo.order.referrer_person.user:
+                if self.can_delegate(gmo, gmo.ordered_product.order_id):
+                    note = self.get_delegate_note(note)
+                    log.debug(u"---- %s (%s) DELEGATE BASKET for %s" % (
+                        self.__class__.__name__,
+                        self._gmusr, self._loggedusr
+                    ))
+                else:
+                    log.debug(u"---- %s (%s) DELEGATE BASKET not enabled for %s" % (
+                        self.__class__.__name__,
+                        self._gmusr, self._loggedusr
+                    ))
+                    raise forms.ValidationError(
+                        _(u"You %(logged)s are not authorized to modify order's basket for %(person)s") % {
+                            'logged' : u"(%s)" % self._loggedusr,
+                            'person' :self._gmusr
+                    })
+
+            if not ordered_amount:
+                log.debug(u"REMOVING GASMemberOrder (%s) from BASKET using amount widget (+ -)" % id)
+                batch.delete(gmo)
+            elif enabled:
+                log.debug(u"REMOVING GASMemberOrder (%s) from BASKET using check enabled" % id)
+                batch.delete(gmo)
+            else:
+                log.debug(u"UPDATING GASMemberOrder (%s) from BASKET" % id)
+                batch.update(gmo,
+                    ordered_price = self.cleaned_data.get('ordered_price'),
+                    ordered_amount = ordered_amount,
+                    note = note,
+                )
 
-            id = self.cleaned_data.get('id')
-            gm_id = self.cleaned_data.get('gm_id')
-            gsop_id = self.cleaned_data.get('gsop_id')
-            enabled = self.cleaned_data.get('enabled')
+#-------------------------------------------------------------------------------
 
-            if id:
-                #MATTEO
-                try:
-                    gmo = GASMemberOrder.objects.get(pk=id)
-        #            if gm_id and gm_id != gmo.purchaser.pk:
-        #                print "Qualcosa non va con: GASmember"
-        #                return ""
-                    #On basket do nothing if no change needed
-                    if gmo.ordered_amount != self.cleaned_data.get('ordered_amount') or enabled: 
-
-                        if self._gmusr != self._loggedusr:
-                            #if self._loggedusr == gmo.order.referrer_person.user:
-                            if gmo.can_delegate(self._loggedusr):
-                                #delegate = _("[ord by %s] ") % gmo.order.referrer_person.report_name
-                                delegate = _("[ord by %s] ") % self._loggedusr
-                                if gmo.note.find(delegate) == -1:
-                                    gmo.note = delegate + gmo.note
-                                log.debug(u"---- %s (%s) DELEGATE BASKET for %s" % (
-                                    self.__class__.__name__,
-                                    self._gmusr, self._loggedusr
-                                ))
-                            else:
-                                log.debug(u"---- %s (%s) DELEGATE BASKET not enabled for %s" % (
-                                    self.__class__.__name__,
-                                    self._gmusr, self._loggedusr
-                                ))
-                                raise forms.ValidationError(
-                                    _(u"You %(logged)s are not authorized to modify order's basket for %(person)s") % {
-                                        'logged' : u"(%s)" % self._loggedusr, 
-                                        'person' :self._gmusr
-                                })
-                                return;
-                    
-                        gmo.ordered_price = self.cleaned_data.get('ordered_price')
-                        gmo.ordered_amount = self.cleaned_data.get('ordered_amount')
-                        # log.debug("BasketGASMemberOrderForm (%s) enabled = %s" % (gmo.pk,enabled))
-                        if gmo.ordered_amount == 0:
-                            log.debug(u"REMOVING GASMemberOrder (%s) from BASKET using amount widget (+ -)")
-                            gmo.delete()
-                            log.debug(u"REMOVED")
-                        elif enabled:
-                            log.debug(u"REMOVING GASMemberOrder (%s) from BASKET using check enabled")
-                            gmo.delete()
-                            log.debug(u"REMOVED")
-                        else:
-                            log.debug(u"UPDATING GASMemberOrder (%s) from BASKET" % id)
-                            gmo.save()
-                            log.debug(u"UPDATED")
-                    #else:
-                    #    log.debug(u"NOTHING TODO NOTHING")
-                except GASMemberOrder.DoesNotExist:
-                    log.debug(u"GAS member order #%d has been canceled" % (id))
-        else:
-            log.warning("BasketGASMemberOrderForm.save(): form is not valid. is_valid() SHOULD be called before calling save()")
+class BaseGASMemberOrderFormSet(BaseBulkFormSetWithRequest):
+    """Formset of ``SingleGASMemberOrderForm`` or ``BasketGASMemberOrderForm``.
+
+    Member orders and ordered products of all the rows are retrieved
+    with one query each, changes are applied in one ``GASMemberOrderBatch``.
+    """
+
+    row_fields = {
+        'id' : GASMemberOrder,
+        'gsop_id' : GASSupplierOrderProduct,
+    }
+
+    def get_queryset(self, model):
+        if model is GASMemberOrder:
+            return GASMemberOrder.objects.select_related('ordered_product')
+        return super(BaseGASMemberOrderFormSet, self).get_queryset(model)
+
+    def save(self):
 
+        batch = GASMemberOrderBatch(self.request.resource.gasmember)
+        for form in self.forms:
+            # Check for data: empty formsets are full of empty data ;)
+            if form.cleaned_data:
+                form.save_to(batch)
+        batch.apply()
 
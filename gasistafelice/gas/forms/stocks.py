@@ -43,9 +43,24 @@ class GASSupplierStockForm(forms.Form):
                 log.debug("Save SingleSupplierStockForm error(%s)" %  str(e))
                 Exception("Save SingleSupplierStockForm error: %s", str(e))
 
+class BaseGASSupplierStockFormSet(BaseFormSetWithRequest):
+
+    def save(self):
+        """Enable or disable GAS stocks and propagate changes to open orders in bulk."""
+
+        from gasistafelice.gas.propagation import propagate_gasstock_changes
+
+        changes = {}
+        for form in self.forms:
+            if form.cleaned_data and form.cleaned_data.get('id'):
+                changes[form.cleaned_data['id']] = form.cleaned_data.get('enabled', False)
+
+        changed = propagate_gasstock_changes(changes)
+        log.debug("Save GASSupplierStockFormSet: %d GAS stocks changed" % len(changed))
+
 GASSupplierStockFormSet = formset_factory(
                                 form=GASSupplierStockForm,
-                                formset=BaseFormSetWithRequest,
+                                formset=BaseGASSupplierStockFormSet,
                                 extra=0 #must be 0 no add form
                           )
 
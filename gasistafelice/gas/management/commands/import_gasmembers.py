@@ -9,6 +9,7 @@ from gasistafelice.lib.csvmanager import CSVManager
 from gasistafelice.lib import get_params_from_template
 from gasistafelice.gas.models import GAS, GASMember
 from gasistafelice.base.models import Place, Person, Contact
+from gasistafelice.base import account_paths
 
 from pprint import pprint
 import logging
@@ -96,6 +97,8 @@ class Command(BaseCommand):
                 gm, created = GASMember.objects.get_or_create(person=pers, gas=g)
                 gm.save()
                 log.info(("CREATED GASMEMBER %s" % gm).decode(ENCODING)) 
+
+        account_paths.forget_changed()
         return 0
 
     def _manage_multiple_duplicates(self, qs, display_attrs):
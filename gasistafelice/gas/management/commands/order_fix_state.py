@@ -2,7 +2,7 @@
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
 
-from gasistafelice.gas.models import GASSupplierOrder
+from gasistafelice.gas.scheduler import run_due_events
 
 
 class Command(BaseCommand):
@@ -10,17 +10,13 @@ class Command(BaseCommand):
     help = """Fix order states according to their datetime and state settings.
 
 * Open orders that are in "prepared" state and datetime_start <= datetime.now()
-* Close orders that are in "open" state and datetime_end >= datetime.now()
+* Close orders that are in "open" state and datetime_end <= datetime.now()
+
+Kept for existing cron jobs: it is the same as running `order_scheduler` once.
 """
 
     def handle(self, *args, **options):
 
-        for order in GASSupplierOrder.objects.prepared():
-            #Pass argument for issuer is cron job. The function will send email if necesary
-            order.open_if_needed(True)
-
-        for order in GASSupplierOrder.objects.open():
-            #Pass argument for issuer is cron job. The function will send email if necesary
-            order.close_if_needed()
-            
+        rv = run_due_events()
+        self.stdout.write("%d orders opened, %d closed\n" % (len(rv['opened']), len(rv['closed'])))
         return 0
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries
+
+from gasistafelice.gas.scheduler import run_due_events, next_event_on
+from gasistafelice.base import account_paths
+
+from optparse import make_option
+from datetime import datetime
+import time
+
+class Command(BaseCommand):
+    args = ""
+    option_list = BaseCommand.option_list + (
+        make_option('--loop', action='store_true', dest='loop', default=False,
+            help="Keep running: sleep until the next order has to be opened or closed"
+        ),
+        make_option('--max-sleep', type='int', dest='max_sleep', default=60,
+            help="In loop mode, seconds to sleep at most (orders may be rescheduled meanwhile). Default 60"
+        ),
+        make_option('--batch-size', type='int', dest='batch_size', default=None,
+            help="Number of orders retrieved at a time"
+        ),
+    )
+    help = """Open and close orders whose datetime_start and datetime_end have come.
+
+* Open orders that are in "prepared" state and datetime_start <= now
+* Close orders that are in "open" state and datetime_end <= now
+
+Only due orders are retrieved. Schedule it in a cron job (i.e: every two minutes)
+or run it with --loop as a daemon.
+"""
+
+    def handle(self, *args, **options):
+
+        if options['max_sleep'] <= 0:
+            raise CommandError("--max-sleep must be a positive number of seconds")
+
+        while True:
+            rv = run_due_events(batch_size=options['batch_size'])
+            # Accounts may have been saved: do not keep their paths for the next run
+            account_paths.forget_changed()
+            if rv['opened'] or rv['closed'] or not options['loop']:
+                self.stdout.write("%s: %d orders opened, %d closed\n" % (
+                    datetime.now().strftime("%Y-%m-%d %H:%M:%S"), len(rv['opened']), len(rv['closed'])
+                ))
+            if not options['loop']:
+                break
+
+            # Do not accumulate queries when DEBUG is True
+            reset_queries()
+
+            sleep = options['max_sleep']
+            next_on = next_event_on()
+            if next_on:
+                delta = next_on - datetime.now()
+                sleep = min(sleep, max(delta.days*86400 + delta.seconds + 1, 1))
+            time.sleep(sleep)
+
+        return 0
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from workflows.models import StateObjectRelation
+
+from gasistafelice.gas.models import GASSupplierOrder
+from gasistafelice.gas import report_cache
+
+CHUNK_SIZE = 500
+
+class Command(BaseCommand):
+    args = ""
+    help = """Sync denormalized current_state_name of orders with their workflow state.
+
+Needed once after the field has been added and whenever workflow states
+are changed without signals (i.e: raw SQL or fixtures loading).
+"""
+
+    def handle(self, *args, **options):
+
+        order_ct = ContentType.objects.get_for_model(GASSupplierOrder)
+        sors = StateObjectRelation.objects.filter(content_type=order_ct)
+
+        # Group orders by state name to perform one UPDATE for each state
+        pks_by_state = {}
+        for content_id, state_name in sors.values_list('content_id', 'state__name'):
+            pks_by_state.setdefault(state_name, []).append(content_id)
+
+        with transaction.commit_on_success():
+
+            for state_name, pks in pks_by_state.items():
+                n = 0
+                # Chunks avoid too many SQL parameters
+                for i in range(0, len(pks), CHUNK_SIZE):
+                    n += GASSupplierOrder.objects.filter(pk__in=pks[i:i+CHUNK_SIZE]).exclude(
+                        current_state_name=state_name
+                    ).update(current_state_name=state_name)
+                    report_cache.invalidate(pks[i:i+CHUNK_SIZE])
+                self.stdout.write("%s: %d orders, %d updated\n" % (state_name, len(pks), n))
+
+            # Orders without a workflow state
+            n = GASSupplierOrder.objects.exclude(pk__in=sors.values('content_id')).exclude(
+                current_state_name=''
+            ).update(current_state_name='')
+            self.stdout.write("without state: %d updated\n" % n)
+
+        return 0
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from gasistafelice.gas.models import GASMember, GASSupplierSolidalPact
+from gasistafelice.base import account_paths
+
+
+class Command(BaseCommand):
+    args = ""
+    help = """Create accounts missing in accounting trees of old pacts and GAS members.
+
+Run it once after upgrading: trees are then marked as complete in the
+cache shared by web workers (ACCOUNT_TREE_CACHE), so operations do not
+need to check for missing accounts.
+"""
+
+    def handle(self, *args, **options):
+
+        n_pacts = n_members = 0
+        with transaction.commit_on_success():
+
+            for pact in GASSupplierSolidalPact.objects.select_related('gas', 'supplier'):
+                pact.supplier.accounting.ensure_accounts(pact.gas, force=True)
+                n_pacts += 1
+
+            for gm in GASMember.all_objects.select_related('gas', 'person'):
+                gm.person.accounting.ensure_accounts(gm.gas, force=True)
+                n_members += 1
+
+        account_paths.forget_changed()
+        self.stdout.write("accounts checked for %d pacts and %d GAS members\n" % (n_pacts, n_members))
+        return 0
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+
+from gasistafelice.gas.models import OrderJob
+
+
+class Command(BaseCommand):
+    args = "[<max_jobs>]"
+    help = """Run pending order jobs (report rendering and sending).
+
+Failed jobs are rescheduled with an increasing delay
+until they reach the maximum number of attempts.
+Jobs left running by a crashed worker are rescheduled
+when their lock expires.
+Schedule it in a cron job, i.e: every minute.
+"""
+
+    def handle(self, *args, **options):
+        """usage sample: $ python manage.py run_order_jobs 10"""
+        try:
+            max_jobs = int(args[0]) if args else None
+        except ValueError:
+            raise CommandError("Usage run_order_jobs: %s" % (self.args))
+
+        OrderJob.objects.recover_stale()
+
+        jobs = OrderJob.objects.runnable()
+        if max_jobs:
+            jobs = jobs[:max_jobs]
+
+        done = failed = 0
+        for job in jobs:
+            rv = job.run()
+            if rv is None:
+                continue
+            elif rv:
+                done += 1
+            else:
+                failed += 1
+                self.stderr.write("Job %s failed (attempt %d)\n" % (job, job.attempts))
+
+        self.stdout.write("%d jobs done, %d failed\n" % (done, failed))
+        return 0
@@ -4,12 +4,43 @@ from django.db.models import Max
 
 from gasistafelice.consts import *
 from flexi_auth.models import ParamRole
-from gasistafelice.gas.query import AppointmentQuerySet, OrderQuerySet, GASMemberQuerySet
+from gasistafelice.gas.query import AppointmentQuerySet, OrderQuerySet, GASMemberQuerySet, GASQuerySet, \
+    OrderProductQuerySet
+
+from django.core.cache import cache
 
 import logging
 
 log = logging.getLogger(__name__)
 
+class GASManager(models.Manager):
+
+    ACTIVITY_RANKING_KEY = "gas_activity_ranking"
+
+    def get_query_set(self):
+        return GASQuerySet(self.model)
+
+    def ranked_by_activity(self):
+        return self.get_query_set().ranked_by_activity()
+
+    def activity_ranking(self):
+        """Return the list of GAS ranked by activity (see `GASQuerySet.ranked_by_activity`).
+
+        Ranking is cached until an order changes state 
+        (see signal handlers in `gasistafelice.gas.models`).
+        """
+        pks = cache.get(self.ACTIVITY_RANKING_KEY)
+        if pks is None:
+            pks = list(self.ranked_by_activity().values_list('pk', flat=True))
+            cache.set(self.ACTIVITY_RANKING_KEY, pks)
+        gas_d = self.in_bulk(pks)
+        return [gas_d[pk] for pk in pks if pk in gas_d]
+
+    def invalidate_activity_ranking(self):
+        cache.delete(self.ACTIVITY_RANKING_KEY)
+
+#-------------------------------------------------------------------------------
+
 class GASMemberManager(models.Manager):
     """
     A custom manager class for the `GASMember` model.
@@ -236,6 +267,21 @@ class OrderManager(models.Manager):
     
     def canceled(self):
         return self.get_query_set().canceled()
+
+    def due_to_open(self, now):
+        return self.get_query_set().due_to_open(now)
+
+    def due_to_close(self, now):
+        return self.get_query_set().due_to_close(now)
+
+    def next_event_on(self):
+        return self.get_query_set().next_event_on()
+
+    def with_totals(self):
+        return self.get_query_set().with_totals()
+
+    def annotate_totals(self, orders):
+        return self.get_query_set().annotate_totals(orders)
   
 
     def get_new_intergas_group_id(self):
@@ -255,3 +301,12 @@ class OrderManager(models.Manager):
         _group_id = _maxs.get('group_id__max') or 0 
         return _group_id + 1
 
+#-------------------------------------------------------------------------------
+
+class OrderProductManager(models.Manager):
+
+    def get_query_set(self):
+        return OrderProductQuerySet(self.model)
+
+    def with_member_order(self, gasmember):
+        return self.get_query_set().with_member_order(gasmember)
@@ -7,14 +7,17 @@ Definition: `Vocabolario - GAS <http://www.jagom.org/trac/REESGas/wiki/BozzaVoca
  
 from gasistafelice.gas.models.base import GAS, GASMember, GASSupplierStock, GASSupplierSolidalPact, GASConfig, GASActivist
 from gasistafelice.gas.models.order import GASSupplierOrder, GASSupplierOrderProduct, GASMemberOrder, Delivery, Withdrawal
+from gasistafelice.gas.models.job import OrderJob
 
 # Signals catching
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.contrib.admin.models import User
 from django.conf import settings
 
+from django.contrib.contenttypes.models import ContentType
+
 from workflows.utils import get_allowed_transitions, do_transition, get_workflow, set_workflow
-from workflows.models import Transition
+from workflows.models import Transition, StateObjectRelation
 
 from gasistafelice.gas.models.order import GASSupplierOrder
 
@@ -37,6 +40,32 @@ def setup_order_workflow(sender, instance, created, **kwargs):
 
 post_save.connect(setup_order_workflow, sender=GASSupplierOrder)
 
+def sync_order_state_name(sender, instance, **kwargs):
+    """Keep denormalized `GASSupplierOrder.current_state_name` in sync with workflow state.
+
+    Every state change (`do_transition`, `set_state`, `set_initial_state`) 
+    saves a `StateObjectRelation` instance.
+    """
+
+    order_ct = ContentType.objects.get_for_model(GASSupplierOrder)
+    if instance.content_type_id == order_ct.pk:
+        GASSupplierOrder.objects.filter(pk=instance.content_id).update(
+            current_state_name=instance.state.name
+        )
+        # QuerySet.update() does not send signals
+        report_cache.invalidate([instance.content_id])
+        # GAS activity depends on orders state
+        GAS.objects.invalidate_activity_ranking()
+
+post_save.connect(sync_order_state_name, sender=StateObjectRelation)
+
+def invalidate_gas_activity_ranking(sender, **kwargs):
+    GAS.objects.invalidate_activity_ranking()
+
+post_save.connect(invalidate_gas_activity_ranking, sender=GAS)
+post_delete.connect(invalidate_gas_activity_ranking, sender=GAS)
+post_delete.connect(invalidate_gas_activity_ranking, sender=GASSupplierOrder)
+
 ## Signals
 # setup accounting-related things for *every* model
 # implementing a ``.setup_accounting()`` method.
@@ -48,3 +77,63 @@ def setup_non_subject_accounting(sender, instance, created, **kwargs):
         
 post_save.connect(setup_non_subject_accounting, sender=GASMember)
 post_save.connect(setup_non_subject_accounting, sender=GASSupplierSolidalPact)
+
+#-------------------------------------------------------------------------------
+# Rendered order reports invalidation
+
+from django.contrib.comments.models import Comment
+
+from django.db.models import Q
+
+from gasistafelice.gas import report_cache
+from gasistafelice.gas.models.order import GASMemberOrder, GASSupplierOrderProduct
+from gasistafelice.base.models import Person
+from gasistafelice.supplier.models import SupplierStock, Product
+
+def invalidate_order_report(sender, instance, **kwargs):
+    """Invalidate cached reports of orders that show `instance`."""
+
+    if isinstance(instance, GASSupplierOrder):
+        order_pks = [instance.pk]
+    elif isinstance(instance, GASSupplierOrderProduct):
+        order_pks = [instance.order_id]
+    elif isinstance(instance, GASMemberOrder):
+        order_pks = GASSupplierOrderProduct.objects.filter(
+            pk=instance.ordered_product_id).values_list('order', flat=True)
+    elif isinstance(instance, GASSupplierStock):
+        order_pks = instance.orderable_product_set.values_list('order', flat=True)
+    elif isinstance(instance, SupplierStock):
+        order_pks = GASSupplierOrderProduct.objects.filter(
+            gasstock__stock=instance).values_list('order', flat=True)
+    elif isinstance(instance, Product):
+        order_pks = GASSupplierOrderProduct.objects.filter(
+            gasstock__stock__product=instance).values_list('order', flat=True)
+    elif isinstance(instance, GASSupplierSolidalPact):
+        order_pks = instance.order_set.values_list('pk', flat=True)
+    elif isinstance(instance, (Delivery, Withdrawal)):
+        order_pks = instance.order_set.values_list('pk', flat=True)
+    elif isinstance(instance, GASMember):
+        # names of purchasers are shown in report
+        order_pks = GASSupplierOrderProduct.objects.filter(
+            gasmember_order_set__purchaser=instance).values_list('order', flat=True)
+    elif isinstance(instance, Person):
+        # names of purchasers and referrers are shown in report
+        order_pks = set(GASSupplierOrderProduct.objects.filter(
+            gasmember_order_set__purchaser__person=instance).values_list('order', flat=True))
+        order_pks.update(GASSupplierOrder.objects.filter(Q(referrer_person=instance)
+            | Q(delivery_referrer_person=instance) | Q(withdrawal_referrer_person=instance)
+        ).values_list('pk', flat=True))
+    elif isinstance(instance, Comment):
+        # notes are shown in report
+        if instance.content_type.model_class() is not GASSupplierOrder:
+            return
+        order_pks = [instance.object_pk]
+
+    report_cache.invalidate(order_pks)
+
+for model in (GASSupplierOrder, GASSupplierOrderProduct, GASMemberOrder,
+    GASSupplierStock, SupplierStock, Product, GASSupplierSolidalPact,
+    Delivery, Withdrawal, GASMember, Person, Comment
+):
+    post_save.connect(invalidate_order_report, sender=model)
+    post_delete.connect(invalidate_order_report, sender=model)
@@ -24,13 +24,17 @@ from simple_accounting.models import (economic_subject, Account,
     AccountSystem
 )
 
-from gasistafelice.lib import ClassProperty
+from gasistafelice.lib import ClassProperty, ordered_uniq
+from gasistafelice.lib.mail import send_messages
 from gasistafelice.lib.fields.models import CurrencyField, PrettyDecimalField
 from gasistafelice.lib.fields import display
 from gasistafelice.utils import long_date
 
 from gasistafelice.base.models import PermissionResource, Person, Place, Contact
 from gasistafelice.base import const
+from gasistafelice.base import workflow_cache
+from gasistafelice.base import account_paths
+from gasistafelice.base.balances import get_balance, get_child_balances
 from gasistafelice.base import utils as base_utils
 
 from gasistafelice.gas.accounting import GasAccountingProxy
@@ -38,7 +42,7 @@ from gasistafelice.gas.accounting import GasAccountingProxy
 from gasistafelice.consts import GAS_REFERRER_SUPPLIER, GAS_REFERRER_TECH, GAS_REFERRER_CASH, GAS_MEMBER, GAS_REFERRER
 
 from gasistafelice.supplier.models import Supplier, SupplierStock, Product, ProductCategory
-from gasistafelice.gas.managers import GASMemberManager, IncludeSuspendedGASMemberManager
+from gasistafelice.gas.managers import GASManager, GASMemberManager, IncludeSuspendedGASMemberManager
 from gasistafelice.des.models import DES
 
 from gasistafelice.gf_exceptions import NoSenseException, DatabaseInconsistent
@@ -101,6 +105,7 @@ class GAS(models.Model, PermissionResource):
     #TODO: Notify system
 
     #-- Managers --#
+    objects = GASManager()
     accounting =  AccountingDescriptor(GasAccountingProxy)
     history = HistoricalRecords()
 
@@ -449,11 +454,7 @@ class GAS(models.Model, PermissionResource):
     def deliveries(self):
         from gasistafelice.gas.models.order import Delivery
         # The GAS deliveries appointments take from orders. Do distinct operation. 
-        rv = Delivery.objects.none()
-        for obj in self.orders:
-            if obj.delivery: 
-                rv |= obj.delivery
-        return rv
+        return Delivery.objects.filter(order_set__pact__gas=self).distinct()
 
     @property
     def delivery(self):
@@ -463,11 +464,7 @@ class GAS(models.Model, PermissionResource):
     def withdrawals(self):
         from gasistafelice.gas.models.order import Withdrawal
         # The GAS withdrawal appointments. Do distinct operation.
-        rv = Withdrawal.objects.none()
-        for obj in self.orders:
-            if obj.withdrawal: 
-                rv |= obj.withdrawal
-        return rv
+        return Withdrawal.objects.filter(order_set__pact__gas=self).distinct()
 
     @property
     def withdrawal(self):
@@ -526,36 +523,42 @@ class GAS(models.Model, PermissionResource):
     @property
     def balance(self):
         """Cash balance available for GAS"""
-        acc_tot = self.accounting.system['/cash'].balance
+        acc_tot = get_balance(account_paths.get_account(self.accounting.system, '/cash'))
         return acc_tot
 
+    def gasmember_balances(self, gasmembers=None):
+        """Return a dictionary which maps GAS members (by primary key) to their balances.
+
+        ``gasmembers`` is a QuerySet of members of this GAS (default: all of them).
+        Balances are retrieved all together (see ``base.balances.get_child_balances``).
+        """
+        if gasmembers is None:
+            gasmembers = self.all_gasmembers
+        uids = dict((gm_pk, Person(pk=person_pk).uid)
+            for gm_pk, person_pk in gasmembers.values_list('pk', 'person')
+        )
+        balances = get_child_balances(self.accounting.system, '/members', uids.values())
+        return dict((gm_pk, balances.get(uid, 0)) for gm_pk, uid in uids.items())
+
     @property
     def balance_gasmembers(self):
         """Cash balance available for GASMembers of the GAS"""
         #return self.accounting.system['/members'].balance
-        acc_tot = 0
-        for gm in self.all_gasmembers:
-            acc_tot += self.accounting.system['/members/' + gm.person.uid].balance
-        return acc_tot
+        return sum(self.gasmember_balances().values(), 0)
 
     @property
     def balance_suppliers(self):
         """How much money has been given to suppliers by this GAS."""
-        acc_tot = 0
-        for pact in self.pacts:
-            acc_path = '/expenses/suppliers/' + pact.supplier.uid
-            acc_tot += self.accounting.system[acc_path].balance
-        return acc_tot
+        uids = [Supplier(pk=supplier_pk).uid for supplier_pk in self.pacts.values_list('supplier', flat=True)]
+        balances = get_child_balances(self.accounting.system, '/expenses/suppliers', uids)
+        return sum(balances.values(), 0)
 
     @property
     def liquidity(self):
         """Accounting sold for all members of this gas.
 
         """
-        acc_tot = 0
-        for gm in self.all_gasmembers:
-            acc_tot += gm.balance
-        return acc_tot
+        return self.balance_gasmembers
 
     def send_email_to_gasmembers(self, subject, message, more_to=[]):
 
@@ -569,22 +572,24 @@ class GAS(models.Model, PermissionResource):
             sender = settings.DEFAULT_FROM_EMAIL
             message += '\n%s --> %s' % (msg, sender)
 
-        to = []
-
-        for gm in self.gasmembers:
-            to.append(gm.email)
+        # Retrieve email addresses of all members with one query:
+        # preferred ones win (as in `GASMember.email`)
+        addresses = {}
+        for person_pk, value in Contact.objects.filter(
+            person__gasmember__in=self.gasmembers, flavour=const.EMAIL
+        ).order_by('is_preferred').values_list('person', 'value'):
+            addresses[person_pk] = value
 
-        for addr in to + more_to:
-
-            email = EmailMessage(
+        # One message per address, all sent over the same connection
+        messages = (EmailMessage(
                 subject = subject,
                 body = message,
                 from_email = sender,
                 to = [addr]
-            )
+            ) for addr in ordered_uniq(addresses.values() + list(more_to)) if addr
+        )
 
-            email.send()
-        return
+        return send_messages(messages)
 
     @property
     def insolutes(self):
@@ -1096,7 +1101,7 @@ class GASMember(models.Model, PermissionResource):
         ## Person-side
         # placeholder for payments made by this person to GASs (s)he belongs to
         try:
-            person_system['/expenses/gas']
+            account_paths.get_account(person_system, '/expenses/gas')
         except Account.DoesNotExist:
             person_system.get_or_create_account(
                 parent_path='/expenses', name='gas', kind=account_type.expense, is_placeholder=True
@@ -1252,7 +1257,7 @@ class GASMember(models.Model, PermissionResource):
         """Accounting sold for this gasmember"""
         #FIXME: only for this person in this GAS! Not for the person himself
         #acc_tot = self.person.accounting.system['/wallet'].balance
-        acc_tot = self.gas.accounting.system['/members/' + self.person.uid].balance
+        acc_tot = get_balance(account_paths.get_account(self.gas.accounting.system, '/members/' + self.person.uid))
         return acc_tot
 
     @property
@@ -1323,8 +1328,7 @@ class GASMember(models.Model, PermissionResource):
                 'application/pdf'
             )
 
-        email.send()
-        return 
+        return send_messages([email], fail_silently=False)
 
     def get_valid_name(self):
         from django.template.defaultfilters import slugify
@@ -1347,7 +1351,7 @@ class GASMember(models.Model, PermissionResource):
         """Return PDF raw content to be rendered somewhere (email, or http)"""
 
         if not requested_by:
-            requested_by = User.objects.get(username=settings.INIT_OPTIONS['su_username'])
+            requested_by = workflow_cache.get_system_user()
 
         querySet = self.basket | self.basket_to_be_delivered
         querySet = querySet.order_by('ordered_product__order__pk') 
@@ -1861,6 +1865,8 @@ class GASSupplierSolidalPact(models.Model, PermissionResource):
         supplier_system.get_or_create_account(
             parent_path='/incomes/gas', name=self.gas.uid, kind=account_type.income
         )
+        # other accounts used by pact extra operations
+        self.supplier.accounting.ensure_accounts(self.gas, force=True)
 
     def setup_data(self):
         for st in self.supplier.stocks:
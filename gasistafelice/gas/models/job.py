@@ -0,0 +1,177 @@
+"""Jobs to be executed outside of the request/response cycle.
+
+Rendering order reports and sending them by email may take a long time
+(i.e: InterGAS orders need a report for every complementary order).
+Jobs are stored in the database and run by the `run_order_jobs` management command.
+"""
+
+from django.db import models
+from django.db.models import F
+from django.utils.translation import ugettext_lazy as _
+from django.utils import simplejson as json
+from django.contrib.auth.models import User
+
+from gasistafelice.gas.models.order import GASSupplierOrder
+
+from datetime import datetime, timedelta
+import traceback
+import logging
+
+log = logging.getLogger(__name__)
+
+#-------------------------------------------------------------------------------
+
+class OrderJobManager(models.Manager):
+
+    def enqueue(self, order, kind, issued_by=None, **params):
+        """Schedule a job of kind `kind` for `order`.
+
+        `params` are passed as keyword arguments to the order method bound to `kind`.
+        They must be serializable in JSON.
+        """
+        job = self.create(order=order, kind=kind, issued_by=issued_by,
+            params=json.dumps(params)
+        )
+        log.debug("Enqueued job %s" % job)
+        return job
+
+    def runnable(self):
+        """Return jobs waiting to be run now."""
+        return self.filter(status=OrderJob.STATUS_PENDING,
+            run_after__lte=datetime.now()
+        ).order_by('run_after', 'pk')
+
+    def recover_stale(self):
+        """Release jobs whose worker did not complete them within `LOCK_TIMEOUT`.
+
+        While a job is running `run_after` holds the lock expiration time.
+        Stale jobs are rescheduled, or marked as failed if they have
+        reached the maximum number of attempts.
+
+        Return the number of recovered jobs.
+        """
+        stale = self.filter(status=OrderJob.STATUS_RUNNING,
+            run_after__lte=datetime.now()
+        )
+        error = "Lock expired: worker did not complete the job"
+        n = stale.filter(attempts__lt=OrderJob.MAX_ATTEMPTS).update(
+            status=OrderJob.STATUS_PENDING, last_error=error
+        )
+        n += stale.update(status=OrderJob.STATUS_FAILED, last_error=error)
+        if n:
+            log.warning("Recovered %d stale order jobs" % n)
+        return n
+
+class OrderJob(models.Model):
+    """A job to be run on a supplier order.
+
+    A job is run by calling the order method bound to its kind
+    (see `METHOD_BY_KIND`). If it fails, it is retried
+    with an increasing delay up to `MAX_ATTEMPTS` times.
+
+    A running job is locked for `LOCK_TIMEOUT`: if its worker crashes,
+    the job is recovered by `OrderJobManager.recover_stale`.
+    """
+
+    SEND_EMAIL = 'SEND_EMAIL'
+    SEND_EMAIL_TO_SUPPLIER = 'SEND_EMAIL_TO_SUPPLIER'
+
+    KIND_CHOICES = (
+        (SEND_EMAIL, _('send order report by email')),
+        (SEND_EMAIL_TO_SUPPLIER, _('send order report to supplier')),
+    )
+
+    METHOD_BY_KIND = {
+        SEND_EMAIL : 'send_email',
+        SEND_EMAIL_TO_SUPPLIER : 'send_email_to_supplier',
+    }
+
+    STATUS_PENDING = 'PENDING'
+    STATUS_RUNNING = 'RUNNING'
+    STATUS_DONE = 'DONE'
+    STATUS_FAILED = 'FAILED'
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, _('pending')),
+        (STATUS_RUNNING, _('running')),
+        (STATUS_DONE, _('done')),
+        (STATUS_FAILED, _('failed')),
+    )
+
+    MAX_ATTEMPTS = 5
+    RETRY_DELAY = timedelta(minutes=5)
+    LOCK_TIMEOUT = timedelta(minutes=30)
+
+    order = models.ForeignKey(GASSupplierOrder, related_name="job_set", verbose_name=_('order'))
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES, verbose_name=_('kind'))
+    # JSON encoded keyword arguments
+    params = models.TextField(blank=True, verbose_name=_('parameters'))
+    issued_by = models.ForeignKey(User, null=True, blank=True, verbose_name=_('issued by'))
+
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES,
+        default=STATUS_PENDING, db_index=True, verbose_name=_('status')
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name=_('attempts'))
+    last_error = models.TextField(blank=True, verbose_name=_('last error'))
+
+    created_on = models.DateTimeField(auto_now_add=True, verbose_name=_('created on'))
+    run_after = models.DateTimeField(default=datetime.now, db_index=True, verbose_name=_('run after'))
+    done_on = models.DateTimeField(null=True, blank=True, verbose_name=_('done on'))
+
+    objects = OrderJobManager()
+
+    class Meta:
+        verbose_name = _('order job')
+        verbose_name_plural = _('order jobs')
+        ordering = ('-created_on',)
+        app_label = 'gas'
+
+    def __unicode__(self):
+        return u"%s %s [%s]" % (self.get_kind_display(), self.order_id, self.status)
+
+    def acquire(self):
+        """Mark job as running and lock it until `LOCK_TIMEOUT` expires.
+
+        Return False if it has already been acquired by another worker.
+        """
+        lock_expires = datetime.now() + OrderJob.LOCK_TIMEOUT
+        n = OrderJob.objects.filter(pk=self.pk, status=OrderJob.STATUS_PENDING).update(
+            status=OrderJob.STATUS_RUNNING, attempts=F('attempts') + 1,
+            run_after=lock_expires
+        )
+        if n:
+            self.status = OrderJob.STATUS_RUNNING
+            self.attempts += 1
+            self.run_after = lock_expires
+        return bool(n)
+
+    def run(self):
+        """Run this job and track its result. 
+
+        Return True on success, False on failure 
+        and None if job has been already acquired by another worker.
+        """
+
+        if not self.acquire():
+            return None
+
+        kw = dict((str(k), v) for k, v in json.loads(self.params or '{}').items())
+        method = getattr(self.order, OrderJob.METHOD_BY_KIND[self.kind])
+        try:
+            method(issued_by=self.issued_by, **kw)
+        except Exception as e:
+            log.error("Job %s failed: %s (%s)" % (self, e, type(e)))
+            self.last_error = traceback.format_exc()
+            if self.attempts < OrderJob.MAX_ATTEMPTS:
+                self.status = OrderJob.STATUS_PENDING
+                self.run_after = datetime.now() + OrderJob.RETRY_DELAY * self.attempts
+            else:
+                self.status = OrderJob.STATUS_FAILED
+            self.save()
+            return False
+
+        self.status = OrderJob.STATUS_DONE
+        self.done_on = datetime.now()
+        self.save()
+        return True
+
@@ -16,6 +16,7 @@ from django.utils.encoding import smart_unicode
 from workflows.models import Workflow, Transition
 from workflows.utils  import set_initial_state
 from gasistafelice.base.workflows_utils import get_workflow, set_workflow, get_state, do_transition, get_allowed_transitions
+from gasistafelice.base import workflow_cache
 from history.models import HistoricalRecords
 
 from gasistafelice.base.models import PermissionResource, Place, DefaultTransition
@@ -25,11 +26,14 @@ from gasistafelice.base import validators
 from gasistafelice.lib.fields.models import CurrencyField, PrettyDecimalField
 from gasistafelice.lib.fields import display
 from gasistafelice.lib import ClassProperty, unordered_uniq
+from gasistafelice.lib.mail import send_messages
 from gasistafelice.lib.djangolib import queryset_from_iterable
 from gasistafelice.supplier.models import Supplier
 from gasistafelice.gas.models.base import GASMember, GASSupplierSolidalPact, GASSupplierStock
-from gasistafelice.gas.managers import AppointmentManager, OrderManager
+from gasistafelice.gas.managers import AppointmentManager, OrderManager, OrderProductManager
+from gasistafelice.gas.query import ORDER_TOTALS_NAMES
 from gasistafelice.gas import signals
+from gasistafelice.gas import report_cache
 from gasistafelice.base.models import Person
 from gasistafelice.consts import *
 from gasistafelice.consts import FAKE_WITHDRAWN_AMOUNT
@@ -59,6 +63,16 @@ log = logging.getLogger(__name__)
 import copy, logging
 log = logging.getLogger(__name__)
 
+from decimal import Decimal
+
+def _as_decimal(value):
+    """Aggregated values may be returned as float by some database backends (i.e: sqlite)."""
+    if value is None:
+        return Decimal(0)
+    if isinstance(value, float):
+        return Decimal(str(value))
+    return Decimal(value)
+
 #-------------------------------------------------------------------------------
 # Some stuff needed for translation
 
@@ -106,11 +120,12 @@ class GASSupplierOrder(models.Model, PermissionResource):
     """
 
     pact = models.ForeignKey(GASSupplierSolidalPact, related_name="order_set",verbose_name=_('pact'))
+    # Indexed: due orders are retrieved by the order scheduler (see ``gas.scheduler``)
     datetime_start = models.DateTimeField(verbose_name=_('date open'),
-        default=datetime.now, help_text=_("when the order will be opened")
+        default=datetime.now, help_text=_("when the order will be opened"), db_index=True
     )
     datetime_end = models.DateTimeField(verbose_name=_('date close'),
-        help_text=_("when the order will be closed"), null=True, blank=True
+        help_text=_("when the order will be closed"), null=True, blank=True, db_index=True
     )
     # minimum economic amount for the GASSupplierOrder to be accepted by the Supplier
     order_minimum_amount = CurrencyField(verbose_name=_('Minimum amount'),
@@ -164,6 +179,13 @@ class GASSupplierOrder(models.Model, PermissionResource):
     root_plan = models.ForeignKey('GASSupplierOrder', null=True, blank=True, default=None,
         help_text=_("Order was generated by another order"), verbose_name=_("planned order"))
 
+    # Name of the current workflow state. It is kept in sync with workflow
+    # by a `StateObjectRelation` post_save signal handler (see gas.models)
+    # and it is used to filter orders by state with an indexed query.
+    current_state_name = models.CharField(max_length=100, blank=True, db_index=True,
+        editable=False, verbose_name=_("current state")
+    )
+
     objects = OrderManager()
 
     history = HistoricalRecords()
@@ -294,8 +316,12 @@ class GASSupplierOrder(models.Model, PermissionResource):
         }
 
     def do_transition(self, transition, user):
-        super(GASSupplierOrder, self).do_transition(transition, user)
-        if self.is_active():
+        if super(GASSupplierOrder, self).do_transition(transition, user):
+            # Database is updated by signal handler, update this instance too
+            self.current_state_name = transition.destination.name
+        else:
+            self.current_state_name = self.current_state.name
+        if self.current_state_name == STATUS_OPEN:
             log.debug("Order %d OPENED by transition=%s: settings default gasstock set" % (
                 self.pk, transition.name
             ))
@@ -310,17 +336,30 @@ class GASSupplierOrder(models.Model, PermissionResource):
 
         if self.datetime_start <= datetime.now():
 
-            # Act as superuser
-            user = User.objects.get(username=settings.INIT_OPTIONS['su_username'])
-            t_name = TRANSITION_OPEN
-            t = Transition.objects.get(name__iexact=t_name, workflow=self.workflow)
+            if self.do_system_transition(TRANSITION_OPEN):
+                log.debug("Done %s transition. datetime_start is %s" % (TRANSITION_OPEN, self.datetime_start))
+
+                #TODO Send email will be done with notice_days_before_order_close
 
-            if t in get_allowed_transitions(self, user):
-                log.debug("Do %s transition. datetime_start is %s" % (t, self.datetime_start))
+    def do_system_transition(self, t_name):
+        """Do transition named ``t_name`` acting as the system user, if it is allowed.
 
-                self.do_transition(t, user)
+        Transitions and the system user are taken from ``workflow_cache``:
+        the system user is a DES administrator (see `init_superuser`), so only
+        transitions of the current state are checked, without role lookups.
 
-                #TODO Send email will be done with notice_days_before_order_close
+        Return True if the transition has been done.
+        """
+        state = workflow_cache.get_state(self)
+        if state is None:
+            return False
+
+        user = workflow_cache.get_system_user()
+        t = workflow_cache.get_transition(state.workflow_id, t_name)
+        if t in workflow_cache.get_allowed_transitions(self, user, state):
+            self.do_transition(t, user)
+            return True
+        return False
 
     def get_absolute_url_order_page_for_user(self, user):
 
@@ -345,15 +384,7 @@ class GASSupplierOrder(models.Model, PermissionResource):
             return
 
         # Act as superuser
-        user = User.objects.get(username=settings.INIT_OPTIONS['su_username'])
-        t_name = TRANSITION_CLOSE
-        t = Transition.objects.get(name__iexact=t_name, workflow=self.workflow)
-
-        if t in get_allowed_transitions(self, user):
-            self.do_transition(t, user)
-            return True
-        else:
-            return False
+        return self.do_system_transition(TRANSITION_CLOSE)
 
     def close_if_needed(self, force_email=False, issuer=None):
         """Check for datetime_end and close order if needed. if GAS is running"""
@@ -392,7 +423,13 @@ class GASSupplierOrder(models.Model, PermissionResource):
 
                         cc_people = self.pact.referrers_people | cc_intergas_people
                         cc = map(lambda x : x.preferred_email_address, cc_people)
-                        self.send_email_to_supplier(cc, ugettext('Automatic send on close'))
+
+                        # Report rendering and email sending are done 
+                        # by `run_order_jobs` management command
+                        from gasistafelice.gas.models.job import OrderJob
+                        OrderJob.objects.enqueue(self, OrderJob.SEND_EMAIL_TO_SUPPLIER,
+                            issued_by=issuer, cc=cc, more_info=ugettext('Automatic send on close')
+                        )
 
     def get_valid_name(self):
         from django.template.defaultfilters import slugify
@@ -615,7 +652,7 @@ class GASSupplierOrder(models.Model, PermissionResource):
     def forward(self, user):
         """Apply default transition"""
         state = get_state(self)
-        transition = DefaultTransition.objects.get(workflow=self.workflow, state=state).transition
+        transition = workflow_cache.get_default_transition(state)
         do_transition(self, transition, user)
 
     # -- Resource API --#
@@ -734,51 +771,46 @@ WHERE order_id = %s \
         member_orders = GASMemberOrder.objects.filter(ordered_product__order=self)
         return member_orders
 
+    def _get_total(self, name):
+        """Return total ``name`` as computed by ``OrderQuerySet.with_totals``.
+
+        If this order has been annotated (by ``GASSupplierOrder.objects.with_totals()``
+        or ``GASSupplierOrder.objects.annotate_totals()``) do not hit the database.
+        """
+        if not hasattr(self, name):
+            return self.totals[name]
+        return _as_decimal(getattr(self, name))
+
+    @property
+    def totals(self):
+        """Return a dict of all totals of this order, computed by a single query."""
+
+        rows = GASSupplierOrder.objects.filter(pk=self.pk).with_totals().values(*ORDER_TOTALS_NAMES)
+        row = rows[0]
+        return dict((name, _as_decimal(row[name])) for name in ORDER_TOTALS_NAMES)
+
     @property
     def total_amount(self):
         """
         The total expense for this order, as resulting from the invoice.
         """
-        amount = 0
-        for order_product in self.orderable_products:
-            price = order_product.delivered_price
-            quantity = order_product.delivered_amount
-            amount += price * quantity
-        return amount
+        return self._get_total('agg_total_amount')
 
     @property
     def tot_price(self):
-        tot = 0
-        for gmo in self.ordered_products:
-            tot += gmo.price_expected
-        return tot
+        return self._get_total('agg_tot_price')
 
     @property
     def tot_amount(self):
-        tot = 0
-        if self.ordered_products:
-            from django.db.models import Count, Sum
-            qry = self.ordered_products.values('purchaser').annotate(sum_qta = Sum('ordered_amount')).order_by('purchaser').filter( is_confirmed = True)
-            for agg_gmo in qry:
-                tot += agg_gmo.sum_qta
-        return tot
+        return self._get_total('agg_tot_amount')
 
     @property
     def tot_gasmembers(self):
-        tot = 0
-        if self.ordered_products:
-            from django.db.models import Count, Sum
-            qry = self.ordered_products.values('purchaser').annotate(sum_qta = Sum('ordered_amount')).order_by('purchaser').filter( is_confirmed = True)
-            tot = qry.count()
-        return tot
+        return int(self._get_total('agg_tot_gasmembers'))
 
     @property
     def tot_curtail(self):
-        tot = 0
-        accounted_amounts = self.gas.accounting.accounted_amount_by_gas_member(self)
-        for member in accounted_amounts:
-            tot += (member.accounted_amount or 0)
-        return tot
+        return self.gas.accounting.tot_accounted_amount(self)
 
     @property
     def payment(self):
@@ -797,30 +829,21 @@ WHERE order_id = %s \
             return
 
         # 2/3 control members curtails
-        accounted_amounts = self.gas.accounting.accounted_amount_by_gas_member(self)
+        accounted_amounts = self.gas.accounting.accounted_amounts(self)
 
         if not len(accounted_amounts):
             return
 
-        purchasers = self.purchasers
-        c_purch = purchasers.count()
-        l_accounted = len(accounted_amounts)
+        #LF: we have to check "number of accounted amounts among purchasers"
+        #LF: in fact there may be new added families that need the following check.
+        #LF: keep in mind that if a gasmember places an order,
+        #LF: there must be a transaction even if it is of 0 cash amount
+        purchaser_pks = GASMember.objects.filter(
+            pk__in=self.member_orders.values('purchaser')
+        ).values_list('pk', flat=True)
 
-        if c_purch > l_accounted:
-            # LF: leave this check here, is faster than the next "fine tune check"
+        if not set(purchaser_pks) <= set(accounted_amounts.keys()):
             return
-        else:
-            #LF: we have to check "number of accounted amounts among purchasers"
-            #LF: in fact there may be new added families that need the following check.
-            #LF: keep in mind that if a gasmember places an order,
-            #LF: there must be a transaction even if it is of 0 cash amount
-
-            n_added_families = 0
-            for gm in accounted_amounts:
-                if gm not in purchasers:
-                    n_added_families += 1
-                    if c_purch > (l_accounted - n_added_families):
-                        return
 
         # 3/3 control accounting payment to supplier
         tx = self.gas.accounting.get_supplier_order_transaction(self)
@@ -832,10 +855,7 @@ WHERE order_id = %s \
             t_name = TRANSITION_UNPAID
 
         # Act as superuser
-        user = User.objects.get(username=settings.INIT_OPTIONS['su_username'])
-        t = Transition.objects.get(name__iexact=t_name, workflow=self.workflow)
-        if t in get_allowed_transitions(self, user):
-            self.do_transition(t, user)
+        self.do_system_transition(t_name)
 
 
     @property
@@ -874,6 +894,11 @@ WHERE order_id = %s \
                     w.save()
                     self.withdrawal = w
 
+        else:
+            # Do not overwrite state with a stale value
+            state = self.current_state
+            self.current_state_name = state.name if state else ''
+
         super(GASSupplierOrder, self).save(*args, **kw)
 
         #KO: 20111212 02:00 prepare reccurent plan for order.
@@ -1041,9 +1066,7 @@ WHERE order_id = %s \
                     'application/pdf'
                 )
 
-        email.send()
-
-        return
+        return send_messages([email], fail_silently=False)
 
     def send_email_to_supplier(self, cc=[], more_info='', issued_by=None):
         supplier_email = self.supplier.preferred_email_address
@@ -1060,7 +1083,7 @@ WHERE order_id = %s \
     def render_as_html(self, requested_by=None):
 
         if not requested_by:
-            requested_by = User.objects.get(username=settings.INIT_OPTIONS['su_username'])
+            requested_by = workflow_cache.get_system_user()
 
         orderables_aggregate = self.orderable_products.filter(
             gasmember_order_set__ordered_amount__gt=0
@@ -1096,7 +1119,15 @@ WHERE order_id = %s \
         return html
 
     def get_pdf_data(self, requested_by=None):
-        """Return PDF raw content to be rendered somewhere (email, or http)"""
+        """Return PDF raw content to be rendered somewhere (email, or http)
+
+        Content is cached until something in the order changes (see `gas.report_cache`)
+        """
+        return report_cache.get_or_render([self], 'pdf', requested_by,
+            lambda : self._render_pdf_data(requested_by=requested_by)
+        )
+
+    def _render_pdf_data(self, requested_by=None):
 
         html = self.render_as_html(requested_by=requested_by)
         result = StringIO.StringIO()
@@ -1112,7 +1143,9 @@ WHERE order_id = %s \
     def get_html_data(self, requested_by=None):
         """Return HTML raw content to be rendered somewhere (email, or http)"""
 
-        html = self.render_as_html(requested_by=requested_by)
+        html = report_cache.get_or_render([self], 'html', requested_by,
+            lambda : self.render_as_html(requested_by=requested_by)
+        )
 
         result = StringIO.StringIO(html.encode("utf-8", "ignore"))
         if html:
@@ -1138,6 +1171,12 @@ WHERE order_id = %s \
         nProducts = 0
         tot_Ord = 0
 
+        # Retrieve in the same query everything needed to render a row
+        querySet = querySet.select_related('purchaser__person',
+            'ordered_product__gasstock__stock__product__pu',
+            'ordered_product__gasstock__stock__product__mu',
+        )
+
         for el in querySet:
             rowFam = el.purchaser.pk
             if actualFamily == -1 or actualFamily != rowFam:
@@ -1183,18 +1222,44 @@ WHERE order_id = %s \
     def __get_pdfrecords_products(self, querySet):
         """Return records of rendered table fields."""
 
+        from django.db.models import Count, Sum
+
         records = []
-        c = querySet.count()
 
-        for el in querySet:
-            if el.tot_price > 0:
+        # Retrieve in the same query everything needed to render a row
+        gsops = list(querySet.select_related('gasstock__pact',
+            'gasstock__stock__product__pu',
+            'gasstock__stock__product__mu',
+        ))
+
+        # Compute totals for all products with grouped queries.
+        # They are the same of GASSupplierOrderProduct tot_amount, tot_gasmembers and tot_price
+        gmos = GASMemberOrder.objects.filter(
+            ordered_product__in=[el.pk for el in gsops]
+        )
+        totals_d = dict((row['ordered_product'], row) for row in 
+            gmos.values('ordered_product').annotate(
+                tot_amount=Sum('ordered_amount'), tot_gasmembers=Count('pk')
+            ).order_by()
+        )
+        #NOTE: see GASMemberOrder.price_expected
+        priced_amounts_d = dict(
+            gmos.exclude(withdrawn_amount=FAKE_WITHDRAWN_AMOUNT).values('ordered_product').annotate(
+                amount=Sum('ordered_amount')
+            ).order_by().values_list('ordered_product', 'amount')
+        )
+
+        for el in gsops:
+            tot_price = el.order_price * (priced_amounts_d.get(el.pk) or 0)
+            if tot_price > 0:
+                totals = totals_d[el.pk]
                 records.append({
                    'product' : el.gasstock,
                    'rep_price' : el.gasstock.report_price,
                    'price' : el.order_price,
-                   'tot_gasmembers' : el.tot_gasmembers,
-                   'tot_amount' : el.tot_amount,
-                   'tot_price' : el.tot_price,
+                   'tot_gasmembers' : totals['tot_gasmembers'],
+                   'tot_amount' : totals['tot_amount'],
+                   'tot_price' : tot_price,
                 })
         return records
 
@@ -1357,10 +1422,18 @@ WHERE order_id = %s \
 
 
     def get_intergas_pdf_data(self, requested_by=None):
-        """Return PDF raw content to be rendered somewhere (email, or http)"""
+        """Return PDF raw content to be rendered somewhere (email, or http)
+
+        Content is cached until something in one of InterGAS orders changes
+        """
+        return report_cache.get_or_render(self.get_intergas_orders(), 'intergas_pdf', requested_by,
+            lambda : self._render_intergas_pdf_data(requested_by=requested_by)
+        )
+
+    def _render_intergas_pdf_data(self, requested_by=None):
 
         if not requested_by:
-            requested_by = User.objects.get(username=settings.INIT_OPTIONS['su_username'])
+            requested_by = workflow_cache.get_system_user()
 
         #print "order_list: %s" % self.get_intergas_orders()
         orderables_aggregate = GASSupplierOrderProduct.objects.none()
@@ -1487,6 +1560,8 @@ class GASSupplierOrderProduct(models.Model, PermissionResource):
                         max_digits=8, decimal_places=2
     )
 
+    objects = OrderProductManager()
+
     history = HistoricalRecords()
 
     class Meta:
@@ -1753,7 +1828,7 @@ class GASMemberOrder(models.Model, PermissionResource):
     def forward(self, user):
         """Apply default transition"""
         state = get_state(self)
-        transition = DefaultTransition.objects.get(workflow=self.workflow, state=state).transition
+        transition = workflow_cache.get_default_transition(state)
         do_transition(self, transition, user)
 
     def save(self, *args, **kw):
@@ -0,0 +1,263 @@
+"""Set-based propagation of supplier stock changes to GAS orders.
+
+A change of price or availability of a ``SupplierStock`` has to be reflected in:
+
+* ``GASSupplierStock.enabled`` of every GAS which has a pact with the supplier,
+* ``GASSupplierOrderProduct`` of open orders (price updated, product added or removed),
+* ``GASMemberOrder`` of open orders (erased when a product is no more available).
+
+``apply_stock_changes`` applies a whole batch of changes with a fixed number of
+UPDATE/INSERT/DELETE statements (chunked by ``lib.bulk.CHUNK_SIZE`` stocks), and sends
+aggregated signals instead of one signal per changed object:
+
+* ``gasmember_products_update`` once for every GAS member whose basket changed,
+* ``gas_products_availability_update`` once for every GAS whose products changed.
+
+``propagate_gasstock_changes`` does the same for products enabled or disabled
+by a GAS (``GASSupplierStock.enabled``).
+
+Bulk statements do not send ``post_save`` signals (so they are not
+recorded in history), caches are explicitly invalidated here.
+"""
+
+from django.db import connection, transaction
+
+from gasistafelice.lib import request_cache
+from gasistafelice.lib.bulk import chunks as _chunks, update_by_pk
+from gasistafelice.gas import signals, report_cache
+from gasistafelice.gdxp import catalog_cache
+
+import logging
+log = logging.getLogger(__name__)
+
+def add_products_to_open_orders(gasstock_pks):
+    """Add products of enabled ``GASSupplierStock``s to open orders of their pacts.
+
+    Products already in an order are skipped. Do it with one INSERT ... SELECT for each chunk.
+    Prices are the ones of ``GASSupplierStock.price`` (discounted by the pact)
+    and are initialized as ``GASSupplierOrderProduct.save`` does.
+    """
+    from gasistafelice.supplier.models import SupplierStock
+    from gasistafelice.gas.models import GASSupplierStock, GASSupplierSolidalPact, \
+        GASSupplierOrder, GASSupplierOrderProduct
+
+    qn = connection.ops.quote_name
+    col = lambda model, name: qn(model._meta.get_field(name).column)
+    gsop_table = qn(GASSupplierOrderProduct._meta.db_table)
+    cursor = connection.cursor()
+    # as GASSupplierStock.price: stock price updated by the pact agreements
+    gas_price = "ss.%(price)s * (1 - COALESCE(pact.%(percent)s, 0))" % {
+        'price' : col(SupplierStock, 'price'),
+        'percent' : col(GASSupplierSolidalPact, 'order_price_percent_update'),
+    }
+    for pks in _chunks(gasstock_pks):
+        sql = """INSERT INTO %(gsop)s (%(gsop_order)s, %(gsop_gasstock)s, %(initial_price)s, %(order_price)s, %(delivered_price)s)
+            SELECT o.%(o_pk)s, gss.%(gss_pk)s, %(gas_price)s, %(gas_price)s, %(gas_price)s
+            FROM %(order)s o
+            INNER JOIN %(pact)s pact ON pact.%(pact_pk)s = o.%(o_pact)s
+            INNER JOIN %(gss)s gss ON gss.%(gss_pact)s = o.%(o_pact)s
+            INNER JOIN %(ss)s ss ON ss.%(ss_pk)s = gss.%(gss_stock)s
+            WHERE o.%(o_state)s = %%s AND gss.%(gss_pk)s IN (%(in)s)
+            AND NOT EXISTS (SELECT 1 FROM %(gsop)s p
+                WHERE p.%(gsop_order)s = o.%(o_pk)s AND p.%(gsop_gasstock)s = gss.%(gss_pk)s
+            )""" % {
+            'gsop' : gsop_table,
+            'gsop_order' : col(GASSupplierOrderProduct, 'order'),
+            'gsop_gasstock' : col(GASSupplierOrderProduct, 'gasstock'),
+            'initial_price' : col(GASSupplierOrderProduct, 'initial_price'),
+            'order_price' : col(GASSupplierOrderProduct, 'order_price'),
+            'delivered_price' : col(GASSupplierOrderProduct, 'delivered_price'),
+            'order' : qn(GASSupplierOrder._meta.db_table),
+            'o_pk' : qn(GASSupplierOrder._meta.pk.column),
+            'o_pact' : col(GASSupplierOrder, 'pact'),
+            'pact' : qn(GASSupplierSolidalPact._meta.db_table),
+            'pact_pk' : qn(GASSupplierSolidalPact._meta.pk.column),
+            'gas_price' : gas_price,
+            'o_state' : col(GASSupplierOrder, 'current_state_name'),
+            'gss' : qn(GASSupplierStock._meta.db_table),
+            'gss_pk' : qn(GASSupplierStock._meta.pk.column),
+            'gss_pact' : col(GASSupplierStock, 'pact'),
+            'gss_stock' : col(GASSupplierStock, 'stock'),
+            'ss' : qn(SupplierStock._meta.db_table),
+            'ss_pk' : qn(SupplierStock._meta.pk.column),
+            'price' : col(SupplierStock, 'price'),
+            'in' : ", ".join(["%s"] * len(pks)),
+        }
+        cursor.execute(sql, ['Open'] + pks)
+    transaction.commit_unless_managed()
+
+def _switch_gasstocks(to_enable, to_disable, order_pks):
+    """Enable ``to_enable`` and disable ``to_disable`` ``GASSupplierStock``s.
+
+    Their products are added to or removed from open orders, primary keys of
+    affected orders are added to ``order_pks``.
+
+    Return member orders erased from open orders.
+    """
+    from gasistafelice.gas.models import GASSupplierStock, \
+        GASSupplierOrder, GASSupplierOrderProduct, GASMemberOrder
+
+    open_orders = GASSupplierOrder.objects.open()
+    erased_gmos = []
+
+    for pks in _chunks([gss.pk for gss in to_enable]):
+        GASSupplierStock.objects.filter(pk__in=pks).update(enabled=True)
+        order_pks.update(open_orders.filter(pact__gasstock_set__in=pks).values_list('pk', flat=True))
+        add_products_to_open_orders(pks)
+
+    for pks in _chunks([gss.pk for gss in to_disable]):
+        GASSupplierStock.objects.filter(pk__in=pks).update(enabled=False)
+        gsops = GASSupplierOrderProduct.objects.filter(order__in=open_orders, gasstock__in=pks)
+        order_pks.update(gsops.values_list('order', flat=True))
+        gmos = GASMemberOrder.objects.filter(ordered_product__in=gsops)
+        # retrieve before deletion: erased member orders are notified
+        erased_gmos.extend(gmos.select_related('purchaser', 'ordered_product__order',
+            'ordered_product__gasstock__stock__product'
+        ))
+        gmos.delete()
+        gsops.delete()
+
+    return erased_gmos
+
+def _send_gasmember_updates(updated_gmos, erased_gmos):
+    """Send ``gasmember_products_update`` once for every GAS member involved."""
+
+    by_gasmember = {}
+    for gmo in updated_gmos:
+        by_gasmember.setdefault(gmo.purchaser, ([], []))[0].append(gmo)
+    for gmo in erased_gmos:
+        by_gasmember.setdefault(gmo.purchaser, ([], []))[1].append(gmo)
+
+    for gm, (updated, erased) in by_gasmember.items():
+        signals.gasmember_products_update.send(sender=gm, updated=updated, erased=erased)
+
+def propagate_stock_changes(changes):
+    """Apply a batch of ``changes`` to supplier stocks and propagate them to GAS orders.
+
+    Statements are executed in the current transaction: use ``apply_stock_changes``
+    to commit them on success.
+
+    ``changes`` maps a ``SupplierStock`` primary key to a dictionary
+    with the new ``price`` and/or ``amount_available`` values.
+
+    Return the set of primary keys of stocks which have actually changed.
+    """
+    from django.db.models import F
+    from gasistafelice.supplier.models import SupplierStock
+    from gasistafelice.gas.models import GAS, GASSupplierStock, \
+        GASSupplierOrder, GASSupplierOrderProduct, GASMemberOrder
+
+    new_prices, new_amounts = {}, {}
+    available_pks, unavailable_pks = [], []
+    for pk, price, amount in SupplierStock.objects.filter(
+        pk__in=changes.keys()).values_list('pk', 'price', 'amount_available'):
+
+        values = changes[pk]
+        if 'price' in values and values['price'] != price:
+            new_prices[pk] = values['price']
+        if 'amount_available' in values and values['amount_available'] != amount:
+            new_amounts[pk] = values['amount_available']
+            if values['amount_available']:
+                available_pks.append(pk)
+            else:
+                unavailable_pks.append(pk)
+
+    if not (new_prices or new_amounts):
+        return set()
+
+    log.debug("Propagating changes: %d prices, %d availabilities" % (len(new_prices), len(new_amounts)))
+
+    open_orders = GASSupplierOrder.objects.open()
+    updated_gmos = []
+    gas_enabled, gas_disabled = {}, {}
+    order_pks = set()
+
+    update_by_pk(SupplierStock, 'price', new_prices)
+    update_by_pk(SupplierStock, 'amount_available', new_amounts)
+
+    #--- Availability ---#
+
+    to_enable = list(GASSupplierStock.objects.filter(stock__in=available_pks, enabled=False
+        ).select_related('pact', 'stock__product'))
+    to_disable = list(GASSupplierStock.objects.filter(stock__in=unavailable_pks, enabled=True
+        ).select_related('pact', 'stock__product'))
+
+    for gss in to_enable:
+        gas_enabled.setdefault(gss.pact.gas_id, []).append(gss)
+    for gss in to_disable:
+        gas_disabled.setdefault(gss.pact.gas_id, []).append(gss)
+
+    erased_gmos = _switch_gasstocks(to_enable, to_disable, order_pks)
+
+    #--- Price ---#
+
+    gsop_prices = {}
+    for pks in _chunks(new_prices.keys()):
+        for gsop_pk, order_pk, stock_pk in GASSupplierOrderProduct.objects.filter(
+            order__in=open_orders, gasstock__stock__in=pks
+        ).values_list('pk', 'order', 'gasstock__stock'):
+            gsop_prices[gsop_pk] = new_prices[stock_pk]
+            order_pks.add(order_pk)
+
+    update_by_pk(GASSupplierOrderProduct, 'order_price', gsop_prices)
+
+    for pks in _chunks(gsop_prices.keys()):
+        updated_gmos.extend(GASMemberOrder.objects.filter(ordered_product__in=pks
+            ).exclude(ordered_price=F('ordered_product__order_price')
+            ).select_related('purchaser', 'ordered_product__order',
+                'ordered_product__gasstock__stock__product'
+        ))
+
+    report_cache.invalidate(order_pks)
+    catalog_cache.invalidate(SupplierStock.objects.filter(
+        pk__in=set(new_prices.keys()) | set(new_amounts.keys())
+    ).values_list('supplier', flat=True).distinct())
+    request_cache.invalidate()
+
+    #--- Aggregated notifications ---#
+
+    _send_gasmember_updates(updated_gmos, erased_gmos)
+
+    for gas in GAS.objects.filter(pk__in=set(gas_enabled.keys()) | set(gas_disabled.keys())):
+        signals.gas_products_availability_update.send(sender=gas,
+            enabled=gas_enabled.get(gas.pk, []),
+            disabled=gas_disabled.get(gas.pk, [])
+        )
+
+    return set(new_prices.keys()) | set(new_amounts.keys())
+
+apply_stock_changes = transaction.commit_on_success(propagate_stock_changes)
+
+def propagate_gasstock_changes(changes):
+    """Apply a batch of ``changes`` to GAS supplier stocks and propagate them to open orders.
+
+    Statements are executed in the current transaction.
+
+    ``changes`` maps a ``GASSupplierStock`` primary key to its new ``enabled`` value.
+
+    Return the set of primary keys of GAS supplier stocks which have actually changed.
+    """
+    from gasistafelice.gas.models import GASSupplierStock
+
+    to_enable, to_disable = [], []
+    for pks in _chunks(changes.keys()):
+        for gss in GASSupplierStock.objects.filter(pk__in=pks).select_related('pact', 'stock__product'):
+            if changes[gss.pk] and not gss.enabled:
+                to_enable.append(gss)
+            elif not changes[gss.pk] and gss.enabled:
+                to_disable.append(gss)
+
+    if not (to_enable or to_disable):
+        return set()
+
+    log.debug("Propagating changes: %d GAS stocks enabled, %d disabled" % (len(to_enable), len(to_disable)))
+
+    order_pks = set()
+    erased_gmos = _switch_gasstocks(to_enable, to_disable, order_pks)
+
+    report_cache.invalidate(order_pks)
+    request_cache.invalidate()
+
+    _send_gasmember_updates([], erased_gmos)
+
+    return set([gss.pk for gss in to_enable + to_disable])
@@ -1,8 +1,79 @@
+from django.db.models import Min
 from django.db.models.query import QuerySet
+from django.utils.datastructures import SortedDict
 from datetime import date
 
-from django.contrib.contenttypes.models import ContentType  
-from workflows.models import StateObjectRelation
+from gasistafelice.consts import FAKE_WITHDRAWN_AMOUNT
+from gasistafelice.gas.workflow_data import STATUS_ARCHIVED
+
+#-------------------------------------------------------------------------------
+# Order totals computed by the database.
+#
+# Each total is a correlated subquery on the order table, so that a whole
+# queryset of orders can be annotated in a single SQL statement.
+# Tuples are: (extra select name, SQL, SQL params)
+
+ORDER_TOTALS_SQL = (
+
+    # expected price: ordered amounts at order price (see GASMemberOrder.price_expected)
+    ('agg_tot_price', "SELECT COALESCE(SUM(gsop.order_price * gmo.ordered_amount), 0) \
+FROM gas_gasmemberorder AS gmo \
+INNER JOIN gas_gassupplierorderproduct AS gsop ON gmo.ordered_product_id = gsop.id \
+WHERE gsop.order_id = %(order_table)s.id \
+AND (gmo.withdrawn_amount IS NULL OR gmo.withdrawn_amount <> %%s)", [FAKE_WITHDRAWN_AMOUNT]),
+
+    # invoiced price: delivered amounts at delivered price
+    ('agg_total_amount', "SELECT COALESCE(SUM(gsop.delivered_price * gsop.delivered_amount), 0) \
+FROM gas_gassupplierorderproduct AS gsop \
+WHERE gsop.order_id = %(order_table)s.id", []),
+
+    # confirmed ordered amount
+    ('agg_tot_amount', "SELECT COALESCE(SUM(gmo.ordered_amount), 0) \
+FROM gas_gasmemberorder AS gmo \
+INNER JOIN gas_gassupplierorderproduct AS gsop ON gmo.ordered_product_id = gsop.id \
+WHERE gsop.order_id = %(order_table)s.id AND gmo.is_confirmed = %%s", [True]),
+
+    # number of GAS members with confirmed orders
+    ('agg_tot_gasmembers', "SELECT COUNT(DISTINCT gmo.purchaser_id) \
+FROM gas_gasmemberorder AS gmo \
+INNER JOIN gas_gassupplierorderproduct AS gsop ON gmo.ordered_product_id = gsop.id \
+WHERE gsop.order_id = %(order_table)s.id AND gmo.is_confirmed = %%s", [True]),
+)
+
+ORDER_TOTALS_NAMES = [name for name, sql, params in ORDER_TOTALS_SQL]
+
+# Number of archived orders of a GAS: it measures GAS activity
+GAS_ARCHIVED_ORDERS_SQL = "SELECT COUNT(*) \
+FROM gas_gassupplierorder AS gso \
+INNER JOIN gas_gassuppliersolidalpact AS pact ON gso.pact_id = pact.id \
+WHERE pact.gas_id = gas_gas.id AND gso.current_state_name = %s"
+
+# Order placed by a GAS member for an ordered product.
+#
+# Django cannot LEFT JOIN a reverse relation restricted to one purchaser:
+# every field is a correlated subquery on the unique (ordered_product, purchaser)
+# pair, NULL if the GAS member has not ordered the product.
+
+MEMBER_ORDER_SQL = "SELECT gmo.%(column)s \
+FROM gas_gasmemberorder AS gmo \
+WHERE gmo.ordered_product_id = gas_gassupplierorderproduct.id AND gmo.purchaser_id = %%s"
+
+MEMBER_ORDER_FIELDS = ('id', 'ordered_amount', 'note')
+
+#-------------------------------------------------------------------------------
+
+class GASQuerySet(QuerySet):
+
+    def with_archived_orders_count(self):
+        """Annotate each GAS with the number of its archived orders (`n_archived_orders`)."""
+        return self.extra(
+            select=SortedDict([('n_archived_orders', GAS_ARCHIVED_ORDERS_SQL)]),
+            select_params=[STATUS_ARCHIVED]
+        )
+
+    def ranked_by_activity(self):
+        """Return GAS ordered by number of archived orders, most active first."""
+        return self.with_archived_orders_count().order_by('-n_archived_orders', '-birthday', 'pk')
 
 class GASMemberQuerySet(QuerySet):
     # TODO: refactor here some GASMemberManager objects
@@ -17,11 +88,11 @@ class OrderQuerySet(QuerySet):
         Note that is not the same as retrieving every ``GASSupplierOrder`` having a given state,
         since different model instances may be associated to different workflows, and states belonging to 
         different workflows are different even if they are named the same way.          
+
+        State name is read from the denormalized (and indexed) ``current_state_name`` field.
+        If it is not in sync with workflow state run ``manage.py order_sync_state``.
         """
-        order_ct = ContentType.objects.get_for_model(self.model)
-        sors = StateObjectRelation.objects.filter(content_type=order_ct, state__name=name)
-        orders = self.filter(pk__in=[sor.content_id for sor in sors])
-        return orders
+        return self.filter(current_state_name=name)
     
     def prepared(self):
         return self.get_by_state('Prepared')
@@ -45,13 +116,94 @@ class OrderQuerySet(QuerySet):
         return self.get_by_state('Delivered')
     
     def archived(self):
-        return self.get_by_state('Archived')
+        return self.get_by_state(STATUS_ARCHIVED)
     
     def canceled(self):
         return self.get_by_state('Canceled')
+
+    def _not_suspended(self):
+        return self.exclude(pact__gas__config__is_suspended=True)
+
+    def due_to_open(self, now):
+        """Return prepared orders of running GASs whose ``datetime_start`` is not after ``now``."""
+        return self.prepared()._not_suspended().filter(datetime_start__lte=now
+            ).order_by('datetime_start', 'pk')
+
+    def due_to_close(self, now):
+        """Return open orders of running GASs whose ``datetime_end`` is not after ``now``."""
+        return self.open()._not_suspended().filter(datetime_end__lte=now
+            ).order_by('datetime_end', 'pk')
+
+    def next_event_on(self):
+        """
+        Return when the next order of a running GAS has to be opened or closed.
+
+        Both lookups are answered by indexes on ``current_state_name``,
+        ``datetime_start`` and ``datetime_end``. Return None if nothing is scheduled.
+        """
+        dates = [
+            self.prepared()._not_suspended().aggregate(next=Min('datetime_start'))['next'],
+            self.open()._not_suspended().aggregate(next=Min('datetime_end'))['next'],
+        ]
+        dates = filter(None, dates)
+        if dates:
+            return min(dates)
+        return None
+
+    def with_totals(self):
+        """
+        Return a QuerySet whose ``GASSupplierOrder``s are annotated with their totals.
+
+        Totals (see ``ORDER_TOTALS_SQL``) are computed by the database 
+        in the same query that retrieves orders and are then used by
+        ``tot_price``, ``total_amount``, ``tot_amount`` and ``tot_gasmembers``
+        properties without hitting the database again.
+        """
+        order_table = self.model._meta.db_table
+        select = SortedDict()
+        select_params = []
+        for name, sql, params in ORDER_TOTALS_SQL:
+            select[name] = sql % { 'order_table' : order_table }
+            select_params += params
+        return self.extra(select=select, select_params=select_params)
+
+    def annotate_totals(self, orders):
+        """
+        Annotate an iterable of ``GASSupplierOrder``s with their totals.
+
+        Useful when orders are not retrieved by a QuerySet (i.e: lists): 
+        all totals are computed with a single query.
+        Return the list of annotated orders.
+        """
+        orders = list(orders)
+        if orders:
+            rows = self.filter(pk__in=[o.pk for o in orders]).with_totals().values('pk', *ORDER_TOTALS_NAMES)
+            totals_d = dict((row['pk'], row) for row in rows)
+            for order in orders:
+                row = totals_d.get(order.pk, {})
+                for name in ORDER_TOTALS_NAMES:
+                    setattr(order, name, row.get(name, 0))
+        return orders
             
 #-------------------------------------------------------------------------------
 
+class OrderProductQuerySet(QuerySet):
+
+    def with_member_order(self, gasmember):
+        """
+        Return a QuerySet whose ``GASSupplierOrderProduct``s are annotated with the order of ``gasmember``.
+
+        Fields listed in ``MEMBER_ORDER_FIELDS`` of the ``GASMemberOrder`` placed by
+        ``gasmember`` are retrieved in the same query as ``gmo_<field>`` attributes
+        (None if ``gasmember`` has not ordered the product).
+        """
+        select = SortedDict()
+        for name in MEMBER_ORDER_FIELDS:
+            select['gmo_%s' % name] = MEMBER_ORDER_SQL % { 'column' : name }
+        return self.extra(select=select, select_params=[gasmember.pk] * len(select))
+
+#-------------------------------------------------------------------------------
+
 class AppointmentQuerySet(QuerySet):
 
     def future(self):
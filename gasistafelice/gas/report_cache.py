@@ -0,0 +1,81 @@
+"""Cache for rendered order reports (HTML and PDF).
+
+Reports are stored in the cache named ``ORDER_REPORT_CACHE`` in settings
+(falling back to the default cache) with a key computed from:
+
+* the kind of report (i.e: "pdf", "html", "intergas_pdf"),
+* the user who requested it (its name is printed in the report),
+* the version stamp of every order involved in the report.
+
+A version stamp is a random token which is replaced by ``invalidate``
+every time something shown in the report changes
+(see signal handlers connected in ``gasistafelice.gas.models``).
+So a stale report is never served: it becomes unreachable and expires.
+"""
+
+from django.conf import settings
+from django.core.cache import get_cache, InvalidCacheBackendError
+from django.utils.hashcompat import sha_constructor
+
+import uuid
+import logging
+
+log = logging.getLogger(__name__)
+
+VERSION_KEY = "order_report_version:%s"
+REPORT_KEY = "order_report:%s"
+
+def _get_cache():
+    try:
+        return get_cache(getattr(settings, 'ORDER_REPORT_CACHE', 'default'))
+    except InvalidCacheBackendError:
+        return get_cache('default')
+
+def get_versions(order_pks):
+    """Return version stamps for orders identified by ``order_pks``."""
+
+    cache = _get_cache()
+    keys = [VERSION_KEY % pk for pk in order_pks]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # add() does not overwrite a version set by a concurrent request
+            cache.add(key, uuid.uuid4().hex)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+def invalidate(order_pks):
+    """Invalidate reports of orders identified by ``order_pks``."""
+
+    order_pks = set(order_pks)
+    if order_pks:
+        _get_cache().delete_many([VERSION_KEY % pk for pk in order_pks])
+
+def get_key(orders, kind, requested_by=None):
+
+    order_pks = sorted([order.pk for order in orders])
+    stamp = u"%s|%s|%s|%s" % (kind,
+        getattr(requested_by, 'pk', None),
+        ",".join(map(str, order_pks)),
+        ",".join(get_versions(order_pks))
+    )
+    return REPORT_KEY % sha_constructor(stamp).hexdigest()
+
+def get_or_render(orders, kind, requested_by, render):
+    """Return report content for ``orders``.
+
+    If a report is not in the cache, call ``render`` to build it.
+    ``None`` content (i.e: rendering errors) is not cached.
+    """
+
+    cache = _get_cache()
+    key = get_key(orders, kind, requested_by)
+    data = cache.get(key)
+    if data is None:
+        data = render()
+        if data is not None:
+            cache.set(key, data)
+    else:
+        log.debug("Order report %s served from cache" % key)
+    return data
+
@@ -0,0 +1,69 @@
+"""Open and close orders when their ``datetime_start`` and ``datetime_end`` come.
+
+Upcoming events are not swept order by order: ``GASSupplierOrder`` state name and
+dates are indexed, so that due orders (see ``OrderQuerySet.due_to_open`` and
+``OrderQuerySet.due_to_close``) and the time of the next event
+(``OrderQuerySet.next_event_on``) are retrieved with a few cheap queries.
+
+Orders of suspended GASs are not due: they are processed when the GAS is resumed.
+
+``run_due_events`` is called by the `order_scheduler` management command,
+either once (i.e: from cron) or in a loop which sleeps until the next event.
+"""
+
+from datetime import datetime
+
+from gasistafelice.lib.bulk import chunks as _chunks
+
+import logging
+log = logging.getLogger(__name__)
+
+def _process(due, action, batch_size):
+    """Call ``action`` on every order in ``due`` QuerySet, ``batch_size`` orders at a time.
+
+    Return the list of orders whose state has been changed by ``action``.
+    """
+    from gasistafelice.gas.models import GASSupplierOrder
+
+    changed = []
+    # Retrieve keys first: processed orders leave the due QuerySet
+    for pks in _chunks(list(due.values_list('pk', flat=True)), batch_size):
+        orders = GASSupplierOrder.objects.filter(pk__in=pks
+            ).select_related('pact__gas', 'pact__supplier')
+        for order in orders:
+            state_name = order.current_state_name
+            try:
+                action(order)
+            except Exception, e:
+                log.error("Order scheduler: cannot process order %s: %s" % (order.pk, e))
+                continue
+            if order.current_state_name != state_name:
+                changed.append(order)
+    return changed
+
+def run_due_events(now=None, batch_size=None):
+    """Open and close orders whose time has come.
+
+    Return a dictionary with the lists of ``opened`` and ``closed`` orders.
+    """
+    from gasistafelice.gas.models import GASSupplierOrder
+    from gasistafelice.lib.bulk import CHUNK_SIZE
+
+    now = now or datetime.now()
+    batch_size = batch_size or CHUNK_SIZE
+
+    # Sending email is done by order jobs (see `run_order_jobs`)
+    opened = _process(GASSupplierOrder.objects.due_to_open(now),
+        lambda order: order.open_if_needed(True), batch_size
+    )
+    closed = _process(GASSupplierOrder.objects.due_to_close(now),
+        lambda order: order.close_if_needed(), batch_size
+    )
+
+    log.debug("Order scheduler: %d orders opened, %d closed" % (len(opened), len(closed)))
+    return { 'opened' : opened, 'closed' : closed }
+
+def next_event_on():
+    """Return when an order has to be opened or closed next (None if nothing is scheduled)."""
+    from gasistafelice.gas.models import GASSupplierOrder
+    return GASSupplierOrder.objects.next_event_on()
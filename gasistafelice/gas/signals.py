@@ -9,3 +9,7 @@ gmo_product_erased = django.dispatch.Signal(providing_args=[])
 gasstock_product_disabled = django.dispatch.Signal(providing_args=[])
 gasstock_product_enabled = django.dispatch.Signal(providing_args=[])
 
+
+# aggregated notifications sent by `gasistafelice.gas.propagation`
+gasmember_products_update = django.dispatch.Signal(providing_args=["updated", "erased"])
+gas_products_availability_update = django.dispatch.Signal(providing_args=["enabled", "disabled"])
@@ -1,7 +1,9 @@
 from django.test import TestCase
+from django.utils import unittest
 from django.contrib.auth.models import User
 from django.core.management.commands import dumpdata
-from django.test.client import Client
+from django.test.client import Client, RequestFactory
+from django.forms.formsets import formset_factory
 
 from permissions.models import Role
 
@@ -10,16 +12,22 @@ from gasistafelice.base.models import Person, Place
 from gasistafelice.des.management.commands import init_superuser
 
 from gasistafelice.gas.models import GAS, GASMember, GASSupplierStock, GASSupplierSolidalPact,\
-GASMemberOrder, GASSupplierOrder, GASSupplierOrderProduct, Delivery, Withdrawal
+GASMemberOrder, GASSupplierOrder, GASSupplierOrderProduct, Delivery, Withdrawal, OrderJob
 from gasistafelice.gas.managers import GASMemberManager
+from gasistafelice.gas import report_cache, signals
+from gasistafelice.gas.propagation import apply_stock_changes, propagate_gasstock_changes
+from gasistafelice.gas.scheduler import run_due_events
+from gasistafelice.gas.forms.order.gmo import SingleGASMemberOrderForm, BaseGASMemberOrderFormSet
 
 from gasistafelice.supplier.models import Supplier, SupplierStock, Product, ProductCategory, ProductPU
 
 from gasistafelice.consts import * 
+from gasistafelice.base.const import ALWAYS_AVAILABLE
 from flexi_auth.models import ParamRole, Param
+from simple_accounting.models import Account
 from flexi_auth.utils import register_parametric_role
 
-from datetime import time, date, datetime
+from datetime import time, date, datetime, timedelta
 from django.db import IntegrityError
 from decimal import Decimal
 
@@ -135,34 +143,34 @@ class GASDumpTest(TestCase):
     ]
 
     def setUp(self):
-	self.person = Person.objects.get(pk=12)
+        self.person = Person.objects.get(pk=12)
 
     def testPerson(self):
 
-	self.assertEqual(self.person.surname,"Fornitore_gas01")
+        self.assertEqual(self.person.surname,"Fornitore_gas01")
 
         
 class CreatePersonWithViewTest(TestWithClient):
     ''' Check if person is created '''
 
     def setUp(self):
-	super(CreatePersonWithViewTest, self).setUp()
+        super(CreatePersonWithViewTest, self).setUp()
 
     def _do_POST_add_person(self, ajax=False, **kwargs):
 
         response = self._POST(
             #reverse('', args=(,)),
-	    '/gasistafelice/rest/site/1/persons/create',
+            '/gasistafelice/rest/site/1/persons/create',
             ajax,
             **kwargs
         )    
         return response
 
+    @unittest.skip("unfinished")
     def test_create_person(self):
-	self._login()
-
-	r = self._do_POST_add_person(
+        self._login()
 
+        #TODO: r = self._do_POST_add_person(...)
 
 class GASSupplierStockTest(TestCase):
     '''Test behaviour of managed attributes of GASSupplierStock'''
@@ -316,6 +324,435 @@ class GASMemberOrderTest(TestCase):
         return True
 
 
+class GASSupplierOrderTotalsTest(TestCase):
+    '''Test totals of GASSupplierOrder computed by the database'''
+
+    fixtures = ['a_9001_auth.json','b_9001_des.json',
+                'c_9001_sites.json','d_9001_users.json',
+                'e_9001_workflows.json','f_9001_base.json',
+                'g_9001_supplier.json','h_9001_gas.json',
+                'i_9001_simpleaccounting.json'
+    ]
+
+    def setUp(self):
+        self.order = GASSupplierOrder.objects.get(pk=1)
+        self.orderable_product = self.order.orderable_products[0]
+        self.orderable_product.order_price = 100
+        self.orderable_product.save()
+        self.member = self.order.gas.gasmembers[0]
+        self.gmo = GASMemberOrder.objects.get_or_create(purchaser=self.member, ordered_price=self.orderable_product.order_price, ordered_product=self.orderable_product, ordered_amount=2)[0]
+
+    def testTotPrice(self):
+        '''Verify that tot_price is the sum of expected prices of member orders'''
+        expected = sum([gmo.price_expected for gmo in self.order.ordered_products])
+        self.assertEqual(self.order.tot_price, expected)
+
+    def testTotAmountAndGasmembers(self):
+        '''Verify that only confirmed member orders are counted'''
+        self.gmo.is_confirmed = True
+        self.gmo.save()
+        confirmed = self.order.ordered_products.filter(is_confirmed=True)
+        self.assertEqual(self.order.tot_amount, sum([gmo.ordered_amount for gmo in confirmed]))
+        self.assertEqual(self.order.tot_gasmembers, len(set([gmo.purchaser_id for gmo in confirmed])))
+
+    def testAnnotatedTotals(self):
+        '''Verify that annotated orders hold the same totals without other queries'''
+        order = GASSupplierOrder.objects.with_totals().get(pk=self.order.pk)
+        self.assertEqual(order.tot_price, self.order.tot_price)
+        self.assertEqual(order.total_amount, self.order.total_amount)
+        order = GASSupplierOrder.objects.annotate_totals([self.order])[0]
+        self.assertEqual(order.tot_amount, self.order.totals['agg_tot_amount'])
+
+    def testAccountedAmounts(self):
+        '''Verify that accounted amounts are grouped by GAS member'''
+        accounting = self.order.gas.accounting
+        self.assertEqual(accounting.accounted_amounts(self.order), {})
+        accounting.withdraw_from_member_account(self.member, 10, [self.member, self.order], self.order)
+        accounting.withdraw_from_member_account(self.member, 5, [self.member, self.order], self.order)
+        self.assertEqual(accounting.accounted_amounts(self.order), {self.member.pk : 15})
+        self.assertEqual(self.order.tot_curtail, 15)
+        members = accounting.accounted_amount_by_gas_member(self.order)
+        self.assertEqual([(gm.pk, gm.accounted_amount) for gm in members], [(self.member.pk, 15)])
+
+
+class GASActivityRankingTest(TestCase):
+    '''Test ranking of GAS by number of archived orders'''
+
+    fixtures = ['a_9001_auth.json','b_9001_des.json',
+                'c_9001_sites.json','d_9001_users.json',
+                'e_9001_workflows.json','f_9001_base.json',
+                'g_9001_supplier.json','h_9001_gas.json',
+                'i_9001_simpleaccounting.json'
+    ]
+
+    def testRanking(self):
+        '''Verify that GAS with more archived orders comes first'''
+        order = GASSupplierOrder.objects.get(pk=1)
+        GASSupplierOrder.objects.filter(pk=order.pk).update(current_state_name='Archived')
+        ranking = list(GAS.objects.ranked_by_activity())
+        self.assertEqual(ranking[0], order.gas)
+        self.assertEqual(ranking[0].n_archived_orders, order.gas.orders.archived().count())
+        # update() does not send signals
+        GAS.objects.invalidate_activity_ranking()
+        with self.assertNumQueries(2):
+            self.assertEqual(GAS.objects.activity_ranking(), ranking)
+        with self.assertNumQueries(1):
+            GAS.objects.activity_ranking()
+
+
+class OrderJobTest(TestCase):
+    '''Test order jobs queue'''
+
+    fixtures = ['a_9001_auth.json','b_9001_des.json',
+                'c_9001_sites.json','d_9001_users.json',
+                'e_9001_workflows.json','f_9001_base.json',
+                'g_9001_supplier.json','h_9001_gas.json',
+                'i_9001_simpleaccounting.json'
+    ]
+
+    def setUp(self):
+        self.order = GASSupplierOrder.objects.get(pk=1)
+
+    def testEnqueue(self):
+        '''Verify that an enqueued job is runnable and can be acquired only once'''
+        job = OrderJob.objects.enqueue(self.order, OrderJob.SEND_EMAIL, to=['foo@example.com'])
+        self.assertTrue(job in OrderJob.objects.runnable())
+        self.assertTrue(job.acquire())
+        self.assertFalse(OrderJob.objects.get(pk=job.pk).acquire())
+        self.assertFalse(job in OrderJob.objects.runnable())
+
+    def testRecoverStale(self):
+        '''Verify that a job left running by a crashed worker is run again when its lock expires'''
+        job = OrderJob.objects.enqueue(self.order, OrderJob.SEND_EMAIL, to=['foo@example.com'])
+        self.assertTrue(job.acquire())
+        self.assertEqual(OrderJob.objects.recover_stale(), 0)
+        self.assertFalse(job in OrderJob.objects.runnable())
+
+        OrderJob.objects.filter(pk=job.pk).update(run_after=datetime.now() - timedelta(minutes=1))
+        self.assertEqual(OrderJob.objects.recover_stale(), 1)
+        self.assertTrue(job in OrderJob.objects.runnable())
+
+        OrderJob.objects.filter(pk=job.pk).update(status=OrderJob.STATUS_RUNNING,
+            attempts=OrderJob.MAX_ATTEMPTS
+        )
+        self.assertEqual(OrderJob.objects.recover_stale(), 1)
+        self.assertEqual(OrderJob.objects.get(pk=job.pk).status, OrderJob.STATUS_FAILED)
+
+
+class OrderSchedulerTest(TestCase):
+    '''Test that orders are opened and closed when they are due'''
+
+    fixtures = ['a_9001_auth.json','b_9001_des.json',
+                'c_9001_sites.json','d_9001_users.json',
+                'e_9001_workflows.json','f_9001_base.json',
+                'g_9001_supplier.json','h_9001_gas.json',
+                'i_9001_simpleaccounting.json'
+    ]
+
+    def setUp(self):
+        self.pact = GASSupplierOrder.objects.get(pk=1).pact
+        self.order = GASSupplierOrder.objects.create(pact=self.pact,
+            datetime_start=datetime.now() + timedelta(days=1)
+        )
+
+    def testOpenWhenDue(self):
+        '''Verify that an order is opened only when its datetime_start comes'''
+        self.assertFalse(self.order in GASSupplierOrder.objects.due_to_open(datetime.now()))
+        self.assertFalse(self.order in run_due_events()['opened'])
+
+        GASSupplierOrder.objects.filter(pk=self.order.pk).update(
+            datetime_start=datetime.now() - timedelta(minutes=1)
+        )
+        self.assertTrue(self.order in GASSupplierOrder.objects.due_to_open(datetime.now()))
+        self.assertTrue(self.order in run_due_events()['opened'])
+        self.assertTrue(self.order in GASSupplierOrder.objects.open())
+        self.assertFalse(self.order in GASSupplierOrder.objects.due_to_open(datetime.now()))
+
+
+class OrderReportCacheTest(TestCase):
+    '''Test cache of rendered order reports'''
+
+    fixtures = ['a_9001_auth.json','b_9001_des.json',
+                'c_9001_sites.json','d_9001_users.json',
+                'e_9001_workflows.json','f_9001_base.json',
+                'g_9001_supplier.json','h_9001_gas.json',
+                'i_9001_simpleaccounting.json'
+    ]
+
+    def setUp(self):
+        self.order = GASSupplierOrder.objects.get(pk=1)
+        self.renders = 0
+
+    def _render(self):
+        self.renders += 1
+        return "report"
+
+    def testServedFromCache(self):
+        '''Verify that a report is rendered only once if order does not change'''
+        report_cache.get_or_render([self.order], 'pdf', None, self._render)
+        report_cache.get_or_render([self.order], 'pdf', None, self._render)
+        self.assertEqual(self.renders, 1)
+
+    def testInvalidatedOnChange(self):
+        '''Verify that a report is rendered again when an order product changes'''
+        key = report_cache.get_key([self.order], 'pdf')
+        gsop = self.order.orderable_products[0]
+        gsop.order_price += 1
+        gsop.save()
+        self.assertNotEqual(key, report_cache.get_key([self.order], 'pdf'))
+
+    def testInvalidatedOnRelatedChanges(self):
+        '''Verify that a report is rendered again when a product or a referrer changes'''
+        stock = self.order.orderable_products[0].gasstock.stock
+        for instance in (stock.product, stock, self.order.pact):
+            key = report_cache.get_key([self.order], 'pdf')
+            instance.save()
+            self.assertNotEqual(key, report_cache.get_key([self.order], 'pdf'))
+
+        if self.order.referrer_person:
+            key = report_cache.get_key([self.order], 'pdf')
+            self.order.referrer_person.save()
+            self.assertNotEqual(key, report_cache.get_key([self.order], 'pdf'))
+
+
+class OrderReportRecordsTest(TestCase):
+    '''Test that order report records are built with a fixed number of queries'''
+
+    fixtures = ['a_9001_auth.json','b_9001_des.json',
+                'c_9001_sites.json','d_9001_users.json',
+                'e_9001_workflows.json','f_9001_base.json',
+                'g_9001_supplier.json','h_9001_gas.json',
+                'i_9001_simpleaccounting.json'
+    ]
+
+    def setUp(self):
+        self.order = GASSupplierOrder.objects.get(pk=1)
+        for member in self.order.gas.gasmembers[:2]:
+            for gsop in self.order.orderable_products[:2]:
+                GASMemberOrder.objects.get_or_create(purchaser=member, ordered_price=gsop.order_price, ordered_product=gsop, ordered_amount=1)
+
+    def testFamiliesRecords(self):
+        '''Verify that family records are retrieved with one query'''
+        ordereds = self.order.ordered_products.order_by('purchaser__person')
+        with self.assertNumQueries(1):
+            records, tot, subTotals, fam_count = self.order._GASSupplierOrder__get_pdfrecords_families(ordereds)
+        self.assertEqual(len(records), ordereds.count())
+        self.assertEqual(tot, self.order.tot_price)
+
+    def testProductsRecords(self):
+        '''Verify that product records are retrieved with one query for products and two for totals'''
+        orderables = self.order.orderable_products.filter(
+            gasmember_order_set__ordered_amount__gt=0
+        ).distinct()
+        with self.assertNumQueries(3):
+            records = self.order._GASSupplierOrder__get_pdfrecords_products(orderables)
+            for record in records:
+                unicode(record['product'])
+        for record in records:
+            gsop = self.order.orderable_products.get(gasstock=record['product'])
+            self.assertEqual(record['tot_amount'], gsop.tot_amount)
+            self.assertEqual(record['tot_price'], gsop.tot_price)
+
+
+class PactAccountingTest(TestCase):
+    '''Test that pact balances do not create missing accounts'''
+
+    fixtures = ['a_9001_auth.json','b_9001_des.json',
+                'c_9001_sites.json','d_9001_users.json',
+                'e_9001_workflows.json','f_9001_base.json',
+                'g_9001_supplier.json','h_9001_gas.json',
+                'i_9001_simpleaccounting.json'
+    ]
+
+    def setUp(self):
+        self.pact = GASSupplierSolidalPact.objects.all()[0]
+
+    def testBalanceReadOnly(self):
+        '''Verify that reading a pact balance does not write accounts'''
+        n = Account.objects.count()
+        self.pact.balance
+        self.pact.economic_movements.count()
+        self.assertEqual(Account.objects.count(), n)
+
+    def testEnsureAccounts(self):
+        '''Verify that missing accounts are created once'''
+        accounting = self.pact.supplier.accounting
+        accounting.ensure_accounts(self.pact.gas, force=True)
+        self.assertTrue(accounting.system['/expenses/gas/' + self.pact.gas.uid])
+        with self.assertNumQueries(0):
+            accounting.ensure_accounts(self.pact.gas)
+
+    def testMarkedTreeRepaired(self):
+        '''Verify that an account missing from a tree marked as complete is created again'''
+        accounting = self.pact.supplier.accounting
+        path = '/expenses/gas/' + self.pact.gas.uid
+        accounting.ensure_accounts(self.pact.gas, force=True)
+        # i.e: created by a transaction which has been rolled back
+        accounting.system[path].delete()
+        self.assertRaises(Account.DoesNotExist, lambda: accounting.system[path])
+        self.assertTrue(accounting.get_tree_account(self.pact.gas, accounting.system, path))
+
+
+class StockChangesPropagationTest(TestCase):
+    '''Test bulk propagation of supplier stock changes to open orders'''
+
+    fixtures = ['a_9001_auth.json','b_9001_des.json',
+                'c_9001_sites.json','d_9001_users.json',
+                'e_9001_workflows.json','f_9001_base.json',
+                'g_9001_supplier.json','h_9001_gas.json',
+                'i_9001_simpleaccounting.json'
+    ]
+
+    def setUp(self):
+        self.order = GASSupplierOrder.objects.get(pk=1)
+        GASSupplierOrder.objects.filter(pk=self.order.pk).update(current_state_name='Open')
+        self.gsops = list(self.order.orderable_products[:2])
+        self.members = list(self.order.gas.gasmembers[:2])
+        for member in self.members:
+            for gsop in self.gsops:
+                GASMemberOrder.objects.get_or_create(purchaser=member, ordered_price=gsop.order_price, ordered_product=gsop, ordered_amount=1)
+        self.received = []
+        signals.gasmember_products_update.connect(self._receive)
+
+    def tearDown(self):
+        signals.gasmember_products_update.disconnect(self._receive)
+
+    def _receive(self, sender, **kwargs):
+        self.received.append((sender, kwargs))
+
+    def testPriceChanges(self):
+        '''Verify that new prices are propagated and every member is notified once'''
+        changes = dict([(gsop.gasstock.stock_id, { 'price' : gsop.order_price + 1 }) for gsop in self.gsops])
+        self.assertEqual(apply_stock_changes(changes), set(changes.keys()))
+        for gsop in self.gsops:
+            self.assertEqual(GASSupplierOrderProduct.objects.get(pk=gsop.pk).order_price, gsop.order_price + 1)
+            self.assertEqual(SupplierStock.objects.get(pk=gsop.gasstock.stock_id).price, gsop.order_price + 1)
+        self.assertEqual(set([gm for gm, kw in self.received]), set(self.members))
+        for gm, kw in self.received:
+            self.assertEqual(len(kw['updated']), len(self.gsops))
+        # nothing to do if values are the same
+        self.assertEqual(apply_stock_changes(changes), set())
+
+    def testAvailabilityChanges(self):
+        '''Verify that unavailable products are removed from open orders and added back'''
+        gasstock = self.gsops[0].gasstock
+        apply_stock_changes({ gasstock.stock_id : { 'amount_available' : 0 }})
+        self.assertFalse(GASSupplierStock.objects.get(pk=gasstock.pk).enabled)
+        self.assertFalse(self.order.orderable_products.filter(gasstock=gasstock).exists())
+        self.assertEqual(len(self.received), len(self.members))
+        for gm, kw in self.received:
+            self.assertEqual(len(kw['erased']), 1)
+
+        apply_stock_changes({ gasstock.stock_id : { 'amount_available' : ALWAYS_AVAILABLE }})
+        self.assertTrue(GASSupplierStock.objects.get(pk=gasstock.pk).enabled)
+        gsop = self.order.orderable_products.get(gasstock=gasstock)
+        self.assertEqual(gsop.order_price, gasstock.stock.price)
+        self.assertEqual(gsop.delivered_price, gasstock.stock.price)
+
+    def testGASStockChanges(self):
+        '''Verify that products disabled by a GAS are removed from open orders and added back'''
+        gasstock = self.gsops[0].gasstock
+        self.assertEqual(propagate_gasstock_changes({ gasstock.pk : False }), set([gasstock.pk]))
+        self.assertFalse(GASSupplierStock.objects.get(pk=gasstock.pk).enabled)
+        self.assertFalse(self.order.orderable_products.filter(gasstock=gasstock).exists())
+        self.assertEqual(len(self.received), len(self.members))
+
+        self.assertEqual(propagate_gasstock_changes({ gasstock.pk : True }), set([gasstock.pk]))
+        gsop = self.order.orderable_products.get(gasstock=gasstock)
+        self.assertEqual(gsop.initial_price, gasstock.stock.price)
+        self.assertEqual(gsop.delivered_price, gasstock.stock.price)
+        # nothing to do if values are the same
+        self.assertEqual(propagate_gasstock_changes({ gasstock.pk : True }), set())
+
+    def testPactDiscount(self):
+        '''Verify that products added to open orders are priced as agreed in the pact'''
+        gasstock = self.gsops[0].gasstock
+        GASSupplierSolidalPact.objects.filter(pk=self.order.pact_id).update(order_price_percent_update=Decimal("0.10"))
+        propagate_gasstock_changes({ gasstock.pk : False })
+        propagate_gasstock_changes({ gasstock.pk : True })
+        gsop = self.order.orderable_products.get(gasstock=gasstock)
+        expected = (gasstock.stock.price * Decimal("0.90")).quantize(Decimal("0.0001"))
+        self.assertEqual(GASSupplierStock.objects.get(pk=gasstock.pk).price.quantize(Decimal("0.0001")), expected)
+        for price in (gsop.initial_price, gsop.order_price, gsop.delivered_price):
+            self.assertEqual(price.quantize(Decimal("0.0001")), expected)
+
+
+class GASMemberOrderFormSetTest(TestCase):
+    '''Test retrieval and bulk save of the order sheet of a GAS member'''
+
+    fixtures = ['a_9001_auth.json','b_9001_des.json',
+                'c_9001_sites.json','d_9001_users.json',
+                'e_9001_workflows.json','f_9001_base.json',
+                'g_9001_supplier.json','h_9001_gas.json',
+                'i_9001_simpleaccounting.json'
+    ]
+
+    FormSet = formset_factory(form=SingleGASMemberOrderForm, formset=BaseGASMemberOrderFormSet, extra=0)
+
+    def setUp(self):
+        self.order = GASSupplierOrder.objects.get(pk=1)
+        self.gsops = list(self.order.orderable_products[:3])
+        self.gm = self.order.gas.gasmembers[0]
+        self.gmos = [GASMemberOrder.objects.create(purchaser=self.gm, 
+                ordered_price=gsop.order_price, ordered_product=gsop, ordered_amount=1)
+            for gsop in self.gsops[:2]
+        ]
+        self.request = RequestFactory().post('/')
+        self.request.user = self.gm.person.user
+        self.request.resource = self.gm
+
+    def _get_formset(self, rows):
+        data = { 
+            'form-TOTAL_FORMS' : len(rows), 
+            'form-INITIAL_FORMS' : len(rows),
+            'form-MAX_NUM_FORMS' : 0,
+        }
+        for i, row in enumerate(rows):
+            for k, v in row.items():
+                data['form-%d-%s' % (i, k)] = v
+        return self.FormSet(self.request, data)
+
+    def testSave(self):
+        '''Verify that rows are created, updated and deleted, retrieving them once'''
+        formset = self._get_formset([
+            { 'id' : self.gmos[0].pk, 'gsop_id' : self.gsops[0].pk, 
+              'ordered_amount' : 3, 'ordered_price' : self.gsops[0].order_price, 'note' : 'more' },
+            { 'id' : self.gmos[1].pk, 'gsop_id' : self.gsops[1].pk, 
+              'ordered_amount' : 0, 'ordered_price' : self.gsops[1].order_price },
+            { 'id' : '', 'gsop_id' : self.gsops[2].pk, 
+              'ordered_amount' : 2, 'ordered_price' : self.gsops[2].order_price },
+        ])
+        # member orders and ordered products: one query each
+        with self.assertNumQueries(2):
+            self.assertTrue(formset.is_valid())
+            for form in formset.forms:
+                form.get_row(GASMemberOrder, self.gmos[0].pk)
+                form.get_row(GASSupplierOrderProduct, self.gsops[2].pk)
+        n_history = self.gmos[0].history.count()
+        formset.save()
+
+        gmo = GASMemberOrder.objects.get(pk=self.gmos[0].pk)
+        self.assertEqual(gmo.ordered_amount, 3)
+        self.assertEqual(gmo.note, 'more')
+        # updates are recorded in history
+        self.assertEqual(gmo.history.count(), n_history + 1)
+        self.assertFalse(GASMemberOrder.objects.filter(pk=self.gmos[1].pk).exists())
+        gmo = GASMemberOrder.objects.get(purchaser=self.gm, ordered_product=self.gsops[2])
+        self.assertEqual(gmo.ordered_amount, 2)
+
+    def testWithMemberOrder(self):
+        '''Verify that ordered products are retrieved with orders of a GAS member in one query'''
+        gsops = GASSupplierOrderProduct.objects.filter(
+            pk__in=[gsop.pk for gsop in self.gsops]
+        ).with_member_order(self.gm)
+        with self.assertNumQueries(1):
+            annotated = dict([(gsop.pk, gsop) for gsop in gsops])
+        for gmo in self.gmos:
+            self.assertEqual(annotated[gmo.ordered_product_id].gmo_id, gmo.pk)
+            self.assertEqual(annotated[gmo.ordered_product_id].gmo_note, gmo.note)
+        self.assertEqual(annotated[self.gsops[2].pk].gmo_id, None)
+
+
 class GASSupplierOrderProductTest(TestCase):
     '''Test behaviour of managed attributes of GASSupplierOrderProduct'''
     
@@ -0,0 +1,65 @@
+"""Version stamps of GDXP catalogues, used to compute ETags.
+
+Every supplier has a version stamp which is replaced by ``invalidate``
+every time something exported in its catalogue changes (see signal handlers
+connected in ``gasistafelice.gdxp.models``). A global stamp is replaced
+when data shared by many suppliers (i.e: categories or units) changes.
+
+The ETag of an export depends on request parameters and on the stamps of
+exported suppliers: a client asking for an unchanged catalogue gets
+a "304 Not Modified" response, without the catalogue being generated.
+
+Stamps are stored in the cache named ``GDXP_CATALOG_CACHE`` in settings
+(falling back to the default cache). It must be shared by every process
+which changes catalogues (web workers and management commands like
+``import_gdxp``), otherwise a stale stamp is served until it expires.
+"""
+
+from django.conf import settings
+from django.core.cache import get_cache, InvalidCacheBackendError
+from django.utils.hashcompat import sha_constructor
+
+import uuid
+
+GLOBAL_KEY = "gdxp_catalog_version"
+VERSION_KEY = "gdxp_catalog_version:%s"
+
+def _get_cache():
+    try:
+        return get_cache(getattr(settings, 'GDXP_CATALOG_CACHE', 'default'))
+    except InvalidCacheBackendError:
+        return get_cache('default')
+
+def get_versions(keys):
+    cache = _get_cache()
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # add() does not overwrite a version set by a concurrent request
+            cache.add(key, uuid.uuid4().hex)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+def invalidate(supplier_pks=None):
+    """Invalidate catalogues of suppliers identified by ``supplier_pks``.
+
+    If ``supplier_pks`` is None, invalidate every catalogue.
+    """
+    if supplier_pks is None:
+        _get_cache().delete(GLOBAL_KEY)
+    else:
+        supplier_pks = set(supplier_pks)
+        if supplier_pks:
+            _get_cache().delete_many([VERSION_KEY % pk for pk in supplier_pks])
+
+def get_etag(supplier_pks, params=""):
+    """Return the ETag of the export of suppliers identified by ``supplier_pks``.
+
+    ``params`` identifies export options (i.e: the query string).
+    """
+    keys = [GLOBAL_KEY] + [VERSION_KEY % pk for pk in supplier_pks]
+    stamp = u"%s|%s|%s" % (params,
+        ",".join(map(str, supplier_pks)),
+        ",".join(get_versions(keys))
+    )
+    return sha_constructor(stamp.encode('utf-8')).hexdigest()
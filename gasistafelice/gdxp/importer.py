@@ -0,0 +1,441 @@
+"""Bulk import of GDXP catalogues.
+
+Documents are parsed incrementally with ``iterparse``: only one supplier
+with its products is kept in memory at a time (see ``iter_suppliers``).
+
+Every supplier is matched against existing ones by VAT number, social
+security number or name; its products are matched against existing stocks
+by supplier code (``sku``) or product name. Then differences are applied
+with a fixed number of statements for the whole catalogue:
+
+* new products and stocks are created with bulk INSERTs,
+  together with ``GASSupplierStock``s of every pact of the supplier,
+* changed fields of existing products and stocks are set with one UPDATE
+  for every field,
+* price and availability changes are propagated to GAS orders
+  by ``gas.propagation.propagate_stock_changes``.
+
+Bulk statements are not recorded in history.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.encoding import force_unicode
+
+from gasistafelice.base.const import ALWAYS_AVAILABLE
+from gasistafelice.lib.bulk import bulk_insert, chunks, update_by_pk
+from gasistafelice.gdxp import catalog_cache
+from gasistafelice.gas import report_cache
+
+from xml.etree import cElementTree as ElementTree
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+import logging
+log = logging.getLogger(__name__)
+
+SUPPLIER_TAGS = (
+    'name', 'taxCode', 'vatNumber', 'street', 'locality', 'zipcode',
+    'phoneNumber', 'faxNumber', 'emailAddress', 'webSite',
+)
+
+PRODUCT_TAGS = (
+    'sku', 'name', 'category', 'um', 'description',
+    'packageQty', 'minQty', 'maxQty', 'umPrice',
+)
+
+PRICE_PRECISION = Decimal('0.0001')
+
+def iter_suppliers(source):
+    """Iterate over suppliers described in GDXP document ``source``.
+
+    ``source`` is a file name or a file object.
+    Yield a ``(supplier, products)`` tuple for every supplier: ``supplier``
+    is a dictionary of ``SUPPLIER_TAGS`` values (first occurrence only,
+    so primary contacts win over extra contacts), ``products`` is a list of
+    dictionaries of ``PRODUCT_TAGS`` and extra fields values.
+    """
+
+    path = []
+    supplier = products = product = None
+    for event, el in ElementTree.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            path.append(el.tag)
+            if el.tag == 'supplier':
+                supplier, products = {}, []
+            elif el.tag == 'product' and path[-2:-1] == ['products']:
+                product = {}
+            continue
+
+        path.pop()
+        text = force_unicode(el.text or u"").strip()
+        if product is not None:
+            if el.tag == 'product':
+                products.append(product)
+                product = None
+                el.clear()
+            elif el.tag == 'extraField':
+                product[el.get('name')] = text
+            elif el.tag in PRODUCT_TAGS:
+                product[el.tag] = text
+        elif supplier is not None:
+            if el.tag == 'supplier':
+                yield supplier, products
+                supplier = products = None
+                el.clear()
+            elif el.tag in SUPPLIER_TAGS and el.tag not in supplier:
+                supplier[el.tag] = text
+
+def _decimal(value, default=None):
+    try:
+        return Decimal(value)
+    except (InvalidOperation, TypeError):
+        return default
+
+def _int(value, default=None):
+    value = _decimal(value)
+    if value is None or value < 0:
+        return default
+    return int(value)
+
+class GDXPImporter(object):
+    """Import GDXP catalogues into suppliers, products and stocks.
+
+    Units and categories are loaded once. ``stats`` counts created and
+    updated objects.
+    """
+
+    def __init__(self, delete_missing=False):
+        from gasistafelice.supplier.models import ProductCategory, ProductMU, ProductPU
+
+        self.delete_missing = delete_missing
+        self.stats = dict.fromkeys(('suppliers_created', 'suppliers_updated',
+            'products_created', 'products_updated', 'products_deleted'), 0)
+
+        self._categories = {}
+        for category in ProductCategory.objects.all():
+            self._categories[category.name.lower()] = category
+        self._default_category = self._categories[settings.DEFAULT_CATEGORY_CATCHALL.lower()]
+
+        self._mus, self._pus = {}, {}
+        for units, model in ((self._mus, ProductMU), (self._pus, ProductPU)):
+            for unit in model.objects.all():
+                units[unit.symbol.lower()] = unit
+                units[unit.name.lower()] = unit
+        self._default_pu = self._pus[settings.DEFAULT_PRODUCT_PU.lower()]
+
+    #-- Lookups --#
+
+    def _get_category(self, name):
+        return self._categories.get(name.lower(), self._default_category)
+
+    def _get_mu(self, name):
+        return self._mus.get(name.lower())
+
+    def _get_pu(self, name):
+        return self._pus.get(name.lower(), self._default_pu)
+
+    def _get_supplier(self, data):
+        """Return the existing supplier matching ``data`` or None."""
+        from gasistafelice.supplier.models import Supplier
+
+        for field, tag in (('vat_number', 'vatNumber'), ('ssn', 'taxCode')):
+            if data.get(tag):
+                try:
+                    return Supplier.objects.get(**{field : data[tag]})
+                except Supplier.DoesNotExist:
+                    pass
+        suppliers = list(Supplier.objects.filter(name__iexact=data.get('name', u"")))
+        if len(suppliers) == 1:
+            return suppliers[0]
+        return None
+
+    def _create_supplier(self, data):
+        from gasistafelice.base.models import Place, Contact
+        from gasistafelice.base import const
+        from gasistafelice.supplier.models import Supplier
+
+        seat = None
+        if data.get('street') or data.get('locality'):
+            seat = Place.objects.create(
+                address=data.get('street', u""),
+                city=data.get('locality', u""),
+                zipcode=data.get('zipcode', u""),
+            )
+        supplier = Supplier(
+            name=data['name'],
+            seat=seat,
+            vat_number=data.get('vatNumber') or None,
+            ssn=data.get('taxCode') or None,
+            website=data.get('webSite', u""),
+        )
+        supplier.save()
+        for flavour, tag in ((const.EMAIL, 'emailAddress'), (const.PHONE, 'phoneNumber'), (const.FAX, 'faxNumber')):
+            if data.get(tag):
+                supplier.contact_set.add(Contact.objects.create(flavour=flavour, value=data[tag], is_preferred=True))
+        return supplier
+
+    def _update_supplier(self, supplier, data):
+        """Set data of the existing ``supplier`` as described by ``data``.
+
+        Values missing in the document are left unchanged, contacts are
+        added if missing. Return True if the supplier has changed.
+        """
+        from gasistafelice.base.models import Place, Contact
+        from gasistafelice.base import const
+        from gasistafelice.supplier.models import Supplier
+
+        changed = False
+        for field, tag, unique in (('name', 'name', False), ('website', 'webSite', False),
+            ('vat_number', 'vatNumber', True), ('ssn', 'taxCode', True),
+        ):
+            value = data.get(tag)
+            if not value or getattr(supplier, field) == value:
+                continue
+            if unique and Supplier.objects.filter(**{field : value}).exclude(pk=supplier.pk).exists():
+                log.warning("Not updating %s of supplier %s: %s belongs to another supplier" % (field, supplier, value))
+                continue
+            setattr(supplier, field, value)
+            changed = True
+
+        seat_values = dict([(field, data[tag]) for field, tag in
+            (('address', 'street'), ('city', 'locality'), ('zipcode', 'zipcode')) if data.get(tag)
+        ])
+        if supplier.seat is None:
+            if data.get('street') or data.get('locality'):
+                supplier.seat = Place.objects.create(**seat_values)
+                changed = True
+        elif [value for field, value in seat_values.items() if getattr(supplier.seat, field) != value]:
+            for field, value in seat_values.items():
+                setattr(supplier.seat, field, value)
+            supplier.seat.save()
+            changed = True
+
+        if changed:
+            supplier.save()
+
+        contacts = set(supplier.contact_set.values_list('flavour', 'value'))
+        for flavour, tag in ((const.EMAIL, 'emailAddress'), (const.PHONE, 'phoneNumber'), (const.FAX, 'faxNumber')):
+            if data.get(tag) and (flavour, data[tag]) not in contacts:
+                is_preferred = not [f for f, value in contacts if f == flavour]
+                supplier.contact_set.add(Contact.objects.create(flavour=flavour, value=data[tag], is_preferred=is_preferred))
+                changed = True
+
+        return changed
+
+    def _get_values(self, data):
+        """Return ``(product_values, stock_values, umprice)`` for a GDXP product.
+
+        ``umprice`` is the price by measure unit written in the document.
+        """
+
+        muppu = _decimal(data.get('packageQty'))
+        if not muppu or muppu < 0:
+            muppu = Decimal(1)
+        umprice = _decimal(data.get('umPrice'), Decimal(0)).quantize(PRICE_PRECISION, ROUND_HALF_UP)
+
+        product_values = {
+            'name' : data['name'][:128],
+            'description' : data.get('description', u""),
+            'category' : self._get_category(data.get('category', u"")),
+            'mu' : self._get_mu(data.get('um', u"")),
+            'pu' : self._get_pu(data.get('pu', u"")),
+            'muppu' : muppu,
+        }
+        stock_values = {
+            'code' : data.get('sku') or None,
+            'price' : (umprice * muppu).quantize(PRICE_PRECISION),
+            'amount_available' : _int(data.get('maxQty'), ALWAYS_AVAILABLE),
+            'delivery_notes' : data.get('delivery_notes', u""),
+        }
+        # constraints missing in the document are left unchanged (or to defaults)
+        for name, value in (
+            ('units_minimum_amount', _int(data.get('minQty'))),
+            ('units_per_box', _decimal(data.get('units_per_box'))),
+            ('detail_minimum_amount', _decimal(data.get('detail_minimum_amount'))),
+            ('detail_step', _decimal(data.get('detail_step'))),
+        ):
+            if value is not None:
+                stock_values[name] = value
+        return product_values, stock_values, umprice
+
+    #-- Import --#
+
+    def import_supplier(self, data, products):
+        """Import ``products`` of the supplier described by ``data``.
+
+        Return the supplier.
+        """
+        from gasistafelice.supplier.models import Product, SupplierStock
+        from gasistafelice.gas.models import GASSupplierOrder
+        from gasistafelice.gas.propagation import propagate_stock_changes
+
+        supplier = self._get_supplier(data)
+        if supplier is None:
+            supplier = self._create_supplier(data)
+            self.stats['suppliers_created'] += 1
+            stocks = []
+        else:
+            if self._update_supplier(supplier, data):
+                self.stats['suppliers_updated'] += 1
+            stocks = list(SupplierStock.objects.filter(supplier=supplier).select_related('product'))
+
+        by_code, by_name = {}, {}
+        for stock in stocks:
+            if stock.code:
+                by_code[stock.code] = stock
+            by_name.setdefault(stock.product.name.lower(), stock)
+
+        product_updates, stock_updates = {}, {} # field name -> {pk : value}
+        changes = {}
+        new_products, new_stocks = [], []
+        seen = set()
+
+        for item in products:
+            if not item.get('name'):
+                log.warning("Skipping product without name of supplier %s: %r" % (supplier, item))
+                continue
+            product_values, stock_values, umprice = self._get_values(item)
+
+            stock = by_code.get(stock_values['code']) or by_name.get(product_values['name'].lower())
+            if stock is None or stock.pk in seen:
+                product = Product(producer=supplier, **product_values)
+                new_products.append(product)
+                new_stocks.append(SupplierStock(supplier=supplier, product=product, **stock_values))
+                continue
+
+            seen.add(stock.pk)
+            updated = False
+            for name, value in product_values.items():
+                attname = stock.product._meta.get_field(name).attname
+                value = getattr(value, 'pk', value)
+                if value != getattr(stock.product, attname):
+                    product_updates.setdefault(name, {})[stock.product.pk] = value
+                    updated = True
+
+            # compare on the written price by measure unit, not to suffer from rounding
+            if stock.umprice is None or stock.umprice.quantize(PRICE_PRECISION, ROUND_HALF_UP) != umprice \
+                or product_values['muppu'] != stock.product.muppu:
+                changes.setdefault(stock.pk, {})['price'] = stock_values['price']
+            if stock_values['amount_available'] != stock.amount_available:
+                changes.setdefault(stock.pk, {})['amount_available'] = stock_values['amount_available']
+            if stock.deleted:
+                stock_updates.setdefault('deleted', {})[stock.pk] = False
+            for name, value in stock_values.items():
+                if name not in ('price', 'amount_available') and value != getattr(stock, name):
+                    stock_updates.setdefault(name, {})[stock.pk] = value
+                    updated = True
+
+            if updated or stock.pk in changes:
+                self.stats['products_updated'] += 1
+
+        if self.delete_missing:
+            for stock in stocks:
+                if stock.pk not in seen and not stock.deleted:
+                    stock_updates.setdefault('deleted', {})[stock.pk] = True
+                    changes.setdefault(stock.pk, {})['amount_available'] = 0
+                    self.stats['products_deleted'] += 1
+
+        for name, values in product_updates.items():
+            update_by_pk(Product, name, values)
+        for name, values in stock_updates.items():
+            update_by_pk(SupplierStock, name, values)
+        if 'detail_minimum_amount' in stock_updates or 'detail_step' in stock_updates:
+            self._update_gasstocks(stock_updates)
+        propagate_stock_changes(changes)
+
+        if new_products:
+            self._create_products(supplier, new_products, new_stocks)
+
+        if product_updates or stock_updates or new_products:
+            # bulk statements do not send signals: invalidate reports of supplier orders
+            report_cache.invalidate(GASSupplierOrder.objects.filter(
+                pact__supplier=supplier).values_list('pk', flat=True))
+
+        catalog_cache.invalidate([supplier.pk])
+        return supplier
+
+    def _update_gasstocks(self, stock_updates):
+        """Set GAS constraints of stocks whose detail amounts changed."""
+        from gasistafelice.gas.models import GASSupplierStock
+
+        for name, gas_name in (('detail_minimum_amount', 'minimum_amount'), ('detail_step', 'step')):
+            values = stock_updates.get(name, {})
+            gasstock_values = {}
+            for pk, stock_pk in GASSupplierStock.objects.filter(stock__in=values.keys()).values_list('pk', 'stock'):
+                gasstock_values[pk] = values[stock_pk]
+            update_by_pk(GASSupplierStock, gas_name, gasstock_values)
+
+    def _create_products(self, supplier, products, stocks):
+        """Insert ``products`` and their ``stocks`` with bulk statements.
+
+        Primary keys of new rows are retrieved by their natural key:
+        new products by producer and name, new stocks by product and
+        new GAS stocks by stock.
+        """
+        from gasistafelice.supplier.models import Product, SupplierStock
+        from gasistafelice.gas.models import GASSupplierStock, GASSupplierSolidalPact
+        from gasistafelice.gas.propagation import add_products_to_open_orders
+
+        known_pks = set(Product.objects.filter(producer=supplier).values_list('pk', flat=True))
+        bulk_insert(Product, products)
+        by_name = {}
+        for pk, name in Product.objects.filter(producer=supplier).order_by('pk').values_list('pk', 'name'):
+            if pk not in known_pks:
+                by_name.setdefault(name, []).append(pk)
+        for product in products:
+            product.pk = by_name[product.name].pop(0)
+
+        for stock in stocks:
+            stock.product_id = stock.product.pk
+        bulk_insert(SupplierStock, stocks)
+        by_product = {}
+        for pks in chunks([stock.product_id for stock in stocks]):
+            by_product.update(SupplierStock.objects.filter(product__in=pks).values_list('product', 'pk'))
+        for stock in stocks:
+            stock.pk = by_product[stock.product_id]
+
+        gasstocks = []
+        for pact in GASSupplierSolidalPact.objects.filter(supplier=supplier).select_related('gas'):
+            auto_populate = pact.gas.config.auto_populate_products
+            for stock in stocks:
+                gasstocks.append(GASSupplierStock(pact=pact, stock=stock,
+                    enabled=stock.availability and auto_populate,
+                    minimum_amount=stock.detail_minimum_amount,
+                    step=stock.detail_step,
+                ))
+        if gasstocks:
+            bulk_insert(GASSupplierStock, gasstocks)
+            gasstock_pks = []
+            for pks in chunks([stock.pk for stock in stocks]):
+                gasstock_pks.extend(GASSupplierStock.objects.filter(
+                    stock__in=pks, enabled=True
+                ).values_list('pk', flat=True))
+            add_products_to_open_orders(gasstock_pks)
+
+        self.stats['products_created'] += len(products)
+
+    def run(self, source):
+        """Import every supplier of GDXP document ``source``.
+
+        Return the list of imported suppliers.
+        """
+        rv = []
+        for data, products in iter_suppliers(source):
+            if not data.get('name'):
+                log.warning("Skipping supplier without name")
+                continue
+            rv.append(self.import_supplier(data, products))
+        return rv
+
+@transaction.commit_on_success
+def import_gdxp(source, delete_missing=False):
+    """Import GDXP document ``source`` (a file name or object) in one transaction.
+
+    If ``delete_missing`` is set, stocks of imported suppliers
+    which are not in the document are marked as deleted and unavailable.
+
+    Return the ``stats`` dictionary of the importer.
+    """
+    importer = GDXPImporter(delete_missing=delete_missing)
+    importer.run(source)
+    return importer.stats
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from gasistafelice.gdxp.importer import import_gdxp
+from gasistafelice.base import account_paths
+
+from optparse import make_option
+import time
+
+class Command(BaseCommand):
+    args = "<gdxp_file>"
+    option_list = BaseCommand.option_list + (
+        make_option('--delete-missing', action='store_true', dest='delete_missing', default=False,
+            help="Mark as deleted stocks of imported suppliers which are not in the file"
+        ),
+    )
+    help = """Import suppliers and products from a GDXP file.
+
+Suppliers are matched by VAT number, social security number or name,
+products by supplier code or name. Existing ones are updated, the others
+are created. The whole file is imported in one transaction.
+"""
+
+    def handle(self, *args, **options):
+
+        try:
+            filename = args[0]
+        except IndexError:
+            raise CommandError("Usage import_gdxp: %s" % self.args)
+
+        start = time.time()
+        try:
+            stats = import_gdxp(filename, delete_missing=options['delete_missing'])
+        except (IOError, SyntaxError), e:
+            # cElementTree raises SyntaxError subclasses on malformed documents
+            raise CommandError("Cannot import %s: %s" % (filename, e))
+        finally:
+            account_paths.forget_changed()
+
+        for key in sorted(stats.keys()):
+            self.stdout.write("%s: %d\n" % (key.replace('_', ' '), stats[key]))
+        self.stdout.write("done in %.2fs\n" % (time.time() - start))
+        return 0
@@ -1,3 +1,31 @@
 from django.db import models
+from django.db.models.signals import post_save, post_delete
 
-# Create your models here.
+from gasistafelice.base.models import Person, Place, Contact
+from gasistafelice.supplier.models import Supplier, SupplierAgent, SupplierStock, \
+    Product, ProductCategory, ProductMU, ProductPU, SupplierProductCategory
+from gasistafelice.gdxp import catalog_cache
+
+# Exported catalogues invalidation
+
+def invalidate_catalog(sender, instance, **kwargs):
+    """Invalidate ETags of catalogues that export `instance`."""
+
+    if isinstance(instance, Supplier):
+        supplier_pks = [instance.pk]
+    elif isinstance(instance, (SupplierStock, SupplierAgent)):
+        supplier_pks = [instance.supplier_id]
+    elif isinstance(instance, Product):
+        supplier_pks = instance.stock_set.values_list('supplier', flat=True)
+    else:
+        # shared by many suppliers
+        supplier_pks = None
+
+    catalog_cache.invalidate(supplier_pks)
+
+for model in (Supplier, SupplierAgent, SupplierStock, Product, 
+    ProductCategory, ProductMU, ProductPU, SupplierProductCategory,
+    Person, Place, Contact
+):
+    post_save.connect(invalidate_catalog, sender=model)
+    post_delete.connect(invalidate_catalog, sender=model)
@@ -14,3 +14,140 @@ class SimpleTest(TestCase):
         Tests that 1 + 1 always equals 2.
         """
         self.assertEqual(1 + 1, 2)
+
+
+from django.test.client import RequestFactory
+from django.core.cache import cache
+
+from gasistafelice.base.models import Place
+from gasistafelice.supplier.models import Supplier
+from gasistafelice.gdxp.views import suppliers
+from gasistafelice.gdxp import catalog_cache
+
+from xml.etree import cElementTree as ElementTree
+import cStringIO as StringIO
+
+class SuppliersExportTest(TestCase):
+    '''Test streaming export of GDXP catalogues'''
+
+    fixtures = ['a_9001_auth.json','b_9001_des.json',
+                'c_9001_sites.json','d_9001_users.json',
+                'e_9001_workflows.json','f_9001_base.json',
+                'g_9001_supplier.json','h_9001_gas.json',
+                'i_9001_simpleaccounting.json'
+    ]
+
+    def setUp(self):
+        cache.clear()
+        catalog_cache._get_cache().clear()
+        self.factory = RequestFactory()
+        self.supplier = Supplier.objects.all()[0]
+
+    def testExport(self):
+        '''Verify that every stock of the supplier is exported'''
+        response = suppliers(self.factory.get('/', {'pk' : self.supplier.pk}))
+        self.assertEqual(response.status_code, 200)
+        data = StringIO.StringIO(response.content)
+        names = [el.text or u"" for event, el in ElementTree.iterparse(data) if el.tag == 'name']
+        self.assertEqual(len(names), self.supplier.stocks.count() + 1)
+        self.assertEqual(names[0], self.supplier.name)
+
+    def testSupplierData(self):
+        '''Verify that seat and description of the supplier are exported'''
+        self.supplier.seat = Place.objects.create(address="Via Roma 1", city="Macerata", zipcode="62100")
+        self.supplier.description = "Olio e vino"
+        self.supplier.save()
+        response = suppliers(self.factory.get('/', {'pk' : self.supplier.pk}))
+        self.assertEqual(response.status_code, 200)
+        data = StringIO.StringIO(response.content)
+        values = dict((el.tag, el.text) for event, el in ElementTree.iterparse(data) if el.tag in ('note', 'locality'))
+        self.assertEqual(values['note'], "Olio e vino")
+        self.assertEqual(values['locality'], "Macerata")
+
+    def testNotModified(self):
+        '''Verify that an unchanged catalogue is not generated again'''
+        response = suppliers(self.factory.get('/', {'pk' : self.supplier.pk}))
+        etag = response['ETag']
+        request = self.factory.get('/', {'pk' : self.supplier.pk}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(suppliers(request).status_code, 304)
+        stock = self.supplier.stocks[0]
+        stock.save()
+        request = self.factory.get('/', {'pk' : self.supplier.pk}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(suppliers(request).status_code, 200)
+
+
+from gasistafelice.gdxp.importer import import_gdxp
+
+from decimal import Decimal
+
+IMPORT_DOCUMENT = """<?xml version="1.0" encoding="utf-8"?>
+<gdxp protocolVersion="0.2">
+<supplier>
+    <name>Fornitore GDXP</name>
+    <taxCode></taxCode>
+    <vatNumber>01234567890</vatNumber>
+    <address><street>Via Roma 1</street><locality>Macerata</locality><zipcode>62100</zipcode></address>
+    <contacts><contact><primary><emailAddress>gdxp@example.com</emailAddress></primary></contact></contacts>
+    <products>
+        <product>
+            <sku>P1</sku><name>Olio</name><category>none</category><um>none</um>
+            <orderInfo><packageQty>2</packageQty><minQty>1</minQty><maxQty>10</maxQty><umPrice>%(price)s</umPrice></orderInfo>
+        </product>
+        <product>
+            <sku>P2</sku><name>Vino</name>
+            <orderInfo><packageQty>1</packageQty><umPrice>5.5</umPrice></orderInfo>
+        </product>
+    </products>
+</supplier>
+</gdxp>
+"""
+
+class GDXPImportTest(TestCase):
+    '''Test bulk import of GDXP catalogues'''
+
+    fixtures = SuppliersExportTest.fixtures
+
+    def _import(self, price):
+        return import_gdxp(StringIO.StringIO(IMPORT_DOCUMENT % {'price' : price}))
+
+    def testImport(self):
+        '''Verify that suppliers and stocks are created once and then updated'''
+        stats = self._import("3.00")
+        self.assertEqual(stats['suppliers_created'], 1)
+        self.assertEqual(stats['products_created'], 2)
+        supplier = Supplier.objects.get(vat_number="01234567890")
+        stock = supplier.stocks.get(code="P1")
+        self.assertEqual(stock.price, Decimal("6.00"))
+        self.assertEqual(stock.amount_available, 10)
+        self.assertEqual(stock.product.producer, supplier)
+
+        stats = self._import("3.50")
+        self.assertEqual(stats['suppliers_created'], 0)
+        self.assertEqual(stats['products_created'], 0)
+        self.assertEqual(stats['products_updated'], 1)
+        self.assertEqual(supplier.stocks.count(), 2)
+        self.assertEqual(supplier.stocks.get(code="P1").price, Decimal("7.00"))
+        self.assertEqual(stats['suppliers_updated'], 0)
+
+    def testUpdateSupplier(self):
+        '''Verify that data of an existing supplier is updated'''
+        self._import("3.00")
+        supplier = Supplier.objects.get(vat_number="01234567890")
+        supplier.seat.city = "Ancona"
+        supplier.seat.save()
+        supplier.contact_set.clear()
+
+        stats = self._import("3.00")
+        self.assertEqual(stats['suppliers_updated'], 1)
+        supplier = Supplier.objects.get(vat_number="01234567890")
+        self.assertEqual(supplier.seat.city, "Macerata")
+        self.assertEqual(list(supplier.contact_set.values_list('value', flat=True)), ["gdxp@example.com"])
+
+    def testRoundTrip(self):
+        '''Verify that importing an exported catalogue changes nothing'''
+        supplier = Supplier.objects.all()[0]
+        response = suppliers(RequestFactory().get('/', {'pk' : supplier.pk}))
+        stats = import_gdxp(StringIO.StringIO(response.content))
+        self.assertEqual(stats['suppliers_updated'], 0)
+        self.assertEqual(stats['products_created'], 0)
+        self.assertEqual(stats['products_updated'], 0)
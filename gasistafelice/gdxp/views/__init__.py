@@ -1,28 +1,20 @@
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
-
-from gasistafelice.lib.shortcuts import render_to_response, render_to_xml_response
+from django.views.decorators.http import condition
 
 from supplier.models import Supplier
 
 from django.core.exceptions import FieldError
 
-from django.core.servers.basehttp import FileWrapper
+from gasistafelice.gdxp import catalog_cache
+from gasistafelice.gdxp.writer import iter_gdxp
 
 import urllib
 
-def suppliers(request):
-    """ 
-    GDXP API
-
-    suppliers?<key>=<value>*&opt_<option>=<0|1>*
-    
-    Options are:
+def _get_suppliers(request):
+    """Return suppliers and options requested by querystring.
 
-    - catalog
-    - order
-    - download
-     
+    Raise FieldError if a filter is not supported.
     """
 
     # If querystring is empty return all suppliers and catalogs
@@ -44,19 +36,48 @@ def suppliers(request):
                 if k.endswith('__in'):
                     v = v.split(',')
                 
-                try:
-                    supplier_qs = supplier_qs.filter(**{k : v})
-                except FieldError as e:
-                    return HttpResponse('<h1>Request parameter is not supported</h1>', status=400, content_type='text/xml')
+                supplier_qs = supplier_qs.filter(**{k : v})
+
+    return supplier_qs, options
+
+def suppliers_etag(request):
+    """ETag of the requested catalogue, None if the request is not valid."""
+    try:
+        supplier_qs, options = _get_suppliers(request)
+        supplier_pks = list(supplier_qs.values_list('pk', flat=True))
+    except (FieldError, ValueError):
+        return None
+    if not supplier_pks:
+        return None
+    return catalog_cache.get_etag(supplier_pks, request.META.get('QUERY_STRING', ''))
+
+@condition(etag_func=suppliers_etag)
+def suppliers(request):
+    """ 
+    GDXP API
 
-    if not supplier_qs:
-        return HttpResponse('<h1>No supplier found for the requested filter</h1>', status=404, content_type='text/xml')
+    suppliers?<key>=<value>*&opt_<option>=<0|1>*
+    
+    Options are:
 
-    gdxp_version = 'v0_2'
+    - catalog
+    - order
+    - download
 
-    xml_response = render_to_xml_response(
-        'gdxp/%s/base.xml' % gdxp_version, {'qs' : supplier_qs, 'opts' : options}
-    )
+    XML data is streamed supplier by supplier. 
+    Clients can send the ETag of a previous response 
+    (If-None-Match header) to get it only if it has changed.
+    """
+
+    try:
+        supplier_qs, options = _get_suppliers(request)
+    except FieldError as e:
+        return HttpResponse('<h1>Request parameter is not supported</h1>', status=400, content_type='text/xml')
+
+    if not supplier_qs.exists():
+        return HttpResponse('<h1>No supplier found for the requested filter</h1>', status=404, content_type='text/xml')
+
+    xml_response = HttpResponse(iter_gdxp(supplier_qs, options), content_type='text/xml')
 
     fname = u"GF_%s.gdxp" % urllib.quote_plus(
         u"_".join(map(unicode, supplier_qs)).encode('latin-1')
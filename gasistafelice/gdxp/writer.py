@@ -0,0 +1,188 @@
+"""Streaming writer of GDXP documents.
+
+A catalogue is written supplier by supplier, so that the whole DES catalogue
+is never kept in memory: ``iter_gdxp`` yields a chunk of XML data for every
+supplier and it can be used as the content of an ``HttpResponse``.
+
+Suppliers are retrieved ``SUPPLIER_CHUNK_SIZE`` at a time, and their stocks
+with products, categories and units are retrieved at once for every chunk.
+
+Documents follow GDXP protocol version 0.2.
+"""
+
+from django.utils.encoding import force_unicode
+from django.utils.xmlutils import SimplerXMLGenerator
+from django.template.defaultfilters import floatformat
+
+import datetime
+import cStringIO as StringIO
+
+SUPPLIER_CHUNK_SIZE = 20
+
+def _text(value):
+    if value is None:
+        return u""
+    return force_unicode(value)
+
+class GDXPWriter(object):
+    """Write GDXP elements incrementally.
+
+    Written data is retrieved by ``flush``.
+    """
+
+    def __init__(self, encoding='utf-8'):
+        self._buf = StringIO.StringIO()
+        self._xml = SimplerXMLGenerator(self._buf, encoding)
+
+    def flush(self):
+        """Return data written since last flush."""
+        rv = self._buf.getvalue()
+        self._buf.seek(0)
+        self._buf.truncate()
+        return rv
+
+    def start(self, name, attrs=None):
+        self._xml.startElement(name, attrs or {})
+
+    def end(self, name):
+        self._xml.endElement(name)
+
+    def element(self, name, value=None, attrs=None):
+        self._xml.addQuickElement(name, _text(value), attrs or {})
+
+    #-- Document --#
+
+    def start_document(self, version="0.2"):
+        self._xml.startDocument()
+        self.start('gdxp', {
+            'protocolVersion' : version,
+            'creationDate' : datetime.datetime.now().strftime("%Y%m%d%H%M%S"),
+            'applicationSignature' : "GasistaFelice",
+        })
+
+    def end_document(self):
+        self.end('gdxp')
+        self._xml.endDocument()
+
+    def _contact(self, person):
+        self.start('extraContact')
+        self.element('firstName', person and person.name)
+        self.element('lastName', person and person.surname)
+        self.element('phoneNumber', person and person.preferred_phone_address)
+        self.element('mobileNumber')
+        self.element('faxNumber', person and person.preferred_fax_address)
+        self.element('emailAddress', person and person.preferred_email_address)
+        self.end('extraContact')
+
+    def supplier(self, supplier, stocks, options):
+        """Write ``supplier`` element with its ``stocks`` (if catalog option is set)."""
+
+        seat = supplier.seat
+        self.start('supplier')
+        self.element('name', supplier.name)
+        self.element('taxCode', supplier.ssn)
+        self.element('vatNumber', supplier.vat_number)
+        self.element('note', supplier.description)
+        self.start('address')
+        self.element('street', seat and seat.address)
+        self.element('locality', seat and seat.city)
+        self.element('zipcode', seat and seat.zipcode)
+        self.element('country')
+        self.end('address')
+        self.start('contacts')
+        self.start('contact')
+        self.start('primary')
+        self.element('phoneNumber', supplier.preferred_phone_address)
+        self.element('faxNumber', supplier.preferred_fax_address)
+        self.element('emailAddress', supplier.preferred_email_address)
+        self.element('webSite', supplier.website)
+        self.end('primary')
+        self._contact(supplier.frontman)
+        for person in supplier.agent_set.all():
+            self._contact(person)
+        self.end('contact')
+        self.end('contacts')
+
+        self.start('products')
+        if options.get('opt_catalog'):
+            for stock in stocks:
+                self.product(stock)
+        self.end('products')
+
+        self.start('orders')
+        if options.get('opt_order'):
+            self.start('order')
+            for name in ('openDate', 'closeDate', 'deliveryDate'):
+                self.element(name)
+            self.start('extraFields')
+            self.element('extraField', attrs={'name' : ""})
+            self.end('extraFields')
+            self.end('order')
+        self.end('orders')
+
+        self.start('extraFields')
+        self.element('extraField', attrs={'name' : ""})
+        self.end('extraFields')
+        self.end('supplier')
+
+    def product(self, stock):
+
+        product = stock.product
+        self.start('product')
+        self.element('sku', stock.code)
+        self.element('name', product.name)
+        self.element('category', product.category and product.category.name)
+        self.element('um', product.mu and product.mu.name)
+        self.element('description', product.description)
+        self.start('orderInfo')
+        self.element('packageQty', product.muppu)
+        self.element('minQty', stock.units_minimum_amount)
+        self.element('mulQty')
+        self.element('maxQty', stock.amount_available)
+        self.element('umPrice', floatformat(stock.umprice, -4))
+        self.element('shippingCost', 0)
+        self.end('orderInfo')
+        self.start('variants')
+        self.end('variants')
+        self.start('extraFields')
+        for name, value in (
+            ('supplier_category', stock.supplier_category and stock.supplier_category.name),
+            ('units_per_box', stock.units_per_box),
+            ('detail_minimum_amount', stock.detail_minimum_amount),
+            ('detail_step', stock.detail_step),
+            ('delivery_notes', stock.delivery_notes),
+            ('pu', product.pu and product.pu.name),
+        ):
+            self.element('extraField', value, {'name' : name})
+        self.end('extraFields')
+        self.end('product')
+
+def iter_gdxp(supplier_qs, options):
+    """Iterate over GDXP data of suppliers in ``supplier_qs``.
+
+    ``options`` are the ones of ``gdxp.views.suppliers``.
+    """
+    from gasistafelice.supplier.models import Supplier, SupplierStock
+
+    writer = GDXPWriter()
+    writer.start_document()
+    yield writer.flush()
+
+    supplier_pks = list(supplier_qs.values_list('pk', flat=True))
+    for i in range(0, len(supplier_pks), SUPPLIER_CHUNK_SIZE):
+        chunk = supplier_pks[i:i+SUPPLIER_CHUNK_SIZE]
+        suppliers = Supplier.objects.select_related('seat', 'frontman').in_bulk(chunk)
+
+        stocks = dict([(pk, []) for pk in chunk])
+        if options.get('opt_catalog'):
+            for stock in SupplierStock.objects.filter(supplier__in=chunk).select_related(
+                'product__category', 'product__mu', 'product__pu', 'supplier_category'
+            ):
+                stocks[stock.supplier_id].append(stock)
+
+        for pk in chunk:
+            writer.supplier(suppliers[pk], stocks[pk], options)
+            yield writer.flush()
+
+    writer.end_document()
+    yield writer.flush()
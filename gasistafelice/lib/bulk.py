@@ -0,0 +1,60 @@
+"""Bulk SQL statements for models.
+
+Django 1.3 saves objects one at a time: these helpers issue one statement
+for a whole chunk of objects. They do not send ``pre_save``/``post_save``
+signals, so callers are in charge of invalidating caches.
+"""
+
+from django.db import connection, transaction
+from django.db.models import AutoField
+
+CHUNK_SIZE = 500
+
+def chunks(seq, size=CHUNK_SIZE):
+    seq = list(seq)
+    for i in range(0, len(seq), size):
+        yield seq[i:i+size]
+
+def update_by_pk(model, field_name, values):
+    """Set ``field_name`` of ``model`` instances to ``values[pk]``.
+
+    One UPDATE statement with a CASE expression is executed for each chunk.
+    """
+
+    qn = connection.ops.quote_name
+    field = model._meta.get_field(field_name)
+    pk_column = qn(model._meta.pk.column)
+    cursor = connection.cursor()
+    for pks in chunks(values.keys()):
+        params = []
+        for pk in pks:
+            params.extend([pk, field.get_db_prep_save(field.to_python(values[pk]), connection=connection)])
+        sql = "UPDATE %s SET %s = CASE %s %s END WHERE %s IN (%s)" % (
+            qn(model._meta.db_table), qn(field.column), pk_column,
+            " ".join(["WHEN %s THEN %s"] * len(pks)),
+            pk_column, ", ".join(["%s"] * len(pks))
+        )
+        cursor.execute(sql, params + pks)
+    transaction.commit_unless_managed()
+
+def bulk_insert(model, objs):
+    """Insert unsaved ``objs`` of ``model`` with one INSERT statement for each chunk.
+
+    Auto primary keys are NOT set on ``objs``: retrieve them by querying
+    instances by the natural key of inserted values.
+    """
+
+    qn = connection.ops.quote_name
+    fields = [f for f in model._meta.local_fields if not isinstance(f, AutoField)]
+    sql = "INSERT INTO %s (%s) VALUES (%s)" % (
+        qn(model._meta.db_table),
+        ", ".join([qn(f.column) for f in fields]),
+        ", ".join(["%s"] * len(fields))
+    )
+    cursor = connection.cursor()
+    for chunk in chunks(objs):
+        cursor.executemany(sql, [
+            [f.get_db_prep_save(f.pre_save(obj, True), connection=connection) for f in fields]
+            for obj in chunk
+        ])
+    transaction.commit_unless_managed()
@@ -3,64 +3,79 @@
 # Author: Luca Ferroni <luca@befair.it>
 # License: GNU Affero General Public License
 
-import csv, os, time
+import csv
+import cStringIO as StringIO
 
 # TODO: 
 # 1) Get delimiter from locale settings
-# 2) Optional filename. Ask for overwriting existing file if necessary
 
 class CSVManager:
+    """Read and write CSV data as dictionaries keyed by `fieldnames`.
+
+    Data is processed in memory: `iter_read` and `iter_write` are
+    the streaming versions of `read` and `write`.
+    """
+
     def __init__(self, fieldnames, delimiter=";", encoding='utf-8'):
         
-        self.filename = "/tmp/csv_" + str(time.time())
         self.fieldnames = fieldnames
         self.delimiter = delimiter
         self.encoding = encoding
 
+    def iter_read(self, lines):
+        """Iterate over rows in `lines` (a file-like object or any iterable of lines).
+
+        Header, if any, must be skipped by the caller.
+        """
+        csvr = csv.DictReader(lines, fieldnames=self.fieldnames, delimiter=self.delimiter)
+        for r in csvr:
+            for k,v in r.items():
+                if isinstance(v, str):
+                    r[k] = v.decode(self.encoding)
+            yield r
+
     def read(self, csvdata):
-        #Write CSV file with data
         s = csv.Sniffer()
         if s.has_header(csvdata):
             csvdata = csvdata[csvdata.find("\n")+1:]
-        csvfile = file(self.filename, "w")
-        csvfile.write(csvdata)
-        csvfile.close()
-
-        #Read data into dictionary
-        csvfile = file(self.filename, "r")
-        csvr = csv.DictReader(csvfile, fieldnames=self.fieldnames, delimiter=self.delimiter)
-        rows = []
-        for r in csvr:
-            #print("DEBUG", r)
-            for k,v in r.items():
-                r[k] = v.decode(self.encoding)
-            rows.append(r)
-        csvfile.close()
-        os.remove(self.filename)
-        return rows
+        return list(self.iter_read(StringIO.StringIO(csvdata)))
 
-    def write(self, rows, header=True):
+    def _encode(self, value):
+        if isinstance(value, unicode):
+            return value.encode(self.encoding, "ignore")
+        return value
+
+    def iter_write(self, rows, header=True, chunk_size=100):
+        """Iterate over CSV data of `rows` encoded in `self.encoding`.
 
-        #Write CSV file with rows data ignoring fields not included in fieldnames list
-        csvfile = file(self.filename, "w")
-        csvwriter = csv.DictWriter(csvfile, fieldnames=self.fieldnames, delimiter=self.delimiter, extrasaction='ignore')
+        Fields not included in fieldnames list are ignored.
+        `header` can be True (upper case fieldnames) or a sequence of labels.
+        Data is yielded every `chunk_size` rows, so it can be the content
+        of an `HttpResponse`.
+        """
+
+        buf = StringIO.StringIO()
+        csvwriter = csv.DictWriter(buf, fieldnames=self.fieldnames, delimiter=self.delimiter, extrasaction='ignore')
 
         if header:
-            header_d = {}
-            for field in self.fieldnames:
-                header_d[field] = field.upper()
-            csvwriter.writerow(header_d)
+            if header is True:
+                header = [field.upper() for field in self.fieldnames]
+            csvwriter.writerow(dict(zip(self.fieldnames, map(self._encode, header))))
+
+        for i, r in enumerate(rows):
+            csvwriter.writerow(dict([(k, self._encode(v)) for k,v in r.items()]))
+            if (i + 1) % chunk_size == 0:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
 
-        for r in rows:
-            csvwriter.writerow(r)
-        csvfile.close()
+        data = buf.getvalue()
+        if data:
+            yield data
 
+    def write(self, rows, header=True):
         #Return csv data
-        csvfile = file(self.filename, "r")
-        csvdata = csvfile.read().decode('latin-1')
-        csvfile.close()
-        os.remove(self.filename)
-        return csvdata
+        return "".join(self.iter_write(rows, header)).decode('latin-1')
 
 #----------------------------------------------------------
 
@@ -0,0 +1,449 @@
+"""Server side processing engine for jQuery.dataTables (http://datatables.net).
+
+It retrieves the page of a QuerySet requested by dataTables:
+
+* total counts are cached for `DATATABLES_COUNT_CACHE_TIMEOUT` seconds
+  and they are not computed at all when they can be deduced from the page itself;
+* pages are retrieved by keyset (seek) pagination when the QuerySet is
+  sorted by its default ordering and the previous page has been served
+  (i.e: the user is browsing pages forward). Otherwise it falls back to OFFSET;
+* search is performed by pluggable strategies (see `SEARCH_STRATEGIES`),
+  so that a column can be searched in the way its database index supports.
+
+Columns are identified by the `columnIndexNameMap` contract of
+`BlockSSDataTables.COLUMN_INDEX_NAME_MAP`: column index -> field name.
+
+Rows can be serialized in JSON by declaring `Column` instances
+(see `iter_json`) instead of rendering a template.
+"""
+
+from django.db.models import Q
+from django.core.cache import cache
+from django.db.models.fields import FieldDoesNotExist
+from django.db.models.sql.datastructures import EmptyResultSet
+from django.utils.hashcompat import sha_constructor
+from django.utils import simplejson
+from django.conf import settings
+
+import logging
+
+log = logging.getLogger(__name__)
+
+COUNT_KEY = "dt_count:%s"
+SEEK_KEY = "dt_seek:%s:%s"
+
+MAX_DISPLAY_LENGTH = 100
+
+#------------------------------------------------------------------------------
+# Search strategies
+
+class SearchStrategy(object):
+    """Build the filter for a term searched in a column.
+
+    Subclasses set `lookup` or override `get_q`.
+    """
+
+    lookup = None
+
+    def get_q(self, field_name, value):
+        return Q(**{ "%s__%s" % (field_name, self.lookup) : value })
+
+class ContainsSearch(SearchStrategy):
+    """Match anywhere in the column.
+
+    It is the default. It can be supported by trigram indexes
+    (i.e: PostgreSQL `pg_trgm`) on `UPPER(column)`.
+    """
+    lookup = "icontains"
+
+class PrefixSearch(SearchStrategy):
+    """Match the beginning of the column.
+
+    It can be supported by ordinary btree indexes on `UPPER(column)`.
+    """
+    lookup = "istartswith"
+
+class ExactSearch(SearchStrategy):
+    """Match the whole column. Suitable for codes and identifiers."""
+    lookup = "iexact"
+
+SEARCH_STRATEGIES = {
+    'contains' : ContainsSearch(),
+    'prefix' : PrefixSearch(),
+    'exact' : ExactSearch(),
+}
+
+DEFAULT_SEARCH_STRATEGY = 'contains'
+
+def get_search_strategy(strategy):
+    """Return a `SearchStrategy` instance given its name or the instance itself."""
+    if isinstance(strategy, SearchStrategy):
+        return strategy
+    return SEARCH_STRATEGIES[strategy]
+
+#------------------------------------------------------------------------------
+# Counts
+
+def _get_signature(querySet):
+    """Return a key identifying the SQL statement of `querySet`.
+
+    Return None if the statement cannot be computed.
+    """
+    try:
+        sql = "%s|%s" % (querySet.db, querySet.query)
+    except EmptyResultSet:
+        return None
+    return sha_constructor(sql.encode('utf-8') if isinstance(sql, unicode) else sql).hexdigest()
+
+def cached_count(querySet, timeout=None):
+    """Return `querySet.count()` memoized in the cache for `timeout` seconds."""
+
+    if timeout is None:
+        timeout = getattr(settings, 'DATATABLES_COUNT_CACHE_TIMEOUT', 30)
+
+    signature = timeout and _get_signature(querySet)
+    if not signature:
+        return querySet.count()
+
+    key = COUNT_KEY % signature
+    rv = cache.get(key)
+    if rv is None:
+        rv = querySet.count()
+        cache.set(key, rv, timeout)
+    return rv
+
+#------------------------------------------------------------------------------
+# Keyset pagination
+
+def get_keyset_ordering(querySet):
+    """Return the default ordering of `querySet` suitable for keyset pagination.
+
+    Ordering is a list of (field, descending) tuples which always ends with
+    a unique field (the primary key is appended if needed).
+    Return None if ordering cannot be used for keyset pagination,
+    i.e: it is random, it involves related models or nullable fields.
+    """
+
+    query = querySet.query
+    if query.extra_order_by:
+        return None
+
+    opts = querySet.model._meta
+    ordering = list(query.order_by)
+    if not ordering and query.default_ordering:
+        ordering = list(opts.ordering)
+
+    rv = []
+    for name in ordering:
+        if not isinstance(name, basestring) or name == '?' or '__' in name:
+            return None
+        descending = name.startswith('-')
+        name = name.lstrip('-')
+        if name == 'pk':
+            name = opts.pk.name
+        try:
+            field = opts.get_field(name)
+        except FieldDoesNotExist:
+            # i.e: extra select
+            return None
+        if field.null or field.rel:
+            return None
+        rv.append((field, descending))
+        if field.unique:
+            return rv
+
+    descending = rv[-1][1] if rv else False
+    rv.append((opts.pk, descending))
+    return rv
+
+def _get_seek_q(keyset_ordering, values):
+    """Return filter to retrieve records that follow `values` in `keyset_ordering`."""
+
+    rv = None
+    equals = Q()
+    for (field, descending), value in zip(keyset_ordering, values):
+        lookup = "lt" if descending else "gt"
+        q = equals & Q(**{ "%s__%s" % (field.name, lookup) : value })
+        rv = rv | q if rv else q
+        equals = equals & Q(**{ field.name : value })
+    return rv
+
+def _order_by_keyset(querySet, keyset_ordering):
+    """Order `querySet` by `keyset_ordering`, so that seek filters apply to its ordering."""
+
+    return querySet.order_by(*[
+        "%s%s" % ("-" if descending else "", field.name)
+        for field, descending in keyset_ordering
+    ])
+
+def _get_row_values(row, keyset_ordering):
+    """Return values of `keyset_ordering` fields in `row`.
+
+    `row` is a model instance or a dictionary returned by `QuerySet.values()`.
+    Return None if some values are not in the dictionary.
+    """
+
+    if not isinstance(row, dict):
+        return [getattr(row, field.attname) for field, descending in keyset_ordering]
+
+    rv = []
+    for field, descending in keyset_ordering:
+        keys = [field.attname, field.name]
+        if field.primary_key:
+            keys.append('pk')
+        for key in keys:
+            if key in row:
+                rv.append(row[key])
+                break
+        else:
+            return None
+    return rv
+
+def iter_queryset(querySet, chunk_size=500):
+    """Iterate over `querySet` retrieving `chunk_size` records at a time.
+
+    Chunks are retrieved by keyset pagination if ordering allows it, otherwise by OFFSET.
+    So long exports do not load the whole result in memory.
+    """
+
+    keyset_ordering = get_keyset_ordering(querySet)
+    if keyset_ordering:
+        # Make ordering deterministic by adding unique field
+        querySet = _order_by_keyset(querySet, keyset_ordering)
+    offset = 0
+    chunk = []
+    while True:
+        values = keyset_ordering and chunk and _get_row_values(chunk[-1], keyset_ordering)
+        if values:
+            chunk = list(querySet.filter(_get_seek_q(keyset_ordering, values))[:chunk_size])
+        else:
+            chunk = list(querySet[offset:offset+chunk_size])
+        offset += len(chunk)
+        for row in chunk:
+            yield row
+        if len(chunk) < chunk_size:
+            break
+
+#------------------------------------------------------------------------------
+
+class DataTablesQuery(object):
+    """Apply dataTables request parameters to a QuerySet.
+
+    `search_strategies` maps column indexes to search strategies
+    (names in `SEARCH_STRATEGIES` or `SearchStrategy` instances);
+    columns not in it are searched with `default_search`.
+    """
+
+    def __init__(self, request, columnIndexNameMap, search_strategies=None,
+        default_search=DEFAULT_SEARCH_STRATEGY, keyset=True
+    ):
+
+        self.request = request
+        self.columnIndexNameMap = columnIndexNameMap
+        self.search_strategies = search_strategies or {}
+        self.default_search = default_search
+        self.keyset = keyset
+
+        GET = request.GET
+        self.cols = int(GET.get('iColumns',0))
+        #Safety measure. If someone messes with iDisplayLength manually, we clip it to the max value
+        self.display_length = min(int(GET.get('iDisplayLength',10)), MAX_DISPLAY_LENGTH)
+        self.start = int(GET.get('iDisplayStart',0))
+        self.end = self.start + self.display_length
+
+    def _get_column_name(self, col):
+        return self.columnIndexNameMap.get(col)
+
+    def _get_strategy(self, col):
+        return get_search_strategy(self.search_strategies.get(col, self.default_search))
+
+    def _is_searchable(self, col):
+        return self.request.GET.get('bSearchable_{0}'.format(col), False) == 'true' \
+            and bool(self._get_column_name(col))
+
+    def order(self, querySet):
+        """Apply user sorting. Return True if it has been applied."""
+
+        GET = self.request.GET
+        iSortingCols = int(GET.get('iSortingCols',0))
+        asortingCols = []
+        for sortedColIndex in range(0, iSortingCols):
+            sortedColID = int(GET.get('iSortCol_'+str(sortedColIndex),0))
+            # make sure the column is sortable first
+            if GET.get('bSortable_{0}'.format(sortedColID), 'false')  == 'true':
+                sortedColName = self._get_column_name(sortedColID)
+                if not sortedColName:
+                    continue
+                if GET.get('sSortDir_'+str(sortedColIndex), 'asc') == 'desc':
+                    sortedColName = '-'+sortedColName
+                asortingCols.append(sortedColName)
+
+        if iSortingCols:
+            querySet = querySet.order_by(*asortingCols)
+        return querySet, bool(asortingCols)
+
+    def search(self, querySet):
+        """Apply global and per column search. Return True if a filter has been applied."""
+
+        GET = self.request.GET
+        searchable = [col for col in range(0, self.cols) if self._is_searchable(col)]
+        filtered = False
+
+        # Apply filtering by value sent by user
+        customSearch = GET.get('sSearch', '')
+        if customSearch != '' and searchable:
+            outputQ = None
+            for col in searchable:
+                q = self._get_strategy(col).get_q(self._get_column_name(col), customSearch)
+                outputQ = outputQ | q if outputQ else q
+            querySet = querySet.filter(outputQ)
+            filtered = True
+
+        # Individual column search
+        outputQ = None
+        for col in searchable:
+            value = GET.get('sSearch_{0}'.format(col), '')
+            if value:
+                q = self._get_strategy(col).get_q(self._get_column_name(col), value)
+                outputQ = outputQ & q if outputQ else q
+        if outputQ:
+            querySet = querySet.filter(outputQ)
+            filtered = True
+
+        return querySet, filtered
+
+    def paginate(self, querySet, sorted_by_user):
+        """Return the requested page of `querySet`.
+
+        The page is evaluated if keyset pagination is used.
+        """
+
+        if not self.end > self.start:
+            return querySet
+
+        keyset_ordering = None
+        if self.keyset and not sorted_by_user:
+            keyset_ordering = get_keyset_ordering(querySet)
+
+        if not keyset_ordering:
+            return querySet[self.start:self.end]
+
+        # Make ordering deterministic by adding unique field
+        querySet = _order_by_keyset(querySet, keyset_ordering)
+        signature = _get_signature(querySet)
+        if not signature:
+            return querySet[self.start:self.end]
+
+        values = None
+        if self.start:
+            values = cache.get(SEEK_KEY % (signature, self.start))
+
+        if values is not None:
+            page = querySet.filter(_get_seek_q(keyset_ordering, values))[:self.display_length]
+        else:
+            page = querySet[self.start:self.end]
+
+        # Evaluate page and remember where the next page starts
+        if len(page) == self.display_length:
+            values = _get_row_values(page[len(page)-1], keyset_ordering)
+            if values is not None:
+                cache.set(SEEK_KEY % (signature, self.end), values,
+                    getattr(settings, 'DATATABLES_SEEK_CACHE_TIMEOUT', 60*10)
+                )
+        return page
+
+    def get_page(self, querySet):
+        """Return the tuple (page, datatables parameters) for `querySet`.
+
+        Datatables parameters are:
+            - iTotalRecords: total data before filtering
+            - iTotalDisplayRecords: total data after filtering
+        """
+
+        iTotalRecords = cached_count(querySet)
+
+        querySet, sorted_by_user = self.order(querySet)
+        querySet, filtered = self.search(querySet)
+        page = self.paginate(querySet, sorted_by_user)
+
+        if not filtered:
+            iTotalDisplayRecords = iTotalRecords
+        elif page._result_cache is not None and \
+            (self.start == 0 or page) and len(page) < self.display_length:
+            # Last page: total can be deduced by the page itself
+            iTotalDisplayRecords = self.start + len(page)
+        else:
+            iTotalDisplayRecords = cached_count(querySet)
+
+        return page, {
+            'iTotalRecords' : iTotalRecords,
+            'iTotalDisplayRecords' : iTotalDisplayRecords,
+        }
+
+#------------------------------------------------------------------------------
+# JSON serialization
+
+class Column(object):
+    """A column of rows sent to dataTables.
+
+    `fields` are names of values retrieved by `QuerySet.values()`.
+    The cell content is the value of the first field or, if `render`
+    is specified, the result of `render` called with values of all `fields`.
+
+    Usage:
+        Column('username')
+        Column('last_login', render=date_renderer("Y b d H:i"))
+        Column('person__display_name', 'person__pk', render=lambda name, pk: [name, pk])
+    """
+
+    def __init__(self, *fields, **kw):
+        self.fields = fields
+        self.render = kw.get('render', text_renderer)
+
+    def get_value(self, row):
+        return self.render(*[row[field] for field in self.fields])
+
+def text_renderer(value):
+    if value is None:
+        return u""
+    return unicode(value)
+
+def date_renderer(format):
+    from django.utils.dateformat import format as date_format
+    def render(value):
+        if value is None:
+            return u""
+        return date_format(value, format)
+    return render
+
+def float_renderer(digits=2, prefix=u""):
+    from django.template.defaultfilters import floatformat
+    def render(value):
+        if value is None:
+            return u""
+        return u"%s%s" % (prefix, floatformat(value, digits))
+    return render
+
+def get_columns_fields(columns):
+    """Return names of fields needed by `columns` without duplicates."""
+    rv = []
+    for column in columns:
+        for field in column.fields:
+            if field not in rv:
+                rv.append(field)
+    return rv
+
+def iter_json(rows, columns, sEcho, dt_params, moreData=None):
+    """Yield chunks of JSON response for `rows` rendered by `columns`.
+
+    `moreData` is a JSON string, as in `blocks/base/data.json` template.
+    """
+
+    yield '{"sEcho": %d, "iTotalRecords": %d, "iTotalDisplayRecords": %d, "aaData": [' % (
+        sEcho, dt_params['iTotalRecords'], dt_params['iTotalDisplayRecords']
+    )
+    sep = ''
+    for row in rows:
+        yield sep + simplejson.dumps([column.get_value(row) for column in columns])
+        sep = ','
+    yield '], "gf_moreData": %s}' % (moreData or '{}')
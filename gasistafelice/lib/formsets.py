@@ -2,6 +2,8 @@
 from django.forms.formsets import BaseFormSet
 from django.utils.functional import curry
 
+from gasistafelice.lib.bulk import chunks
+
 class BaseFormSetWithRequest(BaseFormSet):
 
     def __init__(self, request, *args, **kw):
@@ -10,3 +12,96 @@ class BaseFormSetWithRequest(BaseFormSet):
         super(BaseFormSetWithRequest, self).__init__(*args, **kw)
 
 
+class BaseBulkFormSetWithRequest(BaseFormSetWithRequest):
+    """Formset which retrieves and saves rows of all its forms at once.
+
+    ``row_fields`` maps names of form fields to the model of rows they refer to.
+    Rows referred by all the forms are retrieved with one query for each model
+    the first time a form asks for one of them (see ``BulkFormMixin.get_row``).
+
+    ``memoize`` evaluates a check (i.e: a permission) once for the whole batch.
+
+    ``save()`` is called by edit multiple blocks in place of saving every form:
+    subclasses can override it to apply changes of all the forms at once.
+    """
+
+    row_fields = {}
+
+    def __init__(self, request, *args, **kw):
+        # Forms are built in BaseFormSet.__init__
+        self.request = request
+        self._rows = {}
+        self._memo = {}
+        super(BaseBulkFormSetWithRequest, self).__init__(request, *args, **kw)
+
+    def _construct_form(self, i, **kwargs):
+        form = super(BaseBulkFormSetWithRequest, self)._construct_form(i, **kwargs)
+        form.formset = self
+        return form
+
+    def get_queryset(self, model):
+        return model._default_manager.all()
+
+    def get_posted_pks(self, field_name):
+        """Return integer values posted for ``field_name`` in all the forms."""
+
+        pks = set()
+        if self.is_bound:
+            for i in range(self.total_form_count()):
+                try:
+                    pks.add(int(self.data.get("%s-%s" % (self.add_prefix(i), field_name))))
+                except (TypeError, ValueError):
+                    pass
+        return pks
+
+    def get_rows(self, model):
+        """Return rows of ``model`` referred by forms as a dictionary by pk."""
+
+        if model not in self._rows:
+            pks = set()
+            for field_name, field_model in self.row_fields.items():
+                if field_model is model:
+                    pks |= self.get_posted_pks(field_name)
+            rows = {}
+            for chunk in chunks(list(pks)):
+                rows.update(self.get_queryset(model).in_bulk(chunk))
+            self._rows[model] = rows
+        return self._rows[model]
+
+    def memoize(self, key, func, *args):
+        """Return ``func(*args)``, computed only once in this batch for ``key``."""
+
+        if key not in self._memo:
+            self._memo[key] = func(*args)
+        return self._memo[key]
+
+    def save(self):
+        for form in self.forms:
+            # Check for data: empty formsets are full of empty data ;)
+            if form.cleaned_data:
+                form.save()
+
+
+class BulkFormMixin(object):
+    """Form that can be used by itself or in a ``BaseBulkFormSetWithRequest``."""
+
+    formset = None
+
+    def get_row(self, model, pk):
+        """Return the row of ``model`` identified by ``pk``.
+
+        Raise ``model.DoesNotExist`` if it cannot be found.
+        """
+        if self.formset is not None and model in self.formset.row_fields.values():
+            try:
+                return self.formset.get_rows(model)[pk]
+            except KeyError:
+                raise model.DoesNotExist("%s matching pk %s does not exist" % (model._meta.object_name, pk))
+        return model._default_manager.get(pk=pk)
+
+    def memoize(self, key, func, *args):
+        if self.formset is not None:
+            return self.formset.memoize(key, func, *args)
+        return func(*args)
+
+
@@ -0,0 +1,103 @@
+"""Dispatch of email messages over a shared connection.
+
+``EmailMessage.send()`` opens a new connection to the mail server for every
+message: a GAS mailing sent one message per member takes minutes and trips
+the rate limits of mail providers.
+
+A ``MailDispatcher`` sends a whole batch of messages over one connection:
+
+* it pauses ``EMAIL_THROTTLE_DELAY`` seconds every ``EMAIL_THROTTLE_BATCH`` messages,
+* it retries a message up to ``EMAIL_SEND_RETRIES`` times when the failure
+  is temporary (connection dropped or 4xx SMTP reply), reconnecting first.
+
+Messages which cannot be sent are logged and skipped, so that one bad
+address does not stop a mailing, unless ``fail_silently`` is False.
+"""
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+import smtplib
+import socket
+import time
+import logging
+log = logging.getLogger(__name__)
+
+def is_temporary_error(e):
+    """Return True if sending can be retried after error ``e``."""
+    if isinstance(e, (smtplib.SMTPServerDisconnected, socket.error)):
+        return True
+    if isinstance(e, smtplib.SMTPResponseException):
+        return 400 <= e.smtp_code < 500
+    return False
+
+class MailDispatcher(object):
+    """Send email messages over one connection, with throttling and retry.
+
+    After ``send`` the number of sent messages is in ``sent``,
+    messages which could not be sent are in ``failed``.
+    """
+
+    def __init__(self, connection=None, batch_size=None, delay=None, retries=None, retry_delay=None,
+        fail_silently=True):
+
+        self.connection = connection or get_connection()
+        self.batch_size = batch_size or settings.EMAIL_THROTTLE_BATCH
+        self.delay = delay if delay is not None else settings.EMAIL_THROTTLE_DELAY
+        self.retries = retries if retries is not None else settings.EMAIL_SEND_RETRIES
+        self.retry_delay = retry_delay if retry_delay is not None else settings.EMAIL_RETRY_DELAY
+        self.fail_silently = fail_silently
+        self.sent = 0
+        self.failed = []
+
+    def _reconnect(self):
+        try:
+            self.connection.close()
+        except Exception, e:
+            log.debug("Error closing mail connection: %s" % e)
+        self.connection.open()
+
+    def _send(self, message):
+
+        for attempt in range(self.retries + 1):
+            try:
+                return self.connection.send_messages([message])
+            except Exception, e:
+                if attempt < self.retries and is_temporary_error(e):
+                    log.warning("Temporary error sending email %r to %s (attempt %d): %s" % (
+                        message.subject, message.recipients(), attempt + 1, e))
+                    time.sleep(self.retry_delay * (attempt + 1))
+                    self._reconnect()
+                else:
+                    log.error("Cannot send email %r to %s: %s" % (
+                        message.subject, message.recipients(), e))
+                    self.failed.append(message)
+                    if not self.fail_silently:
+                        raise
+                    return 0
+
+    def send(self, messages):
+        """Send ``messages`` (any iterable) and close the connection.
+
+        Return the number of sent messages.
+        """
+
+        self.connection.open()
+        try:
+            n = 0
+            for message in messages:
+                if n and not n % self.batch_size and self.delay:
+                    time.sleep(self.delay)
+                n += 1
+                self.sent += self._send(message) or 0
+        finally:
+            self.connection.close()
+        log.debug("Sent %d email messages, %d failed" % (self.sent, len(self.failed)))
+        return self.sent
+
+def send_messages(messages, **kwargs):
+    """Send ``messages`` over one connection. Return the number of sent messages.
+
+    Keyword arguments are the ones of ``MailDispatcher``.
+    """
+    return MailDispatcher(**kwargs).send(messages)
@@ -0,0 +1,69 @@
+"""Request scoped memoization of relational properties.
+
+Resource properties (i.e: `Person.gas_list` or `Person.orders`) are called
+many times while rendering a page. Decorate them with `request_cached_property`
+to compute them only once per request.
+
+A scope is opened and closed by `gasistafelice.middleware.RequestCacheMiddleware`.
+Outside of a scope (i.e: management commands) properties are not cached.
+
+Cached values are keyed by model, primary key and property name,
+so two instances of the same resource share their values.
+The whole cache is cleared by `invalidate` every time a model instance
+is saved or deleted (see signal handlers in `gasistafelice.base.models`).
+Note that `QuerySet.update()` does not send signals: call `invalidate` explicitly.
+"""
+
+import threading
+
+_local = threading.local()
+
+def begin():
+    """Open a new scope for the current thread."""
+    _local.cache = {}
+
+def end():
+    """Close the scope of the current thread."""
+    _local.cache = None
+
+def is_active():
+    return getattr(_local, 'cache', None) is not None
+
+def invalidate(*args, **kw):
+    """Clear values cached in the current scope.
+
+    It accepts any argument so it can be connected to signals.
+    """
+    if is_active():
+        _local.cache.clear()
+
+def get_or_create(key, factory):
+    """Return the object stored under `key` in the current scope.
+
+    If there is none, `factory()` is called and its result is stored.
+    Outside of a scope a new object is returned by every call.
+    """
+    if not is_active():
+        return factory()
+    try:
+        return _local.cache[key]
+    except KeyError:
+        rv = _local.cache[key] = factory()
+        return rv
+
+def request_cached_property(func):
+    """Like `property`, but the value is memoized in the current request scope."""
+
+    name = func.__name__
+
+    def getter(self):
+        if not is_active() or self.pk is None:
+            return func(self)
+        key = (self.__class__, self.pk, name)
+        try:
+            return _local.cache[key]
+        except KeyError:
+            rv = _local.cache[key] = func(self)
+            return rv
+
+    return property(getter, doc=func.__doc__)
@@ -1,6 +1,7 @@
 # This code has been taken from http://www.assembla.com/spaces/datatables_demo/wiki 
 
 from django.db.models import Q
+from django.db.models.query import QuerySet
 from django.template.loader import render_to_string
 from django.http import HttpResponse
 from django.utils.cache import add_never_cache_headers
@@ -9,18 +10,22 @@ from django.utils import simplejson
 import os
 from django.conf import settings
 
+from gasistafelice.lib.datatables import DataTablesQuery, iter_json
+
 import logging, traceback
 
 log = logging.getLogger(__name__) 
 
 #TODO: Fero def prepare_datatables_list
-def prepare_datatables_queryset(request, querySet, columnIndexNameMap, *args):
+def prepare_datatables_queryset(request, querySet, columnIndexNameMap, *args, **kw):
     """
     Retrieve querySet to be displayed in datatables..
 
     Usage: 
         querySet: query set to draw data from.
         columnIndexNameMap: field names in order to be displayed.
+        keyword arguments are passed to `gasistafelice.lib.datatables.DataTablesQuery`
+        (i.e: search_strategies, default_search, keyset)
 
     Return a tuple:
         querySet: data to be displayed after this request
@@ -28,62 +33,10 @@ def prepare_datatables_queryset(request, querySet, columnIndexNameMap, *args):
             - iTotalRecords: total data before filtering
             - iTotalDisplayRecords: total data after filtering
     """
-    try:
-        iTotalRecords = querySet.count() #count how many records are in queryset before matching final criteria
-    except:
+    if not isinstance(querySet, QuerySet):
         return prepare_datatables_list(request, querySet, columnIndexNameMap, *args)
 
-    cols = int(request.GET.get('iColumns',0)) # Get the number of columns
-    iDisplayLength =  min(int(request.GET.get('iDisplayLength',10)),100)     #Safety measure. If someone messes with iDisplayLength manually, we clip it to the max value of 100.
-    startRecord = int(request.GET.get('iDisplayStart',0)) # Where the data starts from (page)
-    endRecord = startRecord + iDisplayLength  # where the data ends (end of page)
-    
-    # Ordering data
-    iSortingCols =  int(request.GET.get('iSortingCols',0))
-    asortingCols = []
-        
-    if iSortingCols:
-        for sortedColIndex in range(0, iSortingCols):
-            sortedColID = int(request.GET.get('iSortCol_'+str(sortedColIndex),0))
-            if request.GET.get('bSortable_{0}'.format(sortedColID), 'false')  == 'true':  # make sure the column is sortable first
-                sortedColName = columnIndexNameMap[sortedColID]
-                sortingDirection = request.GET.get('sSortDir_'+str(sortedColIndex), 'asc')
-                if sortingDirection == 'desc':
-                    sortedColName = '-'+sortedColName
-                asortingCols.append(sortedColName) 
-        querySet = querySet.order_by(*asortingCols)
-
-    # Determine which columns are searchable
-    searchableColumns = []
-    for col in range(0,cols):
-        if request.GET.get('bSearchable_{0}'.format(col), False) == 'true': searchableColumns.append(columnIndexNameMap[col])
-
-    # Apply filtering by value sent by user
-    customSearch = request.GET.get('sSearch', '').encode('utf-8');
-    if customSearch != '':
-        outputQ = None
-        first = True
-        for searchableColumn in searchableColumns:
-            kwargz = {searchableColumn+"__icontains" : customSearch}
-            outputQ = outputQ | Q(**kwargz) if outputQ else Q(**kwargz)        
-        querySet = querySet.filter(outputQ)
-
-    # Individual column search 
-    outputQ = None
-    for col in range(0,cols):
-        if request.GET.get('sSearch_{0}'.format(col), False) > '' and request.GET.get('bSearchable_{0}'.format(col), False) == 'true':
-            kwargz = {columnIndexNameMap[col]+"__icontains" : request.GET['sSearch_{0}'.format(col)]}
-            outputQ = outputQ & Q(**kwargz) if outputQ else Q(**kwargz)
-    if outputQ: querySet = querySet.filter(outputQ)
-        
-    iTotalDisplayRecords = querySet.count() #count how many records match the final criteria
-    if endRecord > startRecord:
-        querySet = querySet[startRecord:endRecord] #get the slice
-
-    return querySet, {
-        'iTotalRecords' : iTotalRecords,
-        'iTotalDisplayRecords' : iTotalDisplayRecords,
-    }
+    return DataTablesQuery(request, columnIndexNameMap, **kw).get_page(querySet)
 
 def prepare_datatables_list(request, queryList, columnIndexNameMap, *args):
     """
@@ -137,6 +90,28 @@ def render_datatables(request, records, dt_params, jsonTemplatePath, moreData=No
     return response
 
 
+def render_datatables_columns(request, records, dt_params, columns, moreData=None):
+    """
+    Render datatables without templates..
+
+    Usage: 
+        records: rows returned by `QuerySet.values()` for fields needed by `columns`.
+        dt_params: encapsulate datatables parameters. DataTables reference: http://www.datatables.net/ref
+        columns: sequence of `gasistafelice.lib.datatables.Column` instances.
+
+    JSON is streamed while iterating over records.
+    """
+
+    sEcho = int(request.GET.get('sEcho',0)) # required echo response
+    response = HttpResponse(iter_json(records, columns, sEcho, dt_params, moreData), 
+        mimetype="application/javascript"
+    )
+
+    #prevent from caching datatables result
+    add_never_cache_headers(response)
+    return response
+
+
 def render_datatables_automagic(request, querySet, columnIndexNameMap, iTotalRecords, iTotalDisplayRecords, moreData=None):
     """
     Render datatables..
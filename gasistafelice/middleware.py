@@ -26,6 +26,8 @@ from django.conf import settings
 
 from gasistafelice.globals import type_model_d
 from gasistafelice.gas.models import GASMember
+from gasistafelice.lib import request_cache
+from gasistafelice.base import account_paths
 
 from django.contrib.sessions.backends.db import SessionStore
 from django.utils.dateformat import format
@@ -83,6 +85,26 @@ class ResourceMiddleware(AppMiddleware):
         return 
 
 
+class RequestCacheMiddleware(object):
+    """Open a request scope for `request_cached_property` values.
+
+    At the end of the request, drop indexes of accounting systems
+    whose accounts have been changed (see `gasistafelice.base.account_paths`).
+    """
+
+    def process_request(self, request):
+        request_cache.begin()
+
+    def process_response(self, request, response):
+        request_cache.end()
+        account_paths.forget_changed()
+        return response
+
+    def process_exception(self, request, exception):
+        request_cache.end()
+        account_paths.forget_changed()
+
+
 class UpdateRequestUserMiddleware(object):
 
     def process_request(self, request):
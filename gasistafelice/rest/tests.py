@@ -6,6 +6,14 @@ Replace this with more appropriate tests for your application.
 """
 
 from django.test import TestCase
+from django.test.client import RequestFactory
+from django.core.cache import cache
+
+from gasistafelice.base.models import Place
+from django.utils import simplejson
+from gasistafelice.lib.views_support import prepare_datatables_queryset, render_datatables_columns
+from gasistafelice.lib.datatables import Column, get_columns_fields, iter_queryset
+from gasistafelice.lib.csvmanager import CSVManager
 
 
 class SimpleTest(TestCase):
@@ -14,3 +22,87 @@ class SimpleTest(TestCase):
         Tests that 1 + 1 always equals 2.
         """
         self.assertEqual(1 + 1, 2)
+
+
+class DataTablesQueryTest(TestCase):
+    '''Tests for server side processing of dataTables requests'''
+
+    COLUMN_INDEX_NAME_MAP = {
+        0: 'name',
+        1: 'city',
+    }
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        for i in range(25):
+            Place.objects.create(name='place %02d' % i, city='city %s' % (i % 2))
+
+    def _get_page(self, **params):
+        data = { 'iColumns' : 2, 'iDisplayLength' : 10,
+            'bSearchable_0' : 'true', 'bSearchable_1' : 'true',
+        }
+        data.update(params)
+        request = self.factory.get('/', data)
+        return prepare_datatables_queryset(request, Place.objects.all(), self.COLUMN_INDEX_NAME_MAP)
+
+    def testKeysetPagination(self):
+        '''Verify that pages browsed forward by keyset are the same pages retrieved by offset'''
+        expected = list(Place.objects.all()[10:20])
+        self._get_page(iDisplayStart=0)
+        with self.assertNumQueries(1):
+            # total count is cached: only the page is retrieved
+            page, dt_params = self._get_page(iDisplayStart=10)
+            self.assertEqual(list(page), expected)
+        self.assertEqual(dt_params['iTotalRecords'], 25)
+        self.assertEqual(dt_params['iTotalDisplayRecords'], 25)
+
+    def testSearchStrategies(self):
+        '''Verify that searched terms are matched according to search strategy'''
+        page, dt_params = self._get_page(sSearch='ty 1')
+        self.assertEqual(dt_params['iTotalDisplayRecords'], 12)
+        request = self.factory.get('/', { 'iColumns' : 2, 'bSearchable_1' : 'true', 'sSearch' : 'ty 1'})
+        page, dt_params = prepare_datatables_queryset(request, Place.objects.all(),
+            self.COLUMN_INDEX_NAME_MAP, search_strategies={1 : 'prefix'}
+        )
+        self.assertEqual(dt_params['iTotalDisplayRecords'], 0)
+
+    def testColumnsSerialization(self):
+        '''Verify that rows are serialized in JSON by declared columns'''
+        columns = (
+            Column('pk'), 
+            Column('name', 'city', render=lambda name, city: u"%s (%s)" % (name, city)),
+        )
+        querySet = Place.objects.values(*get_columns_fields(columns))
+        request = self.factory.get('/', { 'iColumns' : 2, 'sEcho' : 3 })
+        page, dt_params = prepare_datatables_queryset(request, querySet, self.COLUMN_INDEX_NAME_MAP)
+        response = render_datatables_columns(request, page, dt_params, columns)
+        data = simplejson.loads(response.content)
+        place = Place.objects.all()[0]
+        self.assertEqual(data['sEcho'], 3)
+        self.assertEqual(data['iTotalRecords'], 25)
+        self.assertEqual(data['aaData'][0], [unicode(place.pk), u"%s (%s)" % (place.name, place.city)])
+        self.assertEqual(len(data['aaData']), 10)
+
+    def testIterQueryset(self):
+        '''Verify that records are iterated by chunks in the same order of the QuerySet'''
+        querySet = Place.objects.all()
+        expected = list(querySet)
+        with self.assertNumQueries(3):
+            self.assertEqual(list(iter_queryset(querySet, chunk_size=10)), expected)
+
+        # not unique ordering: the primary key breaks ties
+        querySet = Place.objects.order_by('city')
+        expected = list(querySet.order_by('city', 'pk'))
+        self.assertEqual(list(iter_queryset(querySet, chunk_size=10)), expected)
+        querySet = Place.objects.order_by('-city')
+        expected = list(querySet.order_by('-city', '-pk'))
+        self.assertEqual(list(iter_queryset(querySet, chunk_size=10)), expected)
+
+    def testStreamingCSV(self):
+        '''Verify that CSV data is written by chunks and can be read back'''
+        m = CSVManager(fieldnames=['name', 'city'])
+        chunks = list(m.iter_write(Place.objects.values('name', 'city'), header=False, chunk_size=10))
+        self.assertEqual(len(chunks), 3)
+        rows = list(m.iter_read("".join(chunks).splitlines()))
+        self.assertEqual(rows, list(Place.objects.values('name', 'city')))
@@ -1,6 +1,8 @@
 import os
+import threading
 
 from gasistafelice.lib import load_symbol
+from gasistafelice.globals import RESOURCE_LIST
 
 from django.conf import settings
 import logging
@@ -31,9 +33,129 @@ def load_symbols_from_dir(dir, lib, cname):
 #                                                                              #
 #------------------------------------------------------------------------------#
 
+class BlockRegistry(object):
+    """Registry of block handler classes found in `rest.views.blocks`.
+
+    Block modules are imported only once, the first time the registry is used.
+    Then handler classes, `is_valid` and `visible_in_page` values
+    and parts listing for every resource type are served from dictionaries.
+    Blocks which cannot be instantiated are logged and skipped.
+    """
+
+    BLOCKS_DIR = "/rest/views/blocks/"
+    BLOCKS_LIB = "rest.views.blocks"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._classes = None
+        self._metadata = None
+        self._parts = None
+
+    def _load(self):
+
+        classes = {}
+        metadata = {}
+        for filename in sorted(os.listdir(settings.BASE_DIR + self.BLOCKS_DIR)):
+
+            if not filename.endswith('.py'): continue   #ignore not python sources
+            if filename.startswith('__init__'): continue   #ignore __init__
+
+            block_name = filename[:-3]            # remove '.py'
+            try:
+                klass = load_symbol('%s.%s.Block' % (self.BLOCKS_LIB, block_name))
+            except Exception, e:
+                # i.e: base module does not define a block
+                log.debug("Skipping block module %s: %s" % (block_name, e))
+                continue
+
+            # Retrieve block metadata from a prototype instance
+            # because some blocks override `is_valid` and `visible_in_page`
+            try:
+                prototype = klass()
+                valid_resource_types = set([resource_type
+                    for resource_type in RESOURCE_LIST
+                    if prototype.is_valid(resource_type)
+                ])
+                visible_in_page = prototype.visible_in_page()
+            except Exception, e:
+                # a broken block must not break the others
+                log.error("Skipping block %s: %s (%s)" % (block_name, e, type(e)))
+                continue
+
+            try:
+                description = prototype.get_description()
+            except Exception, e:
+                # description depends on the resource: block cannot be added in page
+                log.debug("Block %s has not a static description: %s" % (block_name, e))
+                description = None
+
+            classes[block_name] = klass
+            metadata[block_name] = {
+                'valid_resource_types' : valid_resource_types,
+                'visible_in_page' : visible_in_page,
+                'description' : description,
+            }
+
+        parts = {}
+        for resource_type in RESOURCE_LIST:
+            parts[resource_type] = [{
+                    "address": block_name,
+                    "description": metadata[block_name]['description'],
+                } for block_name in sorted(classes.keys())
+                if resource_type in metadata[block_name]['valid_resource_types']
+                and metadata[block_name]['visible_in_page']
+                and metadata[block_name]['description'] is not None
+            ]
+
+        self._metadata = metadata
+        self._parts = parts
+        # set last: it flags that registry has been loaded
+        self._classes = classes
+
+    def _ensure_loaded(self):
+        if self._classes is None:
+            self._lock.acquire()
+            try:
+                if self._classes is None:
+                    self._load()
+            finally:
+                self._lock.release()
+
+    def get_handler_class(self, block_name):
+        self._ensure_loaded()
+        try:
+            return self._classes[block_name]
+        except KeyError:
+            raise Exception('Block handler %s not found' % block_name)
+
+    def get_handler(self, block_name):
+        """Return a new handler instance for block `block_name`."""
+        return self.get_handler_class(block_name)()
+
+    def is_valid(self, block_name, resource_type):
+        self._ensure_loaded()
+        return resource_type in self._metadata[block_name]['valid_resource_types']
+
+    def visible_in_page(self, block_name):
+        self._ensure_loaded()
+        return self._metadata[block_name]['visible_in_page']
+
+    def get_parts(self, resource_type):
+        """Return blocks that can be added in page of resources of type `resource_type`.
+
+        Each part is a dictionary with "address" and "description" keys.
+        """
+        self._ensure_loaded()
+        return self._parts.get(resource_type, [])
+
+block_registry = BlockRegistry()
+
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+
 def load_block_handler(block_name, module_base='rest'):
+    if module_base == 'rest':
+        return block_registry.get_handler(block_name)
     class_path = "%s.views.blocks.%s.Block" % (module_base, block_name)
-    #log.debug("load_block_handler(%s,%s)=%s" % (block_name,module_base,class_path));
-    handler =load_symbol(class_path)()
-    
-    return handler
+    return load_symbol(class_path)()
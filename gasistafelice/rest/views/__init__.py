@@ -12,7 +12,7 @@ from flexi_auth.models import ROLES_DICT, ParamRole
 
 from gasistafelice.lib.shortcuts import render_to_xml_response, render_to_context_response
 
-from gasistafelice.rest.utils import load_block_handler, load_symbols_from_dir
+from gasistafelice.rest.utils import load_block_handler, block_registry
 
 from gasistafelice.des.models import Siteattr
 
@@ -426,23 +426,7 @@ def list(request, resource_type):
 #------------------------------------------------------------------------------#
 
 def parts(request, resource_type, resource_id):
-    urls = []
-    for m in load_symbols_from_dir("/rest/views/blocks/", "rest.views.blocks", "Block"):
-        try:
-            
-            module = m[0]
-            itm    = m[1]()
-            
-            if (itm.is_valid(resource_type)):
-                if (itm.visible_in_page()):
-                    urls.append({
-                            "address": module,
-                            "description":itm.get_description()
-                            })
-        except Exception, e:
-            log.debug(e)
-            continue
-
+    urls = block_registry.get_parts(resource_type)
     return render_to_xml_response("resource_urls.xml", {"resource_id":resource_id, "resource_type":resource_type, "urls":urls})
 #
 
@@ -21,7 +21,7 @@ log = logging.getLogger(__name__)
 class AbstractBlock(object):
     
     BLOCK_NAME = "default name"
-    BLOCK_DESCRIPTION = _("default description")
+    BLOCK_DESCRIPTION = _lazy("default description")
     BLOCK_VALID_RESOURCE_TYPES = None
     
     #------------------------------------------------------------------------------#
@@ -194,7 +194,8 @@ class AbstractBlock(object):
                      start_open="%s" \
                 />' % (
             self.block_name,
-            '%s' % (self.get_description()),
+            # unicode formatting: description may be a lazy translation
+            u'%s' % (self.get_description()),
             block_urn,
             self.resource, #was: str(self.resource)... that's why it may be None?!?
             self.refresh_rate,
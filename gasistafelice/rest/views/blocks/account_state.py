@@ -8,7 +8,7 @@ from django.utils.translation import ugettext as _, ugettext_lazy as _lazy
 class Block(BlockWithList):
 
     BLOCK_NAME = "account_state"
-    BLOCK_DESCRIPTION = _("Economic state")
+    BLOCK_DESCRIPTION = _lazy("Economic state")
     BLOCK_VALID_RESOURCE_TYPES = ["gas", "site"] 
 
     def _get_resource_list(self, request):
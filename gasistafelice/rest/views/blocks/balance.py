@@ -22,7 +22,7 @@ class Block(AbstractBlock):
 
     BLOCK_NAME = "balance"
     BLOCK_VALID_RESOURCE_TYPES = ["site", "gas", "supplier", "pact", "gasmember"]
-    BLOCK_DESCRIPTION = ug("Balance")
+    BLOCK_DESCRIPTION = _("Balance")
 
     def _get_user_actions(self, request):
         #COMMENT BY fero: no need for these actions now
@@ -19,7 +19,7 @@ class Block(AbstractBlock):
 
     BLOCK_NAME = "balance_gas"
     BLOCK_VALID_RESOURCE_TYPES = ["gas"]
-    BLOCK_DESCRIPTION = ugettext("Balance")
+    BLOCK_DESCRIPTION = _("Balance")
 #    def __init__(self):
 #        super(Block, self).__init__()
 #        self.description = ugettext("Balance")
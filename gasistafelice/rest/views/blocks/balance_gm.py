@@ -19,7 +19,7 @@ class Block(AbstractBlock):
 
     BLOCK_NAME = "balance_gm"
     BLOCK_VALID_RESOURCE_TYPES = ["gasmember"]
-    BLOCK_DESCRIPTION = ug("Balance")
+    BLOCK_DESCRIPTION = _("Balance")
 
     def _get_user_actions(self, request):
 
@@ -19,7 +19,7 @@ class Block(AbstractBlock):
 
     BLOCK_NAME = "balance_pact"
     BLOCK_VALID_RESOURCE_TYPES = ["pact", "order"]
-    BLOCK_DESCRIPTION = ugettext("Balance")
+    BLOCK_DESCRIPTION = _("Balance")
 
     def _get_user_actions(self, request):
 
@@ -8,6 +8,7 @@ from django.utils.safestring import mark_safe
 
 from django.http import HttpResponse, HttpResponseRedirect
 from django.db import transaction
+from django.db.models.query import QuerySet
 
 # Notes (Comment)
 from django.contrib.comments.models import Comment
@@ -20,7 +21,8 @@ from django.contrib.contenttypes import generic
 from django.contrib.contenttypes.models import ContentType
 
 from gasistafelice.lib.shortcuts import render_to_response, render_to_xml_response, render_to_context_response
-from gasistafelice.lib.views_support import prepare_datatables_queryset, render_datatables
+from gasistafelice.lib.views_support import prepare_datatables_queryset, render_datatables, render_datatables_columns
+from gasistafelice.lib.datatables import get_columns_fields
 from gasistafelice.base.models import Resource
 from gasistafelice.des.models import Site
 from gasistafelice.rest.views.blocks import AbstractBlock
@@ -207,6 +209,18 @@ class BlockSSDataTables(BlockWithList):
     # To be overridden in subclass. Required for correct sorting behaviour
     COLUMN_INDEX_NAME_MAP = {} 
 
+    # Column index -> search strategy name (see gasistafelice.lib.datatables).
+    # Override in subclass for columns backed by suitable database indexes
+    COLUMN_SEARCH_STRATEGIES = {}
+    DEFAULT_SEARCH_STRATEGY = 'contains'
+
+    # Set to False if records cannot be browsed by keyset pagination
+    KEYSET_PAGINATION = True
+
+    # Sequence of gasistafelice.lib.datatables.Column used to serialize rows.
+    # If None, "blocks/<BLOCK_NAME>/data.json" template is rendered
+    DATATABLES_COLUMNS = None
+
     def __init__(self):
         super(BlockSSDataTables, self).__init__()
         #self.BLOCK_TEMPLATE = "blocks/%s/block.xml" % self.BLOCK_NAME
@@ -215,6 +229,13 @@ class BlockSSDataTables(BlockWithList):
     def _get_records(self, request, querySet):
         raise NotImplementedError("To be implemented in subclass")
 
+    def _prepare_datatables_queryset(self, request, querySet, columnIndexNameMap):
+        return prepare_datatables_queryset(request, querySet, columnIndexNameMap,
+            search_strategies=self.COLUMN_SEARCH_STRATEGIES,
+            default_search=self.DEFAULT_SEARCH_STRATEGY,
+            keyset=self.KEYSET_PAGINATION,
+        )
+
     def _get_edit_multiple_form_class(self):
         raise NotImplementedError("_get_edit_multiple_form_class should be implemented in subclass")
 
@@ -236,10 +257,14 @@ class BlockSSDataTables(BlockWithList):
 
         if formset.is_valid():
             with transaction.commit_on_success():
-                for form in formset:
-                    # Check for data: empty formsets are full of empty data ;)
-                    if form.cleaned_data:
-                        form.save()
+                if hasattr(formset, 'save'):
+                    # formset knows how to save all its forms at once
+                    formset.save()
+                else:
+                    for form in formset:
+                        # Check for data: empty formsets are full of empty data ;)
+                        if form.cleaned_data:
+                            form.save()
             return self.response_success()
         else:
             return self.response_error(formset.errors)
@@ -268,10 +293,17 @@ class BlockSSDataTables(BlockWithList):
             querySet = self._get_resource_list(request) 
             #columnIndexNameMap is required for correct sorting behavior
             columnIndexNameMap = self.COLUMN_INDEX_NAME_MAP
+
+            if self.DATATABLES_COLUMNS and isinstance(querySet, QuerySet):
+                # Retrieve only values needed by columns
+                querySet = querySet.values(*get_columns_fields(self.DATATABLES_COLUMNS))
+                querySet, dt_params = self._prepare_datatables_queryset(request, querySet, columnIndexNameMap)
+                return render_datatables_columns(request, querySet, dt_params, self.DATATABLES_COLUMNS)
+
             #path to template used to generate json (optional)
             jsonTemplatePath = 'blocks/%s/data.json' % self.BLOCK_NAME
 
-            querySet, dt_params = prepare_datatables_queryset(request, querySet, columnIndexNameMap)
+            querySet, dt_params = self._prepare_datatables_queryset(request, querySet, columnIndexNameMap)
             return render_datatables(request, querySet, dt_params, jsonTemplatePath)
 
         elif args == EDIT_MULTIPLE:
@@ -286,7 +318,7 @@ class BlockSSDataTables(BlockWithList):
             #path to template used to generate json (optional)
             jsonTemplatePath = 'blocks/%s/edit_multiple.json' % self.BLOCK_NAME
 
-            querySet, dt_params = prepare_datatables_queryset(request, querySet, columnIndexNameMap)
+            querySet, dt_params = self._prepare_datatables_queryset(request, querySet, columnIndexNameMap)
             formset, records, moreData = self._get_records(request, querySet)
 
             return render_datatables(request, records, dt_params, jsonTemplatePath, moreData=moreData)
@@ -9,8 +9,7 @@ from gasistafelice.lib.http import HttpResponse
 
 from gasistafelice.gas.models import GASMember
 
-from gasistafelice.gas.forms.order.gmo import BasketGASMemberOrderForm
-from gasistafelice.lib.formsets import BaseFormSetWithRequest
+from gasistafelice.gas.forms.order.gmo import BasketGASMemberOrderForm, BaseGASMemberOrderFormSet
 from django.forms.formsets import formset_factory
 
 import cgi, os
@@ -25,7 +24,7 @@ log = logging.getLogger(__name__)
 class Block(BlockSSDataTables):
 
     BLOCK_NAME = "basket"
-    BLOCK_DESCRIPTION = _("Basket")
+    BLOCK_DESCRIPTION = _lazy("Basket")
     BLOCK_VALID_RESOURCE_TYPES = ["gasmember"]
 
         #3: 'ordered_product__stock__supplier_stock__product', gasstock
@@ -93,7 +92,7 @@ class Block(BlockSSDataTables):
         qs = self._get_resource_list(self.request)
         return formset_factory(
                     form=BasketGASMemberOrderForm,
-                    formset=BaseFormSetWithRequest, 
+                    formset=BaseGASMemberOrderFormSet, 
                     extra=qs.count()
         )
 
@@ -200,7 +199,7 @@ class Block(BlockSSDataTables):
         
         #TODO FIXME: ugly patch to fix AFTERrecords.append( 6
         if args == self.KW_DATA:
-            from gasistafelice.lib.views_support import prepare_datatables_queryset, render_datatables
+            from gasistafelice.lib.views_support import render_datatables
             
             querySet = self._get_resource_list(request) 
             #columnIndexNameMap is required for correct sorting behavior
@@ -208,7 +207,7 @@ class Block(BlockSSDataTables):
             #path to template used to generate json (optional)
             jsonTemplatePath = 'blocks/%s/data.json' % self.BLOCK_NAME
 
-            querySet, dt_params = prepare_datatables_queryset(request, querySet, columnIndexNameMap)
+            querySet, dt_params = self._prepare_datatables_queryset(request, querySet, columnIndexNameMap)
             #TODO FIXME: AFTER 6 
             formset, records, moreData = self._get_records(request, querySet)
             rv = render_datatables(request, records, dt_params, jsonTemplatePath)
@@ -27,7 +27,7 @@ log = logging.getLogger(__name__)
 class Block(BlockSSDataTables):
 
     BLOCK_NAME = "basket_sent"
-    BLOCK_DESCRIPTION = _("Basket to deliver")
+    BLOCK_DESCRIPTION = _lazy("Basket to deliver")
     BLOCK_VALID_RESOURCE_TYPES = ["gasmember"]
 
     COLUMN_INDEX_NAME_MAP = {
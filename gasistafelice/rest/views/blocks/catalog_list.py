@@ -8,7 +8,7 @@ from django.utils.translation import ugettext as _, ugettext_lazy as _lazy
 class Block(BlockWithList):
 
     BLOCK_NAME = "catalog_list"
-    BLOCK_DESCRIPTION = _("Lista prodotti supplier/gas in ordine")
+    BLOCK_DESCRIPTION = _lazy("Lista prodotti supplier/gas in ordine")
     BLOCK_VALID_RESOURCE_TYPES = ["site", "gas", "supplier", "gasmember"]
 
     def _get_resource_list(self, request):
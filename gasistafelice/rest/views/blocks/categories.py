@@ -8,7 +8,7 @@ from django.utils.translation import ugettext as _, ugettext_lazy as _lazy
 class Block(BlockWithList):
 
     BLOCK_NAME = "categories"
-    BLOCK_DESCRIPTION = _("Categories")
+    BLOCK_DESCRIPTION = _lazy("Categories")
     BLOCK_VALID_RESOURCE_TYPES = ["supplier", "gas", "des"] 
 
     def _get_resource_list(self, request):
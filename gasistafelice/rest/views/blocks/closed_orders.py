@@ -8,7 +8,7 @@ from gasistafelice.rest.views.blocks.open_orders import Block as OpenOrdersBlock
 class Block(OpenOrdersBlock):
 
     BLOCK_NAME = "closed_orders"
-    BLOCK_DESCRIPTION = _("Closed orders")
+    BLOCK_DESCRIPTION = _lazy("Closed orders")
     BLOCK_VALID_RESOURCE_TYPES = ["site", "supplier", "gas"] 
 
     TEMPLATE_RESOURCE_LIST = "blocks/orders.xml"
@@ -8,9 +8,7 @@ from gasistafelice.lib.shortcuts import render_to_xml_response, render_to_contex
 
 from gasistafelice.gas.models import GASMember, GASMemberOrder
 from gasistafelice.supplier.models import Supplier
-from gasistafelice.gas.forms.cash import EcoGASMemberForm, NewEcoGASMemberForm
-from gasistafelice.lib.formsets import BaseFormSetWithRequest
-from django.forms.formsets import formset_factory
+from gasistafelice.gas.forms.cash import EcoGASMemberFormSet, NewEcoGASMemberForm
 
 from django.http import HttpResponse
 from django.template.loader import get_template
@@ -31,7 +29,7 @@ log = logging.getLogger(__name__)
 class Block(BlockSSDataTables):
 
     BLOCK_NAME = "curtail"
-    BLOCK_DESCRIPTION = _("Curtail gasmember")
+    BLOCK_DESCRIPTION = _lazy("Curtail gasmember")
     BLOCK_VALID_RESOURCE_TYPES = ["order"] 
 
     COLUMN_INDEX_NAME_MAP = {
@@ -88,15 +86,12 @@ class Block(BlockSSDataTables):
         #qs = order.ordered_gasmembers.order_by('person__surname', 'person__name')
         #'RawQuerySet' object has no attribute 'order_by'
         qs = order.ordered_gasmembers
-        accounted_amounts = order.gas.accounting.accounted_amount_by_gas_member(order)
+        accounted_amounts = order.gas.accounting.accounted_amounts(order)
         gasmembers = set()
         for item in qs:
             gasmember = item
-            gasmember.accounted_amount = None
-            for member in accounted_amounts:
-                if member.pk == item.pk:
-                    gasmember.accounted_amount = member.accounted_amount 
-                    break
+            # None means that no transaction has been accounted yet
+            gasmember.accounted_amount = accounted_amounts.get(item.pk)
             gasmembers.add(gasmember)
 
             #log.debug("op = %s, sum = %s, acc= %s" % (
@@ -115,11 +110,7 @@ class Block(BlockSSDataTables):
         #return q_sql
 
     def _get_edit_multiple_form_class(self):
-        return formset_factory(
-            form=EcoGASMemberForm,
-            formset=BaseFormSetWithRequest,
-            extra=1
-        )
+        return EcoGASMemberFormSet
 
     def _getItem(self, pairs, colname, default):
         for value, key in pairs:
@@ -222,6 +213,8 @@ class Block(BlockSSDataTables):
 
         if formset.is_valid() and new_fam_form.is_valid():
             with transaction.commit_on_success():
+                # Accounts of all the GAS members at once
+                formset.resolve_accounts()
                 for form in formset:
                     # Check for data: empty formsets are full of empty data ;)
                     if form.cleaned_data:
@@ -232,8 +225,14 @@ class Block(BlockSSDataTables):
                         except Exception, e:
                             msg = _("Curtail ERROR: ") + e.message
                             form._errors[0] = form.error_class([msg])
+                            # All or nothing: do not commit previous rows
+                            # without updating the economic state of the order
+                            transaction.rollback()
                             return self.response_error(form._errors)
 
+                # Once for all the curtails
+                formset.update_economic_state()
+
                 if new_fam_form.cleaned_data:
                     try:
 
@@ -242,6 +241,7 @@ class Block(BlockSSDataTables):
                     except Exception, e:
                         msg = _("Curtail ERROR: ") + e.message
                         new_fam_form._errors[0] = form.error_class([msg])
+                        transaction.rollback()
                         return self.response_error(form._errors)
 
             return self.response_success()
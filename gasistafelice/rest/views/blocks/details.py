@@ -63,7 +63,7 @@ class Block(AbstractBlock):
     def __init__(self):
         super(Block, self).__init__()
 
-        self.description = _("Details")
+        self.description = _lazy("Details")
         
         self.auto_refresh = False
         self.start_open  = True
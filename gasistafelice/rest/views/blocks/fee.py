@@ -29,7 +29,7 @@ from datetime import tzinfo, timedelta, datetime
 class Block(BlockSSDataTables):
 
     BLOCK_NAME = "fee"
-    BLOCK_DESCRIPTION = _("Fee gasmember")
+    BLOCK_DESCRIPTION = _lazy("Fee gasmember")
     BLOCK_VALID_RESOURCE_TYPES = ["gas"]
 
     COLUMN_INDEX_NAME_MAP = {
@@ -20,7 +20,7 @@ class Block(BlockWithList):
     """Render GAS list block with the ability to create a new GAS"""
 
     BLOCK_NAME = "gas_list"
-    BLOCK_DESCRIPTION = _("GAS")
+    BLOCK_DESCRIPTION = _lazy("GAS")
     BLOCK_VALID_RESOURCE_TYPES = ["site"] 
 
     def _get_resource_list(self, request):
@@ -10,6 +10,8 @@ from registration.models import RegistrationProfile
 from gasistafelice.gas.forms.base import GASSingleUserForm
 from django.forms.formsets import formset_factory
 from gasistafelice.lib.formsets import BaseFormSetWithRequest
+from gasistafelice.lib.datatables import Column
+from gasistafelice.base.templatetags.basic_tags import bool_img
 
 #------------------------------------------------------------------------------#
 #                                                                              #
@@ -23,6 +25,12 @@ class Block(users.Block):
     COLUMN_INDEX_NAME_MAP = users.Block.COLUMN_INDEX_NAME_MAP
     COLUMN_INDEX_NAME_MAP[9] = 'person__gasmember__is_suspended'
 
+    DATATABLES_COLUMNS = users.Block.DATATABLES_COLUMNS + (
+        Column('person__pk', 'is_active_in_this_gas', 
+            render=lambda pk, is_active: bool_img(pk is not None and is_active)
+        ),
+    )
+
     def _get_resource_list(self, request):
         """Retrieve all users who are GAS Members and have confirmed their emails.
 
@@ -14,7 +14,7 @@ from gasistafelice.gas.models.base import GASMember
 class Block(BlockWithList):
 
     BLOCK_NAME = "gasmembers"
-    BLOCK_DESCRIPTION = _("GAS members")
+    BLOCK_DESCRIPTION = _lazy("GAS members")
     BLOCK_VALID_RESOURCE_TYPES = ["site", "gas"] 
 
     def _get_resource_list(self, request):
@@ -21,7 +21,7 @@ log = logging.getLogger(__name__)
 class Block(BlockSSDataTables):
 
     BLOCK_NAME = "gasstocks"
-    BLOCK_DESCRIPTION = _("GAS Stocks")
+    BLOCK_DESCRIPTION = _lazy("GAS Stocks")
     BLOCK_VALID_RESOURCE_TYPES = ["pact"] 
 
     COLUMN_INDEX_NAME_MAP = {
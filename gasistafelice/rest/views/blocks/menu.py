@@ -18,7 +18,7 @@ class Block(AbstractBlock):
         super(Block, self).__init__()
         
         self.name = "menu"        
-        self.description = _("Context menu")
+        self.description = _lazy("Context menu")
     
     #------------------------------------------------------------------------------#
     #                                                                              #
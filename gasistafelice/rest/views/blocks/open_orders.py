@@ -17,7 +17,7 @@ from gasistafelice.gas.models import GASSupplierOrder
 class Block(BlockWithList):
 
     BLOCK_NAME = "open_orders"
-    BLOCK_DESCRIPTION = _("Open orders")
+    BLOCK_DESCRIPTION = _lazy("Open orders")
     BLOCK_VALID_RESOURCE_TYPES = ["site", "gas", "supplier", "pact", "stock"] 
 
     TEMPLATE_RESOURCE_LIST = "blocks/open_orders.xml"
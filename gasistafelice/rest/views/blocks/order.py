@@ -7,15 +7,13 @@ from gasistafelice.consts import CREATE, EDIT, EDIT_MULTIPLE, VIEW
 from gasistafelice.lib.shortcuts import render_to_xml_response, render_to_context_response
 
 from gasistafelice.supplier.models import Supplier
-from gasistafelice.gas.models import GASMemberOrder
-from gasistafelice.gas.forms.order.gmo import SingleGASMemberOrderForm
-from gasistafelice.lib.formsets import BaseFormSetWithRequest
+from gasistafelice.gas.models.order import _as_decimal
+from gasistafelice.gas.forms.order.gmo import SingleGASMemberOrderForm, BaseGASMemberOrderFormSet
 from django.forms.formsets import formset_factory
 
 import logging
 log = logging.getLogger(__name__)
 
-
 #------------------------------------------------------------------------------#
 #                                                                              #
 #------------------------------------------------------------------------------#
@@ -27,7 +25,7 @@ class Block(BlockSSDataTables):
     # because usually we refer to "order" for GASSupplierOrder
 
     BLOCK_NAME = "order"
-    BLOCK_DESCRIPTION = _("Order")
+    BLOCK_DESCRIPTION = _lazy("Order")
     BLOCK_VALID_RESOURCE_TYPES = ["gasmember"]
 
     COLUMN_INDEX_NAME_MAP = {
@@ -42,12 +40,22 @@ class Block(BlockSSDataTables):
     }
 #        3: 'gasstock__stock__product__description',
 
+    # Relations shown in the order sheet, retrieved in the same query of ordered products
+    RELATED_FIELDS = (
+        'gasstock__pact',
+        'gasstock__stock__supplier',
+        'gasstock__stock__product__category',
+        'gasstock__stock__product__mu',
+        'gasstock__stock__product__pu',
+    )
+
     def _get_resource_list(self, request):
         selected_orders = request.GET.getlist('gfCP_order')
         rv = request.resource.orderable_products
         if (selected_orders):
             rv = rv.filter(order__pk__in=map(int, selected_orders))
-        return rv
+        # GASMember order for each product is retrieved in the same query
+        return rv.select_related(*self.RELATED_FIELDS).with_member_order(request.resource.gasmember)
 
     def options_response(self, request, resource_type, resource_id):
         """Get options for orders block. Check GAS configuration.
@@ -99,103 +107,72 @@ class Block(BlockSSDataTables):
         
     def _get_edit_multiple_form_class(self):
 
-        qs = self._get_resource_list(self.request)
-
+        # Formsets of this block are always bound to data: no extra forms needed
         return formset_factory(
             form=SingleGASMemberOrderForm,
-            formset=BaseFormSetWithRequest, 
-            extra=qs.count() - self.__get_gmos(qs).count()
-        )
-
-    def __get_gmos(self, gsop):
-        log.debug("order block __get_gmos (%s)" % (self.request.resource.gasmember))
-        return GASMemberOrder.objects.filter(
-            ordered_product__in=gsop,
-            purchaser=self.request.resource.gasmember
+            formset=BaseGASMemberOrderFormSet, 
+            extra=0
         )
 
     def _get_records(self, request, querySet):
-        """Return records of rendered table fields."""
+        """Return records of rendered table fields.
 
-        # [:] forces evaluation of the querySet
-        #FIXME: filtering by purchaser not ok --> return all orders for all gasmembers
-        gmos = self.__get_gmos(querySet)[:]
+        Ordered products, their related objects and orders of the GAS member
+        are retrieved by one query (see `_get_resource_list`).
+        """
 
-        data = {}
-        i = 0
-        c = querySet.count()
-        
-        # Store mapping between GSSOP-id and neededs info: formset_index and ordered_total
-        gmo_info = { }
+        # list() forces evaluation of the querySet only once
+        gsops = list(querySet)
 
-        gmo_lint = GASMemberOrder()
+        data = {}
+        initial_forms = 0
 
-        for i,el in enumerate(querySet):
+        for i,el in enumerate(gsops):
 
-            try:
-                #TODO: to be improved in performance
-                gmo = el.gasmember_order_set.get(
-                        purchaser=self.request.resource.gasmember
-                )
-            except GASMemberOrder.DoesNotExist:
-                gmo=gmo_lint
+            if el.gmo_id:
+                initial_forms += 1
+            ordered_amount = _as_decimal(el.gmo_ordered_amount)
 
             key_prefix = 'form-%d' % i
             data.update({
-               '%s-id' % key_prefix : gmo.pk,
-               '%s-ordered_amount' % key_prefix : gmo.ordered_amount or 0,
+               '%s-id' % key_prefix : el.gmo_id,
+               '%s-ordered_amount' % key_prefix : ordered_amount,
                '%s-ordered_price' % key_prefix : el.gasstock.price, #displayed as hiddend field
                '%s-gsop_id' % key_prefix : el.pk, #displayed as hiddend field
-               '%s-note' % key_prefix : gmo.note,
+               '%s-note' % key_prefix : el.gmo_note,
             })
 
-            gmo_info[el.pk] = {
-                'formset_index' : i,
-                'ordered_total' : (el.gasstock.price or 0)*(gmo.ordered_amount or 0), # This is the total computed NOW (with ordered_product.price)
-            }
-
-
-        data['form-TOTAL_FORMS'] = c 
-        data['form-INITIAL_FORMS'] = gmos.count()
+        data['form-TOTAL_FORMS'] = len(gsops)
+        data['form-INITIAL_FORMS'] = initial_forms
         data['form-MAX_NUM_FORMS'] = 0
 
         formset = self._get_edit_multiple_form_class()(request, data)
 
         records = []
 
-        for i,el in enumerate(querySet):
-            #log.debug("order ordered_amount (%s)" % (i))
-            try:
-                form = formset[gmo_info[el.pk]['formset_index']]
-                total = gmo_info[el.pk]['ordered_total']
-            except KeyError:
-                # GASMember has not ordered this product: build an empty form
-                form = SingleGASMemberOrderForm(self.request)
-                total = 0
-
-            #try:
+        for form, el in zip(formset, gsops):
+
+            gasstock = el.gasstock
+            stock = gasstock.stock
+            price = gasstock.price
+
             form.fields['ordered_amount'].widget.attrs = { 
                 'class' : 'amount',
-                'step' : el.gasstock.step or 1,
-                'minimum_amount' : el.gasstock.minimum_amount or 1,
-                's_url' : el.supplier.urn,
-                'p_url' : el.gasstock.stock.urn,
+                'step' : gasstock.step or 1,
+                'minimum_amount' : gasstock.minimum_amount or 1,
+                's_url' : stock.supplier.urn,
+                'p_url' : stock.urn,
             }
-                            #'p_url' : el.product.urn,
 
             records.append({
                'id' : "%s %s %s %s" % (el.pk, form['id'], form['gsop_id'], form['ordered_price']),
-               'supplier' : el.supplier,
-               'product' : el.gasstock,
-               'price' : el.gasstock.price,
+               'supplier' : stock.supplier,
+               'product' : gasstock,
+               'price' : price,
                'ordered_amount' : form['ordered_amount'], #field inizializzato con il minimo amount e che ha l'attributo step
-               'ordered_total' : total,
+               'ordered_total' : (price or 0)*_as_decimal(el.gmo_ordered_amount), # This is the total computed NOW (with ordered_product.price)
                'note' : form['note'],
-               'category' : el.product.category
+               'category' : stock.product.category
             })
-               #'description' : el.product.description,
-            #except KeyError:
-            #    log.debug("order ordered_amount (%s %s)" % (el.pk, i))
 
         return formset, records, {}
-
@@ -19,7 +19,7 @@ class Block(AbstractBlock):
 
     BLOCK_NAME = "order_insolute"
     BLOCK_VALID_RESOURCE_TYPES = ["order"]
-    BLOCK_DESCRIPTION = ug("Insolute management")
+    BLOCK_DESCRIPTION = _("Insolute management")
 #    def __init__(self):
 #        super(Block, self).__init__()
 #        self.description = ug("Insolute management")
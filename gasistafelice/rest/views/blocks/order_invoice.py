@@ -27,7 +27,7 @@ class Block(AbstractBlock):
 
     def __init__(self):
         super(Block, self).__init__()
-        self.description = _("Actual total registration")
+        self.description = _lazy("Actual total registration")
 
     def _get_user_actions(self, request):
 
@@ -30,7 +30,7 @@ log = logging.getLogger(__name__)
 class Block(BlockSSDataTables):
 
     BLOCK_NAME = "order_report"
-    BLOCK_DESCRIPTION = _("Order report")
+    BLOCK_DESCRIPTION = _lazy("Order report")
     BLOCK_VALID_RESOURCE_TYPES = ["order"] 
 
     COLUMN_INDEX_NAME_MAP = {
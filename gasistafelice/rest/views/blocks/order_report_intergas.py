@@ -28,7 +28,7 @@ log = logging.getLogger(__name__)
 class Block(BlockSSDataTables):
 
     BLOCK_NAME = "order_report_intergas"
-    BLOCK_DESCRIPTION = _("Order inter GAS")
+    BLOCK_DESCRIPTION = _lazy("Order inter GAS")
     BLOCK_VALID_RESOURCE_TYPES = ["order"] 
 
     COLUMN_INDEX_NAME_MAP = {
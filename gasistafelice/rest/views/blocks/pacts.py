@@ -14,7 +14,7 @@ class Block(BlockWithList):
     """
 
     BLOCK_NAME = "pacts"
-    BLOCK_DESCRIPTION = _("Solidal pacts")
+    BLOCK_DESCRIPTION = _lazy("Solidal pacts")
     # this block is not valid. Please see gas_pacts. des_pacts, supplier_pacts
     BLOCK_VALID_RESOURCE_TYPES = []
 
@@ -17,7 +17,7 @@ from des.models import Siteattr
 class Block(BlockWithList):
 
     BLOCK_NAME = "persons"
-    BLOCK_DESCRIPTION = _("People")
+    BLOCK_DESCRIPTION = _lazy("People")
     BLOCK_VALID_RESOURCE_TYPES = ["site"] 
 
     def _get_resource_list(self, request):
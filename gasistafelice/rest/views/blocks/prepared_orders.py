@@ -10,7 +10,7 @@ from gasistafelice.rest.views.blocks.base import BlockSSDataTables
 class Block(BlockSSDataTables):
 
     BLOCK_NAME = "prepared_orders"
-    BLOCK_DESCRIPTION = _("Prepared orders")
+    BLOCK_DESCRIPTION = _lazy("Prepared orders")
     #BLOCK_VALID_RESOURCE_TYPES = ["supplier", "gas"]
     BLOCK_VALID_RESOURCE_TYPES = ["site", "gas", "supplier", "pact"]
 
@@ -11,7 +11,7 @@ from django.utils.translation import ugettext as _, ugettext_lazy as _lazy
 class Block(BlockWithList):
 
     BLOCK_NAME = "products"
-    BLOCK_DESCRIPTION = _("Products")
+    BLOCK_DESCRIPTION = _lazy("Products")
     BLOCK_VALID_RESOURCE_TYPES = ["site", "gas", "supplier"] 
 
     def _get_resource_list(self, request):
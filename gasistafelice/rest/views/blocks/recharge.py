@@ -28,7 +28,7 @@ log = logging.getLogger(__name__)
 class Block(BlockSSDataTables):
 
     BLOCK_NAME = "recharge"
-    BLOCK_DESCRIPTION = _("Gas members recharge and balance")
+    BLOCK_DESCRIPTION = _lazy("Gas members recharge and balance")
     BLOCK_VALID_RESOURCE_TYPES = ["gas"]
 
     COLUMN_INDEX_NAME_MAP = {
@@ -110,19 +110,22 @@ class Block(BlockSSDataTables):
 
         formset = self._get_edit_multiple_form_class()(request, data)
 
+        # Balances of all the members are retrieved at once
+        balances = request.resource.gas.gasmember_balances(querySet)
+
         records = []
         i = 0
         for i,item in enumerate(querySet):
 
             form = formset[map_info[item.pk]['formset_index']]
-            log.debug("item.balanceitem.balanceitem.balanceitem.balance %s" % ("%.2f" % round(item.balance, 2)).replace('.','€'))
+            balance = balances.get(item.pk, 0)
             records.append({
                'id' : item.pk,
                'gasmember' : item,
                'last_recharge' : item.last_recharge,
                'recharging' : "%s %s" % (form['gm_id'], form['recharged']),
                'gasmember_urn' : item.urn,
-               'balance' : ("%.2f" % round(item.balance, 2)).replace('.','€'),
+               'balance' : ("%.2f" % round(balance, 2)).replace('.','€'),
             })
 
         return formset, records, {}
@@ -19,7 +19,7 @@ from flexi_auth.models import ObjectWithContext
 class Block(BlockSSDataTables):
 
     BLOCK_NAME = "stocks"
-    BLOCK_DESCRIPTION = _("Stocks")
+    BLOCK_DESCRIPTION = _lazy("Stocks")
     BLOCK_VALID_RESOURCE_TYPES = ["supplier"] 
 
     COLUMN_INDEX_NAME_MAP = { 
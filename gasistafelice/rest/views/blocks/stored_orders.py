@@ -13,7 +13,7 @@ from gasistafelice.rest.views.blocks.base import BlockSSDataTables
 class Block(BlockSSDataTables):
 
     BLOCK_NAME = "stored_orders"
-    BLOCK_DESCRIPTION = _("Stored orders")
+    BLOCK_DESCRIPTION = _lazy("Stored orders")
     BLOCK_VALID_RESOURCE_TYPES = ["site", "gas", "supplier", "pact"]
 
     COLUMN_INDEX_NAME_MAP = {
@@ -38,5 +38,5 @@ class Block(BlockSSDataTables):
 
     def _get_resource_list(self, request):
         #GASSupplierOrder
-        return request.resource.orders.archived()
+        return request.resource.orders.archived().with_totals()
         #return request.resource.orders.closed()  #Only for test purpose
@@ -20,7 +20,7 @@ from gasistafelice.supplier.forms import AddSupplierForm
 class Block(BlockWithList):
 
     BLOCK_NAME = "suppliers"
-    BLOCK_DESCRIPTION = _("Suppliers")
+    BLOCK_DESCRIPTION = _lazy("Suppliers")
     BLOCK_VALID_RESOURCE_TYPES = ["site", "gas"]
 
     def _get_resource_list(self, request):
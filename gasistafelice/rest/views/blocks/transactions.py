@@ -7,11 +7,11 @@ from flexi_auth.models import ObjectWithContext
 from gasistafelice.rest.views.blocks.base import BlockSSDataTables, ResourceBlockAction, CREATE_CSV
 from gasistafelice.consts import VIEW_CONFIDENTIAL, CONFIDENTIAL_VERBOSE_HTML, CASH
 from gasistafelice.base.templatetags.accounting_tags import human_readable_account_csv,human_readable_kind, signed_ledger_entry_amount
+from gasistafelice.base.account_owners import get_resolver
 
 from django.template.loader import render_to_string
 
-import datetime, csv
-import cStringIO as StringIO
+import datetime
 #from simple_accounting.models import economic_subject, AccountingDescriptor
 #from simple_accounting.models import account_type
 #from simple_accounting.exceptions import MalformedTransaction
@@ -21,6 +21,8 @@ import cStringIO as StringIO
 #from gasistafelice.base.accounting import PersonAccountingProxy
 
 from gasistafelice.lib.shortcuts import render_to_xml_response, render_to_context_response
+from gasistafelice.lib.csvmanager import CSVManager
+from gasistafelice.lib.datatables import iter_queryset
 
 #------------------------------------------------------------------------------#
 #                                                                              #
@@ -31,7 +33,7 @@ from gasistafelice.lib.shortcuts import render_to_xml_response, render_to_contex
 class Block(BlockSSDataTables):
 
     BLOCK_NAME = "transactions"
-    BLOCK_DESCRIPTION = _("Economic transactions")
+    BLOCK_DESCRIPTION = _lazy("Economic transactions")
     BLOCK_VALID_RESOURCE_TYPES = ["gas", "supplier", "pact"]
 
     COLUMN_INDEX_NAME_MAP = {
@@ -65,7 +67,17 @@ class Block(BlockSSDataTables):
 
     def _get_resource_list(self, request):
         #Accounting.LedgerEntry  or Transactions
-        return request.resource.economic_movements
+        return request.resource.economic_movements.select_related(
+            'account__system', 'transaction'
+        )
+
+    def _prepare_datatables_queryset(self, request, querySet, columnIndexNameMap):
+        page, dt_params = super(Block, self)._prepare_datatables_queryset(
+            request, querySet, columnIndexNameMap
+        )
+        # Resolve account owners of the whole page at once
+        get_resolver().resolve(page)
+        return page, dt_params
 
     def get_response(self, request, resource_type, resource_id, args):
         """Check for confidential access permission and call superclass if needed"""
@@ -144,34 +156,29 @@ class Block(BlockSSDataTables):
 
             #NOTA: eliminare nell'integrazione tutte le righe commentate con #OLD:
 
+        Entries are retrieved by chunks and written straight into the response.
         """
 
+        fieldnames = ['id', 'date', 'account', 'kind', 'amount', 'description']
         headers = [_(u'Id'), _(u'Data'), _(u'Account'), _(u'Kind'), _(u'Cash amount'), _(u'Description')]
-        records = self._get_resource_list(request)
-        csvfile = StringIO.StringIO()
-
-        writer = csv.writer(csvfile, delimiter=';',quotechar='"', quoting=csv.QUOTE_MINIMAL)
-        writer.writerow(headers)
-        for res in self._get_resource_list(request):
-            writer.writerow([res.pk,
-                '{0:%a %d %b %Y %H:%M}'.format(res.date),
-                human_readable_account_csv(res.account),
-                human_readable_kind(res.transaction.kind),
-                signed_ledger_entry_amount(res),
-                res.transaction.description.encode("utf-8", "ignore")
-            ])
-
-        csv_data = csvfile.getvalue()
-
-        if not csv_data:
-            rv = HttpResponseServerError(_('Report not generated'))
-        else:
-            response = HttpResponse(csv_data, content_type='text/csv')
-            filename = "%(res)s_%(date)s.csv" % {
-                'res': request.resource,
-                'date' : '{0:%Y%m%d_%H%M}'.format(datetime.datetime.now())
-            }
-            response['Content-Disposition'] = "attachment; filename=" + filename
-            rv = response
-        return rv
+
+        resolver = get_resolver()
+        entries = resolver.iter_resolved(iter_queryset(self._get_resource_list(request)))
+        rows = ({
+            'id' : res.pk,
+            'date' : '{0:%a %d %b %Y %H:%M}'.format(res.date),
+            'account' : human_readable_account_csv(res.account, resolver),
+            'kind' : human_readable_kind(res.transaction.kind),
+            'amount' : signed_ledger_entry_amount(res),
+            'description' : res.transaction.description,
+        } for res in entries)
+
+        m = CSVManager(fieldnames=fieldnames, delimiter=';')
+        response = HttpResponse(m.iter_write(rows, header=headers), content_type='text/csv')
+        filename = "%(res)s_%(date)s.csv" % {
+            'res': request.resource,
+            'date' : '{0:%Y%m%d_%H%M}'.format(datetime.datetime.now())
+        }
+        response['Content-Disposition'] = "attachment; filename=" + filename
+        return response
 
@@ -12,6 +12,16 @@ from gasistafelice.lib.formsets import BaseFormSetWithRequest
 
 from flexi_auth.models import ObjectWithContext
 from gasistafelice.base.models import Person
+from gasistafelice.base.templatetags.basic_tags import bool_img
+from gasistafelice.lib.datatables import Column, date_renderer
+
+def render_person(pk, display_name, name, surname):
+    """Render person bound to user as [name, urn]."""
+    if pk is None:
+        return [u"", None]
+    if not display_name:
+        display_name = u"%s %s" % (name, surname)
+    return [display_name, u"%s/%s" % (Person.resource_type, pk)]
 
 #------------------------------------------------------------------------------#
 #                                                                              #
@@ -20,9 +30,7 @@ from gasistafelice.base.models import Person
 class Block(BlockSSDataTables):
 
     BLOCK_NAME = "users" 
-    #FIXME minor: BLOCK_DESCRIPTION = _lazy("Users")
-    #FIXME minor: _lazy is appropriate, but there is probably some bug elsewhere...now use ugettext it is safe in our case
-    BLOCK_DESCRIPTION = _("Users")
+    BLOCK_DESCRIPTION = _lazy("Users")
     BLOCK_VALID_RESOURCE_TYPES = [] #KO: because we NEED subclasses
 
     COLUMN_INDEX_NAME_MAP = {
@@ -37,6 +45,20 @@ class Block(BlockSSDataTables):
         8: 'person'
     }
 
+    DATATABLES_COLUMNS = (
+        Column('pk'),
+        Column('username'),
+        Column('first_name'),
+        Column('last_name'),
+        Column('email'),
+        Column('last_login', render=date_renderer("Y b d H:i")),
+        Column('date_joined', render=date_renderer("Y b d H:i")),
+        Column('is_active', render=bool_img),
+        Column('person__pk', 'person__display_name', 'person__name', 'person__surname', 
+            render=render_person
+        ),
+    )
+
     def _get_user_actions(self, request):
 
         user_actions = []
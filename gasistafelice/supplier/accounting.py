@@ -2,12 +2,15 @@ from django.utils.translation import ugettext as ug, ugettext_lazy as _
 
 from simple_accounting.exceptions import MalformedTransaction
 from simple_accounting.models import AccountingProxy, Transaction, LedgerEntry, account_type
-from simple_accounting.utils import register_transaction
+
+from gasistafelice.base.balances import register_transaction, get_child_balances
+from gasistafelice.base import account_paths
+from gasistafelice.base.accounting import AccountTreeMixin
 
 from gasistafelice.consts import INCOME, EXPENSE, PACT_EXTRA
 from datetime import datetime
 
-class SupplierAccountingProxy(AccountingProxy):
+class SupplierAccountingProxy(AccountTreeMixin, AccountingProxy):
     """
     This class is meant to be the place where implementing the accounting API 
     for ``Supplier``-like economic subjects.
@@ -60,15 +63,12 @@ class SupplierAccountingProxy(AccountingProxy):
         """
         List all transactions. Return LedgerEntry (account, transaction, amount)
         """
-        return self.system[base_path].ledger_entries
+        return account_paths.get_account(self.system, base_path).ledger_entries
 
     def entries_pact(self, gas):
         """
         List all transactions for one pact. Return LedgerEntry (account, transaction, amount)
         """
-        #UGLY: remove me when done and executed one command that regenerate all missing accounts
-        self.missing_accounts(gas)
-
         supplier = self.subject.instance
         gas_system = gas.accounting.system
 
@@ -123,20 +123,19 @@ class SupplierAccountingProxy(AccountingProxy):
         #Correzione a favore del GAS: +GAS -fornitore
         if target == EXPENSE: #+GAS -Supplier
 
-            #UGLY: remove me when done and executed one command that regenerate all missing accounts
-            self.missing_accounts(gas)
+            self.ensure_accounts(gas)
 
-            source_account = self.system['/wallet']
-            exit_point = self.system['/expenses/gas/' + gas.uid]
-            entry_point = gas_system['/incomes/suppliers/' + supplier.uid]
-            target_account = gas_system['/cash']
+            source_account = account_paths.get_account(self.system, '/wallet')
+            exit_point = self.get_tree_account(gas, self.system, '/expenses/gas/' + gas.uid)
+            entry_point = self.get_tree_account(gas, gas_system, '/incomes/suppliers/' + supplier.uid)
+            target_account = account_paths.get_account(gas_system, '/cash')
 
         #Correzione a favore del fornitore: +fornitore -GAS
         elif  target == INCOME: #+Supplier -GAS
-            source_account = gas_system['/cash']
-            exit_point = gas_system['/expenses/suppliers/' + supplier.uid]
-            entry_point = self.system['/incomes/gas/' + gas.uid]
-            target_account = self.system['/wallet']
+            source_account = account_paths.get_account(gas_system, '/cash')
+            exit_point = account_paths.get_account(gas_system, '/expenses/suppliers/' + supplier.uid)
+            entry_point = account_paths.get_account(self.system, '/incomes/gas/' + gas.uid)
+            target_account = account_paths.get_account(self.system, '/wallet')
 
         else:
             raise MalformedTransaction(_("Payment target %s not identified") % target)
@@ -153,24 +152,26 @@ class SupplierAccountingProxy(AccountingProxy):
         transaction = register_transaction(source_account, exit_point, entry_point, target_account, amount, description, issuer, date, kind)
 
     def get_pact_balance(self, pact):
+        """Return the balance of ``pact``.
 
-        #UGLY: remove me when done and executed one command that regenerate all missing accounts
-        self.missing_accounts(pact.gas)
+        It does not create missing accounts (see ``ensure_accounts``):
+        an account that does not exist has no entries.
+        """
+        gas_uid = pact.gas.uid
 
         #add economic payment for orders + PACT_EXTRA for +fornitore -GAS
         #COMMENT domthu: these two lines of code report same values
         #acc_tot = self.gas.accounting.system['/expenses/suppliers/' + self.supplier.uid].balance
-        acc_tot = self.system['/incomes/gas/' + pact.gas.uid].balance
+        acc_tot = get_child_balances(self.system, '/incomes/gas', [gas_uid]).get(gas_uid, 0)
         #add to acc_tot other economics operations like 
         # PACT_EXTRA +GAS -fornitore done into method  def extra_operation
-        acc_tot -= self.system['/expenses/gas/' + pact.gas.uid].balance
+        acc_tot -= get_child_balances(self.system, '/expenses/gas', [gas_uid]).get(gas_uid, 0)
         
         #COMMENT domthu: this is for the DES's balance
         #They include all GAS'economics entries + OutOfDES operations
         #acc_tot = self.supplier.accounting.system['/wallet'].balance
         return acc_tot
 
-    #UGLY: remove me when done and executed one command that regenerate all missing accounts
     def missing_accounts(self, gas):
         supplier = self.subject.instance
         gas_acc = gas.accounting
@@ -112,9 +112,36 @@ class SingleSupplierStockForm(forms.Form):
             #ss = SupplierStock()
             log.debug("New SingleSupplierStockForm")
 
+class BaseSupplierStockFormSet(BaseFormSetWithRequest):
+
+    def save(self):
+        """Save product names, then apply price and availability changes in bulk."""
+
+        from gasistafelice.gas.propagation import apply_stock_changes
+
+        forms = [form for form in self.forms 
+            if form.cleaned_data and form.cleaned_data.get('id')
+        ]
+        stocks = SupplierStock.objects.select_related('product').in_bulk(
+            [form.cleaned_data['id'] for form in forms]
+        )
+        changes = {}
+        for form in forms:
+            ss = stocks[form.cleaned_data['id']]
+            if ss.product.name != form.cleaned_data['product']:
+                ss.product.name = form.cleaned_data['product']
+                ss.product.save()
+            changes[ss.pk] = {
+                'price' : form.cleaned_data['price'],
+                'amount_available' : [0, ALWAYS_AVAILABLE][form.cleaned_data.get('availability')],
+            }
+
+        changed = apply_stock_changes(changes)
+        log.debug("Save SupplierStockFormSet: %d stocks changed" % len(changed))
+
 SingleSupplierStockFormSet = formset_factory(
     form=SingleSupplierStockForm, 
-    formset=BaseFormSetWithRequest, 
+    formset=BaseSupplierStockFormSet, 
     extra=5,
 )
 
@@ -10,6 +10,7 @@ from gasistafelice.lib import get_params_from_template
 from gasistafelice.supplier.models import Supplier, Product, SupplierStock, Certification, ProductCategory, ProductPU, ProductMU
 from gasistafelice.gas.models import GAS, GASMember
 from gasistafelice.base.models import Place, Person, Contact
+from gasistafelice.base import account_paths
 
 import decimal
 
@@ -153,6 +154,7 @@ class Command(BaseCommand):
                 except KeyError, e:
                     raise CommandError("Supplier Key '%s' is REQUIRED." % e.message)
 
+        account_paths.forget_changed()
         return 0
 
     def _prepare_data(self, csv_filename, delimiter, tmpl):
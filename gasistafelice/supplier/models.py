@@ -29,13 +29,14 @@ from gasistafelice.lib.fields.models import CurrencyField, PrettyDecimalField
 from gasistafelice.lib.fields import display
 
 from gasistafelice.base.const import SUPPLIER_FLAVOUR_LIST, ALWAYS_AVAILABLE
+from gasistafelice.base.balances import get_balance
+from gasistafelice.base import account_paths
 from gasistafelice.base.utils import get_resource_icon_path
 from gasistafelice.base.models import PermissionResource, Person, Place, Contact
 from gasistafelice.des.models import DES, Siteattr
 
 from gasistafelice.consts import SUPPLIER_REFERRER
 from gasistafelice.supplier.accounting import SupplierAccountingProxy
-from gasistafelice.gas import signals
 
 from gasistafelice.base import const
 
@@ -421,7 +422,7 @@ class Supplier(models.Model, PermissionResource):
     @property
     def balance(self):
         """Accounting sold for this supplier"""
-        acc_tot = self.accounting.system['/wallet'].balance
+        acc_tot = get_balance(account_paths.get_account(self.accounting.system, '/wallet'))
         return acc_tot
 
 
@@ -1141,33 +1142,14 @@ class SupplierStock(models.Model, PermissionResource):
         if not self.code:
             self.code = None
 
-        # CASCADING 
-        if self.has_changed_availability:
-            log.debug('Availability has changed for product %s' %  self.product)
-            #For each GASSupplierStock (present for each GASSupplierSolidalPact) set new availability and save
-            for gss in self.gasstocks:
-                if (self.availability != gss.enabled):
-                    log.debug("Save SingleSupplierStock product availability has changed old(%s) new(%s)" % (gss.enabled, self.availability))
-                    gss.enabled = self.availability
-                    gss.save()
-                    if not gss.enabled:
-                        signals.gasstock_product_disabled.send(sender=gss)
-                    else:
-                        signals.gasstock_product_enabled.send(sender=gss)
-                    
-            log.debug('Ended(%d)' % self.gasstocks.count())
-
         # CASCADING set until GASMemberOrder
-        if self.has_changed_price:
-            log.debug('Price has changed for product %s' %  self.product)
-            for gsop in self.orderable_products:
-                gsop.order_price = self.price
-                gsop.save()
-
-            for gmo in self.basket:
-                if gmo.has_changed:
-                    signals.gmo_price_update.send(sender=gmo)
-            
+        if self.pk:
+            from gasistafelice.gas.propagation import apply_stock_changes
+            apply_stock_changes({ self.pk : {
+                'price' : self.price,
+                'amount_available' : self.amount_available,
+            }})
+
         created = False
         if not self.pk:
             created = True
@@ -1192,11 +1174,15 @@ class SupplierStock(models.Model, PermissionResource):
                     step=self.detail_step,
             )
         else:
-            for gasstock in self.gasstocks:
-
-                gasstock.minimum_amount = self.detail_minimum_amount
-                gasstock.step = self.detail_step
-                gasstock.save()
+            self.gasstock_set.update(
+                minimum_amount=self.detail_minimum_amount,
+                step=self.detail_step,
+            )
+            # QuerySet.update() does not send signals
+            from gasistafelice.gas import report_cache
+            from gasistafelice.gas.models import GASSupplierOrderProduct
+            report_cache.invalidate(GASSupplierOrderProduct.objects.filter(
+                gasstock__stock=self).values_list('order', flat=True))
 
     #-- Resource API --#
 